@@ -112,6 +112,95 @@ class ConfigManager:
         key = f"frecuencia{sensor}".lower()
         self.set(key, seconds)
     
+    def get_serial_protocol(self) -> str:
+        protocol = str(self.get("protocolo", Settings.SERIAL_PROTOCOL)).lower()
+        return protocol if protocol in ("texto", "binario") else Settings.SERIAL_PROTOCOL
+    
+    def set_serial_protocol(self, protocol: str):
+        self.set("protocolo", protocol)
+    
+    def get_bio_channels(self) -> int:
+        """Electrodos por planta (canales=1..8)"""
+        try:
+            return min(8, max(1, int(self.get("canales", Settings.BIO_CHANNELS))))
+        except (ValueError, TypeError):
+            return Settings.BIO_CHANNELS
+    
+    def get_acquisition_ports(self) -> Dict[str, str]:
+        """Dispositivos de adquisición: puertos=planta1:COM7,planta2:tcp://192.168.1.50:3333"""
+        ports = {}
+        for entry in str(self.get("puertos", "")).split(","):
+            if ":" in entry:
+                deviceId, port = entry.split(":", 1)
+                if deviceId.strip() and port.strip():
+                    ports[deviceId.strip()] = port.strip()
+        return ports
+    
+    def get_storage_backend(self) -> str:
+        backend = str(self.get("almacenamiento", Settings.STORAGE_BACKEND)).lower()
+        return backend if backend in ("columnar", "sqlite", "texto") else Settings.STORAGE_BACKEND
+    
+    def set_storage_backend(self, backend: str):
+        self.set("almacenamiento", backend)
+    
+    def get_storage_fsync_policy(self) -> str:
+        policy = str(self.get("sincronizacion", Settings.STORAGE_FSYNC_POLICY)).lower()
+        return policy if policy in ("siempre", "periodico", "nunca") else Settings.STORAGE_FSYNC_POLICY
+    
+    def get_retention_raw_days(self) -> int:
+        try:
+            return max(1, int(self.get("retencion_cruda_dias", Settings.RETENTION_RAW_DAYS)))
+        except (ValueError, TypeError):
+            return Settings.RETENTION_RAW_DAYS
+    
+    def get_retention_max_days(self) -> int:
+        """Días de historial a conservar; 0 = sin límite"""
+        try:
+            return max(0, int(self.get("retencion_maxima_dias", Settings.RETENTION_MAX_DAYS)))
+        except (ValueError, TypeError):
+            return Settings.RETENTION_MAX_DAYS
+    
+    def get_snapshot_storage(self) -> bool:
+        """instantaneas=si guarda una fila por tick con todos los sensores"""
+        value = str(self.get("instantaneas", "si" if Settings.SNAPSHOT_STORAGE else "no")).strip().lower()
+        return value in ("si", "sí", "1", "true")
+    
+    def set_snapshot_storage(self, enabled: bool):
+        self.set("instantaneas", "si" if enabled else "no")
+    
+    def get_snapshot_interval(self) -> int:
+        try:
+            return max(1, int(self.get("frecuenciainstantaneas", Settings.SNAPSHOT_INTERVAL)))
+        except (ValueError, TypeError):
+            return Settings.SNAPSHOT_INTERVAL
+    
+    def get_sensor_compression(self, sensor: str) -> str:
+        """Modo de compresión del historial del sensor: no, banda o puerta"""
+        mode = str(self.get(f"compresion{sensor}".lower(), Settings.SENSOR_COMPRESSION)).strip().lower()
+        return mode if mode in ("no", "banda", "puerta") else Settings.SENSOR_COMPRESSION
+    
+    def get_compression_tolerance(self, sensor: str) -> float:
+        default = Settings.DEFAULT_COMPRESSION_TOLERANCE.get(sensor, 0.0)
+        try:
+            return max(0.0, float(self.get(f"tolerancia{sensor}".lower(), default)))
+        except (ValueError, TypeError):
+            return default
+    
+    def get_history_plant(self) -> Optional[str]:
+        """Clave de planta del historial SQLite; None si aún no se fijó"""
+        plant = self.get("planta_historial", None, use_cache=False)
+        return None if plant is None else str(plant).strip()
+    
+    def set_history_plant(self, plant: str):
+        self.set("planta_historial", plant)
+    
+    def get_capture_dir(self) -> str:
+        """Carpeta donde se guardan las capturas crudas; vacío = desactivado"""
+        return str(self.get("captura", "")).strip()
+    
+    def set_capture_dir(self, path: str):
+        self.set("captura", path)
+    
     def clear_cache(self):
         self._cache.clear()
         self._cache_timestamps.clear()
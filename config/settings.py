@@ -11,21 +11,63 @@ class Settings:
     DEFAULT_PORT = 'COM7'
     DEFAULT_BAUDRATE = 115200
     SERIAL_TIMEOUT = 2
+    SERIAL_PROTOCOL = "texto"  # "texto" | "binario"
+    BIO_CHANNELS = 1  # Electrodos por planta (B1..B8)
+    PROTOCOL_DETECTION_BYTES = 4096
+    
+    ACQUISITION_POLL_INTERVAL = 0.005  # s
+    ACQUISITION_HOUSEKEEPING_INTERVAL = 0.5  # s
+    ACQUISITION_RECONNECT_INTERVAL = 5  # s
     
     SIGNAL_OFFSET = 1.695
     SIGNAL_GAIN = 5.97
     SAMPLING_FREQUENCY = 200  # Hz
     BUFFER_MAX_SIZE = 5000
+    TIMESTAMP_MODE = "reloj_muestras"  # "reloj_muestras" | "llegada"
+    CLOCK_REANCHOR_INTERVAL = 10  # s
     
     NOTCH_FREQUENCY = 60
     NOTCH_BANDWIDTH = 1
     LOWPASS_CUTOFF = 10  # Hz
     LOWPASS_ORDER = 4
+    FEATURE_WINDOWS = (50, 200, 5000)  # Muestras de las ventanas de RollingFeatures
+    SPECTRAL_BANDS = ((0, 5), (5, 10), (10, 20), (20, 50), (50, 100))  # Hz, [fmin, fmax)
+    STFT_WINDOW = 256  # Muestras por cuadro STFT (1.28 s a 200 Hz)
+    STFT_HOP = 64  # Muestras nuevas entre cuadros
+    STFT_FRAMES = 512  # Cuadros en el anillo de cada stream
+    WELCH_SEGMENT = 512  # Muestras por segmento de Welch (2.56 s a 200 Hz)
+    WELCH_OVERLAP = 256
+    WELCH_FORGETTING = 0.9  # Peso del promedio anterior por segmento (memoria ~10 segmentos)
+    DECIMATION_RATES = (50, 10)  # Hz, etapas en cascada desde SAMPLING_FREQUENCY
+    DECIMATION_TAPS_PER_PHASE = 8
+    PLOT_RATE = 50  # Hz de la señal en la gráfica en vivo
+    ARCHIVE_RATE = 10  # Hz de la señal que se archiva
     
     CONFIG_FILE = "configuracion.txt"
     PROFILE_FILE = "Perfil.txt"
     SIMULATION_FILE = "simulacion.txt"
     HISTORY_DIR = "historialLecturas"
+    STORAGE_BACKEND = "columnar"  # "columnar" | "sqlite" | "texto"
+    COLUMNAR_SEGMENT_ROWS = 65536
+    SQLITE_HISTORY_FILE = "historial.db"  # Dentro de HISTORY_DIR
+    STORAGE_QUEUE_SIZE = 10000
+    STORAGE_BATCH_SIZE = 256
+    STORAGE_FLUSH_INTERVAL = 2.0  # s
+    STORAGE_FSYNC_POLICY = "periodico"  # "siempre" | "periodico" | "nunca"
+    STORAGE_FSYNC_INTERVAL = 30  # s
+    RETENTION_RAW_DAYS = 30  # Días con todas las lecturas
+    RETENTION_DOWNSAMPLE_SECONDS = 600  # Resolución de los meses compactados
+    RETENTION_MAX_DAYS = 0  # 0 = conservar todo
+    COMPACTION_INTERVAL = 3600  # s
+    ROLLUP_RESOLUTIONS = (60, 3600, 86400)  # s: minuto, hora, día
+    REPORT_MIN_POINTS = 500  # Puntos mínimos al elegir la resolución de un reporte
+    QUERY_CACHE_SIZE = 32  # Resultados de DataStorage.query en caché (LRU)
+    SNAPSHOT_STORAGE = False  # Una fila por tick con todos los sensores (instantaneas=si)
+    SNAPSHOT_DIR = "instantaneas"  # Dentro de HISTORY_DIR
+    SNAPSHOT_SENSORS = ("temperatura", "humedad_relativa", "iluminacion", "humedad_suelo")  # Orden de SensorSnapshot
+    SNAPSHOT_INTERVAL = 5  # s entre filas
+    SENSOR_COMPRESSION = "no"  # "no" | "banda" | "puerta" (compresion<sensor>=)
+    COMPRESSION_MAX_GAP = 3600  # s máximos entre lecturas guardadas de una serie comprimida
     RECORDINGS_DIR = "grabaciones"
     AUDIO_DIR = "audio"
     RAIN_AUDIO = "audio/rain.mp3"
@@ -37,6 +79,14 @@ class Settings:
         "humedad_suelo": 3600
     }
     
+    DEFAULT_COMPRESSION_TOLERANCE = {  # tolerancia<sensor>=, en unidades del sensor
+        "temperatura": 0.1,
+        "humedad_relativa": 0.5,
+        "iluminacion": 100,
+        "humedad_suelo": 0.5,
+        "bienestar": 0.5
+    }
+    
     DEFAULT_TONALITY = "C"
     MUSIC_VOLUME = 0.2
     MIDI_INSTRUMENT = 92
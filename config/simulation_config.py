@@ -3,9 +3,8 @@ Gestor de configuración de simulación
 Lee los rangos desde simulacion.txt
 """
 import os
-import random
 import time
-import math
+import numpy as np
 from typing import Dict
 from config.settings import Settings
 
@@ -19,6 +18,9 @@ class SimulationConfig:
         
         self.lastSensorUpdate = 0
         self.bioSignalPhase = 0
+        
+        seed = int(self.config['semilla'])
+        self.rng = np.random.default_rng(seed if seed >= 0 else None)
     
     def _loadConfig(self) -> Dict:
         defaultConfig = {
@@ -34,7 +36,10 @@ class SimulationConfig:
             'voltajeBioMin': -15.0,
             'voltajeBioMax': 15.0,
             'voltajeBioVariacion': 5.0,
-            'frecuenciaActualizacionSensores': 3.0
+            'frecuenciaActualizacionSensores': 3.0,
+            'velocidadSimulacion': 1.0,
+            'tamanoBloqueSimulacion': 10.0,
+            'semilla': -1.0
         }
         
         if not os.path.exists(self.configFile):
@@ -70,35 +75,53 @@ class SimulationConfig:
     def debeUsarDatosReales(self) -> bool:
         return self.usarDatosReales
     
+    def getVelocidad(self) -> float:
+        """Factor de velocidad respecto a tiempo real; 0 = lo más rápido posible"""
+        return max(0.0, self.config['velocidadSimulacion'])
+    
+    def getTamanoBloque(self) -> int:
+        return max(1, int(self.config['tamanoBloqueSimulacion']))
+    
     def generarTemperatura(self) -> float:
-        return random.uniform(
+        return self.rng.uniform(
             self.config['temperaturaMin'],
             self.config['temperaturaMax']
         )
     
     def generarHumedadRelativa(self) -> float:
-        return random.uniform(
+        return self.rng.uniform(
             self.config['humedadRelativaMin'],
             self.config['humedadRelativaMax']
         )
     
     def generarIluminacion(self) -> float:
-        return random.uniform(
+        return self.rng.uniform(
             self.config['iluminacionMin'],
             self.config['iluminacionMax']
         )
     
     def generarHumedadSuelo(self) -> float:
-        return random.uniform(
+        return self.rng.uniform(
             self.config['humedadSueloMin'],
             self.config['humedadSueloMax']
         )
     
     def generarVoltajeBioelectrico(self) -> float:
-        self.bioSignalPhase += 0.1
+        return float(self.generarBloqueBioelectrico(1)[0])
+    
+    def generarBloqueBioelectrico(self, n: int, canales: int = 1) -> np.ndarray:
+        """
+        Genera n muestras consecutivas (mV) de la señal simulada en una sola
+        operación; con varios canales, una matriz (canales x n) con cada
+        electrodo desfasado
+        """
+        phases = self.bioSignalPhase + 0.1 * np.arange(1, n + 1)
+        self.bioSignalPhase = float(phases[-1])
         
-        baseSignal = math.sin(self.bioSignalPhase)
-        noise = random.uniform(-0.3, 0.3)
+        if canales > 1:
+            phases = phases + 0.7 * np.arange(canales)[:, None]
+        baseSignal = np.sin(phases)
+        noise = self.rng.uniform(-0.3, 0.3, baseSignal.shape)
         
         minVoltage = self.config['voltajeBioMin']
         maxVoltage = self.config['voltajeBioMax']
@@ -106,10 +129,12 @@ class SimulationConfig:
         
         voltage = (baseSignal * variation) + noise
         
-        return max(minVoltage, min(maxVoltage, voltage))
+        return np.clip(voltage, minVoltage, maxVoltage)
     
-    def deberiActualizarSensores(self) -> bool:
-        currentTime = time.time()
+    def deberiActualizarSensores(self, currentTime: float = None) -> bool:
+        """currentTime permite usar el tiempo simulado en modo acelerado"""
+        if currentTime is None:
+            currentTime = time.time()
         frequency = self.config['frecuenciaActualizacionSensores']
         
         if currentTime - self.lastSensorUpdate >= frequency:
@@ -0,0 +1,212 @@
+"""
+Almacenamiento columnar binario para el historial de sensores
+Una serie es una carpeta con segmentos de solo anexado que se leen con np.memmap
+"""
+import glob
+import os
+import threading
+import numpy as np
+from typing import List, Optional, Tuple
+from core.time_index import SegmentIndex
+
+
+TIMESTAMP_DTYPE = np.dtype('<i8')
+VALUE_DTYPE = np.dtype('<f4')
+
+
+class ColumnarSeries:
+    """
+    Columnas separadas por segmento:
+        seg_000000.ts   int64    segundos desde 1970 en hora local (la misma
+                                 base que las marcas "YYYY-mm-dd HH:MM:SS")
+        seg_000000.val  float32  valor (width valores por fila en una serie
+                                 ancha, p. ej. un sensor por columna)
+    
+    Cada segmento admite segmentRows filas; al llenarse se abre el
+    siguiente. Las filas de un segmento son las que caben en ambas columnas,
+    así un anexado interrumpido a medias no corrompe la lectura.
+    Se asume que las marcas llegan en orden creciente.
+    
+    Los segmentos llenos se registran en un SegmentIndex con su primera y
+    última marca: una lectura por rango abre solo los segmentos que se
+    solapan con él y el último (abierto), sin importar cuánto historial haya.
+    """
+    
+    def __init__(self, directory: str, segmentRows: int = 65536, width: int = 1):
+        self.directory = directory
+        self.segmentRows = int(segmentRows)
+        self.width = int(width)
+        self.lock = threading.RLock()
+        self._repairTail()
+        self.index = SegmentIndex(directory)
+        self._tail = 0
+        self._syncIndex()
+    
+    def _segmentBase(self, number: int) -> str:
+        return os.path.join(self.directory, f"seg_{number:06d}")
+    
+    def _shape(self, rows: int) -> Tuple[int, ...]:
+        """Forma de rows filas de valores"""
+        return (rows,) if self.width == 1 else (rows, self.width)
+    
+    def _segmentNumbers(self) -> List[int]:
+        paths = glob.glob(os.path.join(self.directory, "seg_*.ts"))
+        return sorted(int(os.path.basename(p)[4:-3]) for p in paths)
+    
+    def _rows(self, base: str) -> int:
+        try:
+            tsRows = os.path.getsize(base + ".ts") // TIMESTAMP_DTYPE.itemsize
+            valRows = os.path.getsize(base + ".val") // (VALUE_DTYPE.itemsize * self.width)
+        except OSError:
+            return 0
+        return min(tsRows, valRows)
+    
+    def _repairTail(self):
+        """Recorta al último segmento las filas incompletas de una escritura cortada"""
+        numbers = self._segmentNumbers()
+        if not numbers:
+            return
+        base = self._segmentBase(numbers[-1])
+        rows = self._rows(base)
+        for suffix, itemsize in ((".ts", TIMESTAMP_DTYPE.itemsize), (".val", VALUE_DTYPE.itemsize * self.width)):
+            path = base + suffix
+            size = rows * itemsize
+            if os.path.exists(path) and os.path.getsize(path) != size:
+                with open(path, "r+b") as f:
+                    f.truncate(size)
+    
+    def _syncIndex(self):
+        """Registra los segmentos llenos que aún no figuran en el índice"""
+        numbers = self._segmentNumbers()
+        self._tail = numbers[-1] if numbers else 0
+        for number in numbers[:-1]:
+            if number not in self.index:
+                self._registerSegment(number)
+    
+    def _registerSegment(self, number: int):
+        mapped = self._mapSegment(number)
+        if mapped is not None:
+            ts, _ = mapped
+            self.index.add(number, int(ts[0]), int(ts[-1]), len(ts))
+    
+    def exists(self) -> bool:
+        return self._rows(self._segmentBase(self._tail)) > 0
+    
+    def __len__(self) -> int:
+        return self.index.rows + self._rows(self._segmentBase(self._tail))
+    
+    def firstTimestamp(self) -> Optional[int]:
+        """Marca de la primera fila (None si la serie está vacía)"""
+        with self.lock:
+            for number in self._segmentNumbers():
+                mapped = self._mapSegment(number)
+                if mapped is not None and len(mapped[0]):
+                    return int(mapped[0][0])
+        return None
+    
+    def append(self, timestamps, values, fsync: bool = False):
+        """
+        Anexa marcas (int64 s o datetime64) y valores; acepta escalares o arreglos
+        (en una serie ancha, una fila de width valores por marca).
+        fsync=True fuerza los datos a disco antes de volver.
+        """
+        timestamps = np.atleast_1d(np.asarray(timestamps))
+        if np.issubdtype(timestamps.dtype, np.datetime64):
+            timestamps = timestamps.astype('datetime64[s]').astype(np.int64)
+        timestamps = timestamps.astype(TIMESTAMP_DTYPE, copy=False)
+        values = np.asarray(values, dtype=VALUE_DTYPE).reshape(self._shape(-1))
+        
+        if timestamps.size != len(values):
+            raise ValueError("timestamps y values deben tener la misma longitud")
+        if timestamps.size == 0:
+            return
+        
+        with self.lock:
+            os.makedirs(self.directory, exist_ok=True)
+            number = self._tail
+            rows = self._rows(self._segmentBase(number))
+            
+            offset = 0
+            while offset < timestamps.size:
+                if rows >= self.segmentRows:
+                    self._registerSegment(number)
+                    number += 1
+                    self._tail = number
+                    rows = 0
+                count = min(self.segmentRows - rows, timestamps.size - offset)
+                base = self._segmentBase(number)
+                for suffix, column in ((".ts", timestamps), (".val", values)):
+                    with open(base + suffix, "ab") as f:
+                        f.write(column[offset:offset + count].tobytes())
+                        if fsync:
+                            f.flush()
+                            os.fsync(f.fileno())
+                rows += count
+                offset += count
+    
+    def _mapSegment(self, number: int) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        base = self._segmentBase(number)
+        rows = self._rows(base)
+        if rows == 0:
+            return None
+        ts = np.memmap(base + ".ts", dtype=TIMESTAMP_DTYPE, mode='r', shape=(rows,))
+        vals = np.memmap(base + ".val", dtype=VALUE_DTYPE, mode='r', shape=self._shape(rows))
+        return ts, vals
+    
+    def read(self, start: Optional[int] = None, end: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Filas con start <= marca < end (segundos int64; None = sin límite).
+        Los segmentos fuera del rango se descartan mirando solo su primera y
+        última marca. Devuelve copias (int64, float32) independientes del
+        archivo; en una serie ancha los valores tienen forma (filas, width).
+        """
+        tsParts = []
+        valParts = []
+        
+        with self.lock:
+            for number in self.index.select(start, end) + [self._tail]:
+                mapped = self._mapSegment(number)
+                if mapped is None:
+                    continue
+                ts, vals = mapped
+                if (end is not None and ts[0] >= end) or (start is not None and ts[-1] < start):
+                    continue
+                
+                first = 0 if start is None else int(np.searchsorted(ts, start, side='left'))
+                last = len(ts) if end is None else int(np.searchsorted(ts, end, side='left'))
+                if last > first:
+                    tsParts.append(np.array(ts[first:last]))
+                    valParts.append(np.array(vals[first:last]))
+        
+        if not tsParts:
+            return np.empty(0, dtype=TIMESTAMP_DTYPE), np.empty(self._shape(0), dtype=VALUE_DTYPE)
+        return np.concatenate(tsParts), np.concatenate(valParts)
+    
+    def truncate(self, rows: int):
+        """Conserva solo las primeras rows filas (deshace anexados no confirmados)"""
+        with self.lock:
+            kept = 0
+            for number in self._segmentNumbers():
+                base = self._segmentBase(number)
+                segmentRows = self._rows(base)
+                keep = min(segmentRows, max(0, rows - kept))
+                if keep < segmentRows:
+                    for suffix, itemsize in ((".ts", TIMESTAMP_DTYPE.itemsize), (".val", VALUE_DTYPE.itemsize * self.width)):
+                        if keep == 0:
+                            os.remove(base + suffix)
+                        else:
+                            with open(base + suffix, "r+b") as f:
+                                f.truncate(keep * itemsize)
+                kept += keep
+            self.index.clear()
+            self._syncIndex()
+    
+    def clear(self):
+        with self.lock:
+            for number in self._segmentNumbers():
+                base = self._segmentBase(number)
+                for suffix in (".ts", ".val"):
+                    if os.path.exists(base + suffix):
+                        os.remove(base + suffix)
+            self.index.clear()
+            self._tail = 0
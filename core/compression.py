@@ -0,0 +1,200 @@
+"""
+Compresión con pérdida acotada del historial de sensores
+Banda muerta y puerta giratoria (swinging door): solo se guardan las
+lecturas necesarias para reconstruir la serie interpolando dentro de la
+tolerancia configurada
+"""
+import threading
+import numpy as np
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple
+
+
+COMPRESSION_MODES = ("no", "banda", "puerta")
+
+Point = Tuple[int, float]
+
+
+def interpolate(timestamps: np.ndarray, values: np.ndarray, at: np.ndarray) -> np.ndarray:
+    """Reconstrucción lineal de una serie comprimida en las marcas at (NaN fuera de su rango)"""
+    at = np.asarray(at, dtype=np.int64)
+    result = np.full(len(at), np.nan)
+    if len(timestamps) == 0:
+        return result
+    timestamps = np.asarray(timestamps, dtype=np.int64)
+    inside = (at >= timestamps[0]) & (at <= timestamps[-1])
+    result[inside] = np.interp(at[inside], timestamps, np.asarray(values, dtype=np.float64))
+    return result
+
+
+class Compressor(ABC):
+    """
+    Estado de compresión de un sensor. feed() recibe los lotes del
+    StorageWriter en orden y devuelve las lecturas a guardar; la última
+    lectura recibida puede quedar retenida (pending) hasta saber si hace
+    falta, y flush() la devuelve al cerrar.
+    
+    maxGap fuerza a guardar una lectura al menos cada maxGap segundos, así
+    una señal plana no deja horas sin puntos en disco.
+    """
+    
+    mode = "no"
+    
+    def __init__(self, tolerance: float, maxGap: int = 3600):
+        self.tolerance = float(tolerance)
+        self.maxGap = int(maxGap)
+        self.anchor: Optional[Point] = None
+        self.pending: Optional[Point] = None
+    
+    def feed(self, timestamps: np.ndarray, values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        kept: List[Point] = []
+        for timestamp, value in zip(np.asarray(timestamps, dtype=np.int64).tolist(), np.asarray(values, dtype=np.float64).tolist()):
+            last = self.pending or self.anchor
+            if value != value or (last is not None and timestamp <= last[0]):
+                continue
+            self._feedPoint(timestamp, value, kept)
+        if not kept:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+        stamps, kept = zip(*kept)
+        return np.array(stamps, dtype=np.int64), np.array(kept, dtype=np.float64)
+    
+    @abstractmethod
+    def _feedPoint(self, timestamp: int, value: float, kept: List[Point]):
+        pass
+    
+    def _archive(self, point: Point, kept: List[Point]):
+        kept.append(point)
+        self.anchor = point
+        self.pending = None
+    
+    def flush(self) -> Optional[Point]:
+        """Lectura retenida que falta guardar (None si no hay)"""
+        point = self.pending
+        if point is not None:
+            self.anchor = point
+            self.pending = None
+        return point
+
+
+class DeadbandCompressor(Compressor):
+    """
+    Banda muerta: se guarda una lectura cuando se aparta más de tolerance
+    de la última guardada, junto con la lectura anterior a ese salto para
+    que la interpolación no adelante el cambio. Entre dos puntos guardados
+    la serie interpolada queda a menos de 2 * tolerance de las lecturas.
+    """
+    
+    mode = "banda"
+    
+    def _feedPoint(self, timestamp: int, value: float, kept: List[Point]):
+        anchor = self.anchor
+        if anchor is None:
+            self._archive((timestamp, value), kept)
+        elif timestamp - anchor[0] >= self.maxGap or abs(value - anchor[1]) > self.tolerance:
+            # La lectura retenida cierra el tramo plano aunque el salto
+            # coincida con maxGap
+            if self.pending is not None:
+                kept.append(self.pending)
+            self._archive((timestamp, value), kept)
+        else:
+            self.pending = (timestamp, value)
+
+
+class SwingingDoorCompressor(Compressor):
+    """
+    Puerta giratoria: desde el último punto guardado se mantienen la
+    pendiente máxima y mínima que pasan a menos de tolerance de todas las
+    lecturas siguientes. Cuando las "puertas" se cruzan, se guarda la
+    lectura anterior (ajustada a las puertas) y se empieza desde ella; la
+    recta entre dos puntos guardados queda a menos de tolerance de todas
+    las lecturas intermedias.
+    """
+    
+    mode = "puerta"
+    
+    def __init__(self, tolerance: float, maxGap: int = 3600):
+        super().__init__(tolerance, maxGap)
+        self.upper = np.inf
+        self.lower = -np.inf
+    
+    def _feasible(self) -> Point:
+        """
+        Lectura retenida llevada a la recta más cercana dentro de las puertas
+        (a menos de tolerance de su valor), para que el tramo desde el último
+        punto guardado respete la tolerancia en todas las lecturas
+        """
+        timestamp, value = self.pending
+        elapsed = timestamp - self.anchor[0]
+        slope = min(max((value - self.anchor[1]) / elapsed, self.lower), self.upper)
+        return timestamp, self.anchor[1] + slope * elapsed
+    
+    def _slopes(self, timestamp: int, value: float) -> Tuple[float, float]:
+        elapsed = timestamp - self.anchor[0]
+        return (value + self.tolerance - self.anchor[1]) / elapsed, (value - self.tolerance - self.anchor[1]) / elapsed
+    
+    def _feedPoint(self, timestamp: int, value: float, kept: List[Point]):
+        if self.anchor is None:
+            self._archive((timestamp, value), kept)
+            self.upper, self.lower = np.inf, -np.inf
+            return
+        
+        upper, lower = self._slopes(timestamp, value)
+        upper, lower = min(self.upper, upper), max(self.lower, lower)
+        if self.pending is not None and (lower > upper or timestamp - self.anchor[0] > self.maxGap):
+            self._archive(self._feasible(), kept)
+            upper, lower = self._slopes(timestamp, value)
+        
+        self.upper, self.lower = upper, lower
+        self.pending = (timestamp, value)
+    
+    def flush(self) -> Optional[Point]:
+        if self.pending is not None:
+            self.pending = self._feasible()
+        self.upper, self.lower = np.inf, -np.inf
+        return super().flush()
+
+
+def makeCompressor(mode: str, tolerance: float, maxGap: int = 3600) -> Optional[Compressor]:
+    """Compresor del modo ("banda" o "puerta"); None con "no" u otro valor"""
+    for compressorClass in (DeadbandCompressor, SwingingDoorCompressor):
+        if compressorClass.mode == mode:
+            return compressorClass(tolerance, maxGap)
+    return None
+
+
+class CompressorRegistry:
+    """
+    Compresores por sensor del proceso. El escritor obtiene el de cada lote
+    con configure(), que lo reemplaza si cambian el modo o la tolerancia;
+    los lectores toman la lectura retenida del que devuelve get().
+    """
+    
+    def __init__(self):
+        self._compressors: Dict[str, Compressor] = {}
+        self._lock = threading.Lock()
+    
+    def get(self, sensorName: str) -> Optional[Compressor]:
+        with self._lock:
+            return self._compressors.get(sensorName)
+    
+    def configure(self, sensorName: str, mode: str, tolerance: float, maxGap: int = 3600) -> Tuple[Optional[Compressor], Optional[Compressor]]:
+        """Compresor del sensor para mode y tolerance, y el que reemplazó (None si no cambió)"""
+        with self._lock:
+            current = self._compressors.get(sensorName)
+            if current is not None and (current.mode, current.tolerance) == (mode, float(tolerance)):
+                return current, None
+            
+            compressor = makeCompressor(mode, tolerance, maxGap)
+            if compressor is None:
+                self._compressors.pop(sensorName, None)
+            else:
+                self._compressors[sensorName] = compressor
+            return compressor, current
+    
+    def items(self) -> List[Tuple[str, Compressor]]:
+        with self._lock:
+            return list(self._compressors.items())
+    
+    def discard(self, sensorName: str):
+        with self._lock:
+            self._compressors.pop(sensorName, None)
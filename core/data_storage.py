@@ -3,24 +3,339 @@ Gestor de almacenamiento de datos
 Maneja la persistencia de lecturas de sensores
 """
 import os
+import atexit
+import shutil
 import datetime
+import threading
 import time
-from typing import Dict
+import numpy as np
+from contextlib import ExitStack
+from typing import Dict, List, Optional, Sequence, Tuple
 from config.settings import Settings
 from config.config_manager import ConfigManager
+from core.compression import Compressor, CompressorRegistry
+from core.history_query import HistoryQuery, QueryCache
+from core.partitioned_storage import PartitionedSeries, CompactionJob
+from core.rollups import RollupSeries
+from core.snapshot_storage import SnapshotSeries
+from core.sqlite_storage import SqliteHistory
+from core.time_index import TextTimeIndex
+from core.storage_writer import StorageWriter
+from model.sensor_data import SensorSnapshot, SensorSnapshotBatch
+
+
+TEXT_STAMP_WIDTH = 19  # "YYYY-mm-dd HH:MM:SS"
+TEXT_VALUE_WIDTH = 32  # Caracteres máximos del valor (con el fin de línea)
+_STAMP_DIGITS = np.array([0, 1, 2, 3, 5, 6, 8, 9, 11, 12, 14, 15, 17, 18])
+_STAMP_SEPARATORS = {4: ord('-'), 7: ord('-'), 10: ord(' '), 13: ord(':'), 16: ord(':'), 19: ord(',')}
+
+
+def _parseValues(strings: np.ndarray, valid: np.ndarray) -> np.ndarray:
+    """
+    Convierte los valores (arreglo S) a float64 marcando en valid los que no
+    son números. Los que no tienen letras (salvo el exponente) se convierten
+    por bloques en NumPy; el resto (nan, texto...) uno a uno.
+    """
+    values = np.empty(len(strings), dtype=np.float64)
+    chars = strings.view(np.uint8).reshape(len(strings), -1)
+    letters = ((chars > ord("9")) & (chars != ord("e")) & (chars != ord("E"))).any(axis=1)
+    simple = np.flatnonzero(~letters)
+    slow = [np.flatnonzero(letters)]
+    
+    for first in range(0, len(simple), 65536):
+        block = simple[first:first + 65536]
+        try:
+            values[block] = strings[block].astype(np.float64)
+        except ValueError:
+            slow.append(block)
+    
+    for i in np.concatenate(slow):
+        try:
+            values[i] = float(strings[i])
+        except ValueError:
+            valid[i] = False
+    return values
+
+
+def parseTextHistory(filepath: str, offset: int = 0, end: int = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Lee un historial de texto "YYYY-mm-dd HH:MM:SS,valor" entre los bytes
+    offset y end (None = fin del archivo) de una sola vez.
+    Devuelve (datetime64[s], float64) omitiendo las líneas mal formadas.
+    
+    Las marcas tienen ancho fijo, así que se validan y convierten como una
+    matriz de bytes (una fila por línea) sin recorrer las líneas en Python.
+    """
+    with open(filepath, "rb") as f:
+        f.seek(offset)
+        data = f.read() if end is None else f.read(max(0, end - offset))
+    
+    empty = (np.empty(0, dtype='datetime64[s]'), np.empty(0, dtype=np.float64))
+    if not data:
+        return empty
+    
+    valueStart = TEXT_STAMP_WIDTH + 1
+    buffer = np.frombuffer(data + b"\n" + b"\0" * (valueStart + TEXT_VALUE_WIDTH), dtype=np.uint8)
+    newlines = np.flatnonzero(buffer[:len(data) + 1] == ord("\n"))
+    starts = np.r_[0, newlines[:-1] + 1]
+    lengths = newlines - starts
+    
+    keep = (lengths > valueStart) & (lengths < valueStart + TEXT_VALUE_WIDTH)
+    starts = starts[keep]
+    if not len(starts):
+        return empty
+    
+    # Una fila de ancho fijo por línea (copias, no se recorre en Python)
+    windows = np.lib.stride_tricks.sliding_window_view
+    rows = windows(buffer, valueStart)[starts]
+    valueBytes = windows(buffer, TEXT_VALUE_WIDTH)[starts + valueStart]
+    
+    digits = rows[:, _STAMP_DIGITS].astype(np.int16) - ord("0")
+    valid = np.all((digits >= 0) & (digits <= 9), axis=1)
+    for column, char in _STAMP_SEPARATORS.items():
+        valid &= rows[:, column] == char
+    
+    fields = digits[:, 0::2] * 10 + digits[:, 1::2]
+    year = fields[:, 0].astype(np.int64) * 100 + fields[:, 1]
+    month, day, hour, minute, second = (fields[:, i].astype(np.int64) for i in range(2, 7))
+    valid &= (month >= 1) & (month <= 12) & (day >= 1) & (hour < 24) & (minute < 60) & (second < 60)
+    
+    monthStart = ((year - 1970) * 12 + month - 1).astype('datetime64[M]')
+    daysInMonth = ((monthStart + 1).astype('datetime64[D]') - monthStart.astype('datetime64[D]')).astype(np.int64)
+    valid &= day <= daysInMonth
+    
+    # Valor: hasta el fin de línea o la siguiente coma; el resto se pone a 0
+    terminators = (valueBytes == ord("\n")) | (valueBytes == ord("\r")) | (valueBytes == ord(","))
+    valueEnd = terminators.argmax(axis=1).astype(np.uint8)
+    valueBytes *= np.arange(TEXT_VALUE_WIDTH, dtype=np.uint8) < valueEnd[:, None]
+    values = _parseValues(valueBytes.view(f"S{TEXT_VALUE_WIDTH}").ravel(), valid)
+    
+    days = monthStart.astype('datetime64[D]').astype(np.int64) + day - 1
+    seconds = days * 86400 + hour * 3600 + minute * 60 + second
+    return seconds[valid].astype('datetime64[s]'), values[valid]
+
+
+def _toSeconds(value) -> Optional[int]:
+    """Marca en segundos int64 (hora local) desde int, datetime o datetime64"""
+    if value is None:
+        return None
+    if isinstance(value, (datetime.date, np.datetime64)):
+        return int(np.datetime64(value, 's').astype(np.int64))
+    return int(value)
 
 
 class DataStorage:
+    """
+    Historial de sensores con tres formatos (configuracion.txt: almacenamiento=):
+        columnar  historialLecturas/<sensor>/<día o mes>/ (ver PartitionedSeries)
+        sqlite    historialLecturas/historial.db, tabla lecturas (ver SqliteHistory)
+        texto     historialLecturas/<sensor>.txt con líneas "fecha,valor"
+    
+    En modo columnar o sqlite, las lecturas de <sensor>.txt anteriores a
+    la primera guardada en ese formato se siguen leyendo junto con él hasta
+    migrarlo con tools/migrar_historial.py (que renombra el .txt).
+    
+    Las series y los índices de tiempo se comparten entre instancias del
+    proceso, así escritor y lectores ven el mismo estado de los índices.
+    
+    Las lecturas guardadas se encolan en un StorageWriter común que las
+    escribe por lotes en segundo plano; las consultas esperan primero a que
+    lo encolado llegue a disco.
+    
+    En modo columnar un CompactionJob aplica la retención cada
+    COMPACTION_INTERVAL segundos: los días con más de retencion_cruda_dias
+    se promedian y fusionan por mes, y lo anterior a retencion_maxima_dias
+    (si no es 0) se elimina.
+    
+    Cada lote escrito actualiza también los agregados por minuto, hora y
+    día de historialLecturas/<sensor>/rollups/ (ver RollupSeries), que
+    usan los reportes mediante query() y loadAggregates().
+    
+    Los resultados de query() (ver HistoryQuery) quedan en una QueryCache
+    común que se invalida por sensor con cada escritura, borrado o
+    compactación.
+    
+    Con instantaneas=si, saveSnapshot() guarda una fila por tick en la
+    serie ancha historialLecturas/instantaneas/ (ver SnapshotSeries); las
+    lecturas de un sensor incluyen su columna.
+    
+    Con compresion<sensor>=banda|puerta solo se guardan las lecturas que
+    hacen falta para reconstruir el sensor dentro de tolerancia<sensor>
+    (ver core/compression.py); los agregados cuentan todas las lecturas y
+    la última retenida se guarda al cerrar o al salir del proceso.
+    """
+    
+    _seriesRegistry: Dict[str, PartitionedSeries] = {}
+    _indexRegistry: Dict[str, TextTimeIndex] = {}
+    _rollupRegistry: Dict[str, RollupSeries] = {}
+    _database: SqliteHistory = None
+    _snapshotSeries: SnapshotSeries = None
+    _compressors = CompressorRegistry()
+    _registryLock = threading.Lock()
+    _writer: StorageWriter = None
+    _compaction: CompactionJob = None
+    _queryCache = QueryCache()
     
     def __init__(self):
         self.historyDir = Settings.HISTORY_DIR
         self.configManager = ConfigManager()
+        self.backend = self.configManager.get_storage_backend()
+        self.snapshotMode = self.configManager.get_snapshot_storage()
         self.lastSave: Dict[str, float] = {}
+        self.lastSnapshot = 0.0
         
         os.makedirs(self.historyDir, exist_ok=True)
         
         for sensor in Settings.DEFAULT_SENSOR_FREQUENCIES.keys():
             self.lastSave[sensor] = 0
+        
+        with self._registryLock:
+            if DataStorage._writer is None:
+                DataStorage._writer = StorageWriter(
+                    self._writeBatch,
+                    fsyncPolicy=self.configManager.get_storage_fsync_policy()
+                )
+                DataStorage._writer.start()
+                atexit.register(self._stopWriter)
+            if self.backend == "columnar" and DataStorage._compaction is None:
+                DataStorage._compaction = CompactionJob(
+                    self._sensorSeries, onCompacted=self._seriesCompacted, keepRaw=self._isCompressedSeries
+                )
+                DataStorage._compaction.start()
+                atexit.register(DataStorage._compaction.stop)
+        self.writer = DataStorage._writer
+        self.queries = HistoryQuery(
+            self._readHistories,
+            self._readRollups,
+            self._isCompressed
+        )
+    
+    def _textPath(self, sensorName: str) -> str:
+        return os.path.join(self.historyDir, f"{sensorName}.txt")
+    
+    def getSeries(self, sensorName: str) -> PartitionedSeries:
+        directory = os.path.join(self.historyDir, sensorName)
+        with self._registryLock:
+            series = self._seriesRegistry.get(directory)
+            if series is None:
+                series = PartitionedSeries(directory, Settings.COLUMNAR_SEGMENT_ROWS)
+                self._seriesRegistry[directory] = series
+            return series
+    
+    def _sensorSeries(self) -> List[PartitionedSeries]:
+        """Series columnares de todos los sensores con carpeta en el historial, y la serie ancha"""
+        names = sorted(
+            name for name in os.listdir(self.historyDir)
+            if os.path.isdir(os.path.join(self.historyDir, name)) and name != Settings.SNAPSHOT_DIR
+        )
+        series = [self.getSeries(name) for name in names]
+        snapshots = self.getSnapshotSeries(create=False)
+        return series + [snapshots] if snapshots is not None else series
+    
+    def getSnapshotSeries(self, create: bool = True) -> Optional[SnapshotSeries]:
+        """Serie ancha común del proceso; con create=False, None si aún no existe"""
+        directory = os.path.join(self.historyDir, Settings.SNAPSHOT_DIR)
+        with self._registryLock:
+            series = DataStorage._snapshotSeries
+            if series is None or series.directory != directory:
+                if not create and not os.path.exists(os.path.join(directory, SnapshotSeries.COLUMNS_FILE)):
+                    return None
+                series = SnapshotSeries(directory, Settings.SNAPSHOT_SENSORS, Settings.COLUMNAR_SEGMENT_ROWS)
+                DataStorage._snapshotSeries = series
+            return series
+    
+    def compactHistory(self) -> Dict[str, dict]:
+        """Aplica la retención ahora (sin esperar al CompactionJob)"""
+        self.flush()
+        job = DataStorage._compaction or CompactionJob(
+            self._sensorSeries, onCompacted=self._seriesCompacted, keepRaw=self._isCompressedSeries
+        )
+        return job.runOnce()
+    
+    def _isCompressed(self, sensorName: str) -> bool:
+        return self.configManager.get_sensor_compression(sensorName) != "no"
+    
+    def _isCompressedSeries(self, series: PartitionedSeries) -> bool:
+        """La compactación no promedia las series de sensores comprimidos"""
+        return not isinstance(series, SnapshotSeries) and self._isCompressed(os.path.basename(series.directory))
+    
+    def _seriesCompacted(self, series: PartitionedSeries):
+        names = series.columns if isinstance(series, SnapshotSeries) else [os.path.basename(series.directory)]
+        for name in names:
+            self._bumpVersion(name)
+    
+    def _bumpVersion(self, sensorName: str):
+        """Invalida los resultados en caché que incluyen al sensor"""
+        self._queryCache.bump(sensorName)
+    
+    def getDatabase(self) -> SqliteHistory:
+        """Base SQLite común del proceso; las lecturas se guardan con getHistoryPlant()"""
+        with self._registryLock:
+            if DataStorage._database is None:
+                DataStorage._database = SqliteHistory(
+                    os.path.join(self.historyDir, Settings.SQLITE_HISTORY_FILE),
+                    self.getHistoryPlant()
+                )
+            return DataStorage._database
+    
+    @staticmethod
+    def getHistoryPlant() -> str:
+        """
+        Clave de planta del historial SQLite (planta_historial). Si no está
+        configurada se fija con el nombre actual del perfil, para que las
+        lecturas ya guardadas no se pierdan al renombrarlo.
+        """
+        configManager = ConfigManager()
+        plant = configManager.get_history_plant()
+        if plant is None:
+            plant = DataStorage.getPlantName()
+            configManager.set_history_plant(plant)
+        return plant
+    
+    @staticmethod
+    def getPlantName() -> str:
+        try:
+            with open(Settings.PROFILE_FILE, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.startswith("nombre="):
+                        return line.split("=", 1)[1].strip()
+        except OSError:
+            pass
+        return ""
+    
+    def getRollups(self, sensorName: str) -> RollupSeries:
+        directory = os.path.join(self.historyDir, sensorName, "rollups")
+        with self._registryLock:
+            rollups = self._rollupRegistry.get(directory)
+            if rollups is None:
+                rollups = RollupSeries(directory, Settings.ROLLUP_RESOLUTIONS)
+                self._rollupRegistry[directory] = rollups
+            return rollups
+    
+    def _ensureRollups(self, sensorName: str, rollups: RollupSeries):
+        """Calcula los agregados desde el historial si aún no existen (con rollups.lock tomado)"""
+        if rollups.exists():
+            return
+        timestamps, values = self._readHistories([sensorName], pending=False)[sensorName]
+        rollups.rebuild(timestamps.astype(np.int64), values)
+        if len(values):
+            print(f"Agregados de {sensorName} calculados desde {len(values):,} lecturas")
+    
+    def _readRollups(self, sensorName: str, resolution: int, start: Optional[int], end: Optional[int]) -> np.ndarray:
+        """Agregados guardados del sensor, calculados antes desde el historial si faltan"""
+        rollups = self.getRollups(sensorName)
+        with rollups.lock:
+            self._ensureRollups(sensorName, rollups)
+        return rollups.read(resolution, start, end)
+    
+    def getTextIndex(self, sensorName: str) -> TextTimeIndex:
+        filepath = self._textPath(sensorName)
+        with self._registryLock:
+            index = self._indexRegistry.get(filepath)
+            if index is None:
+                index = TextTimeIndex(filepath)
+                self._indexRegistry[filepath] = index
+            return index
     
     def saveSensorReading(self, sensorName: str, value: str, force: bool = False):
         
@@ -35,72 +350,448 @@ class DataStorage:
                 return
         
         try:
-            filepath = os.path.join(self.historyDir, f"{sensorName}.txt")
-            timestamp = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            float(value)
+        except (TypeError, ValueError):
+            print(f"Error guardando sensor {sensorName}: valor inválido {value!r}")
+            return
+        
+        timestamp = int(np.datetime64(datetime.datetime.now(), 's').astype(np.int64))
+        self.writer.submit(sensorName, timestamp, str(value).strip())
+        self.lastSave[sensorName] = time.time()
+    
+    def saveSnapshot(self, snapshot: SensorSnapshot, force: bool = False):
+        """
+        Encola una fila de la serie ancha con todos los sensores del tick
+        (None = sin dato). Sin force se guarda como mucho una fila cada
+        frecuenciainstantaneas segundos.
+        """
+        if not force and time.time() - self.lastSnapshot < self.configManager.get_snapshot_interval():
+            return
+        
+        fields = dict(zip(Settings.SNAPSHOT_SENSORS, SensorSnapshotBatch.FIELDS))
+        values = {sensor: getattr(snapshot, field) for sensor, field in fields.items()}
+        row = self.getSnapshotSeries().row({k: v for k, v in values.items() if v is not None})
+        if np.isnan(row).all():
+            return
+        
+        timestamp = int(np.datetime64(snapshot.timestamp, 's').astype(np.int64))
+        self.writer.submit(Settings.SNAPSHOT_DIR, timestamp, tuple(row.tolist()))
+        self.lastSnapshot = time.time()
+    
+    def _writeSnapshots(self, timestamps: np.ndarray, rows: list, fsync: bool):
+        """Lote de filas de la serie ancha; actualiza los agregados de cada columna"""
+        series = self.getSnapshotSeries()
+        matrix = np.array(rows, dtype=np.float64).reshape(len(timestamps), len(series.columns))
+        
+        with ExitStack() as stack:
+            rollups = []
+            for name in series.columns:
+                sensorRollups = self.getRollups(name)
+                stack.enter_context(sensorRollups.lock)
+                self._ensureRollups(name, sensorRollups)
+                rollups.append(sensorRollups)
             
-            with open(filepath, "a", encoding="utf-8") as f:
-                f.write(f"{timestamp},{value}\n")
+            series.append(timestamps, matrix, fsync)
+            for i, sensorRollups in enumerate(rollups):
+                sensorRollups.update(timestamps, matrix[:, i])
+        
+        for name in series.columns:
+            self._bumpVersion(name)
+    
+    def _writeBatch(self, sensorName: str, timestamps: np.ndarray, values: list, fsync: bool):
+        """
+        Escritura de un lote en el hilo del StorageWriter. El historial y sus
+        agregados se actualizan bajo el mismo lock para que un cálculo
+        inicial de agregados no cuente dos veces el lote.
+        """
+        if sensorName == Settings.SNAPSHOT_DIR:
+            self._writeSnapshots(timestamps, values, fsync)
+            return
+        
+        numeric = np.array(values, dtype=np.float64)
+        rollups = self.getRollups(sensorName)
+        compressor = self._getCompressor(sensorName)
+        
+        with rollups.lock:
+            self._ensureRollups(sensorName, rollups)
             
-            self.lastSave[sensorName] = time.time()
+            if compressor is None:
+                self._appendHistory(sensorName, timestamps, numeric, values, fsync)
+            else:
+                keptTimestamps, keptValues = compressor.feed(timestamps, numeric)
+                self._appendHistory(sensorName, keptTimestamps, keptValues, None, fsync)
             
-        except Exception as e:
-            print(f"Error guardando sensor {sensorName}: {e}")
+            rollups.update(timestamps, numeric)
+        self._bumpVersion(sensorName)
+    
+    def _appendHistory(self, sensorName: str, timestamps: np.ndarray, numeric: np.ndarray, values: Optional[list], fsync: bool):
+        """Anexa lecturas al historial del formato activo; values es el texto original (None = desde numeric)"""
+        if len(timestamps) == 0:
+            return
+        if self.backend == "columnar":
+            self.getSeries(sensorName).append(timestamps, numeric, fsync)
+        elif self.backend == "sqlite":
+            self.getDatabase().append(sensorName, timestamps, numeric, fsync)
+        else:
+            values = values if values is not None else [str(value) for value in numeric.tolist()]
+            stamps = np.datetime_as_string(timestamps.astype('datetime64[s]'))
+            lines = "".join(f"{stamp[:10]} {stamp[11:]},{value}\n" for stamp, value in zip(stamps, values))
+            with open(self._textPath(sensorName), "a", encoding="utf-8") as f:
+                f.write(lines)
+                if fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
+    
+    def _getCompressor(self, sensorName: str) -> Optional[Compressor]:
+        """
+        Compresor del sensor según la configuración actual (en el hilo del
+        escritor). Si cambian el modo o la tolerancia, la lectura retenida
+        por el anterior se guarda con el candado de agregados del sensor,
+        así una consulta no la pierde entre uno y otro.
+        """
+        mode = self.configManager.get_sensor_compression(sensorName)
+        tolerance = self.configManager.get_compression_tolerance(sensorName)
+        with self.getRollups(sensorName).lock:
+            compressor, replaced = self._compressors.configure(sensorName, mode, tolerance, Settings.COMPRESSION_MAX_GAP)
+            if replaced is not None:
+                self._flushCompressor(sensorName, replaced)
+        return compressor
+    
+    def _flushCompressor(self, sensorName: str, compressor: Compressor):
+        """Guarda la lectura retenida (ya contada en los agregados)"""
+        point = compressor.flush()
+        if point is None:
+            return
+        with self.getRollups(sensorName).lock:
+            self._appendHistory(
+                sensorName,
+                np.array([point[0]], dtype=np.int64),
+                np.array([point[1]], dtype=np.float64),
+                None,
+                True
+            )
+    
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Espera a que las lecturas encoladas estén escritas"""
+        return self.writer.flush(timeout)
+    
+    def getWriterStats(self) -> dict:
+        """Profundidad de cola, lecturas escritas/descartadas y latencia de escritura"""
+        return self.writer.getStats()
+    
+    def _stopWriter(self):
+        """Detiene el escritor y guarda las lecturas retenidas por los compresores (también al salir)"""
+        self.writer.stop()
+        for sensorName, compressor in self._compressors.items():
+            try:
+                self._flushCompressor(sensorName, compressor)
+            except Exception as e:
+                print(f"Error guardando sensor {sensorName}: {e}")
+    
+    def close(self):
+        """Escribe lo pendiente y detiene el escritor (al cerrar la aplicación)"""
+        self._stopWriter()
+        if DataStorage._compaction is not None:
+            DataStorage._compaction.stop()
+        if DataStorage._database is not None:
+            DataStorage._database.close()
     
     def saveMultipleSensors(self, sensorData: Dict[str, str]):
         for sensorName, value in sensorData.items():
             self.saveSensorReading(sensorName, value)
     
-    def loadSensorHistory(self, sensorName: str, days: int = 0) -> list:
-        filepath = os.path.join(self.history_dir, f"{sensor_name}.txt")
-        data = []
+    def loadSensorArrays(self, sensorName: str, days: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Historial como arreglos NumPy: (marcas datetime64[s], valores).
+        days > 0 limita a los últimos días; el índice de tiempo lleva la
+        lectura directo al primer registro del rango.
+        """
+        limit = None
+        if days > 0:
+            limit = np.datetime64(datetime.datetime.now() - datetime.timedelta(days=days), 's')
         
-        if not os.path.exists(filepath):
-            return data
+        start = None if limit is None else int(limit.astype(np.int64))
+        self.flush()
         
         try:
-            with open(filepath, "r", encoding="utf-8") as f:
-                for line in f:
-                    parts = line.strip().split(",")
-                    if len(parts) >= 2:
-                        try:
-                            timestamp = datetime.datetime.strptime(parts[0], "%Y-%m-%d %H:%M:%S")
-                            value = float(parts[1])
-                            
-                            if days > 0:
-                                limit = datetime.datetime.now() - datetime.timedelta(days=days)
-                                if timestamp >= limit:
-                                    data.append((timestamp, value))
-                            else:
-                                data.append((timestamp, value))
-                                
-                        except ValueError:
-                            continue
+            return self._readHistory(sensorName, start)
         except Exception as e:
             print(f"Error cargando historial de {sensorName}: {e}")
         
-        return data
+        return np.empty(0, dtype='datetime64[s]'), np.empty(0, dtype=np.float64)
     
-    def getSensorStats(self, sensorName: str, days: int = 0) -> dict:
-        data = self.loadSensorHistory(sensorName, days)
+    def loadSnapshots(self, start=None, end=None) -> SensorSnapshotBatch:
+        """
+        Filas de la serie ancha con start <= marca < end (segundos, datetime
+        o datetime64; None = sin límite) en una sola lectura secuencial
+        """
+        start, end = _toSeconds(start), _toSeconds(end)
+        self.flush()
+        series = self.getSnapshotSeries(create=False)
+        if series is None:
+            return SensorSnapshotBatch.from_columns(np.empty(0, dtype=np.int64), np.empty((0, len(Settings.SNAPSHOT_SENSORS))))
+        return SensorSnapshotBatch.from_columns(*series.readColumns(Settings.SNAPSHOT_SENSORS, start, end))
+    
+    def _readHistory(self, sensorName: str, start: int = None, end: int = None) -> Tuple[np.ndarray, np.ndarray]:
+        return self._readHistories([sensorName], start, end)[sensorName]
+    
+    def _readHistories(self, sensors: Sequence[str], start: int = None, end: int = None, pending: bool = True) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+        """
+        Lecturas de cada sensor con start <= marca < end (segundos int64;
+        None = sin límite): su historial propio más su columna de la serie
+        ancha, que se lee una sola vez para todos los sensores. Con pending
+        se añade la lectura retenida por el compresor del sensor.
+        """
+        result = {}
+        batched = []
+        for name in sensors:
+            compressor = self._compressors.get(name) if pending else None
+            if compressor is None:
+                batched.append(name)
+                continue
+            
+            # El escritor alimenta el compresor con el candado de agregados
+            # del sensor: historial y lectura retenida se leen juntos
+            with self.getRollups(name).lock:
+                result[name] = self._readSensorHistory(name, start, end)
+                point = compressor.pending
+            if point is None or (start is not None and point[0] < start) or (end is not None and point[0] >= end):
+                continue
+            timestamps, values = result[name]
+            if len(timestamps) and timestamps[-1] >= np.datetime64(point[0], 's'):
+                continue
+            result[name] = (
+                np.append(timestamps, np.datetime64(point[0], 's')),
+                np.append(values, point[1])
+            )
+        result.update(self._readSensorHistories(batched, start, end))
+        result = {name: result[name] for name in sensors}
         
-        if not data:
-            return {}
+        series = self.getSnapshotSeries(create=False)
+        if series is not None:
+            series.mergeInto(result, start, end)
+        return result
+    
+    def _readSensorHistories(self, sensors: Sequence[str], start: int = None, end: int = None) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+        """Historial propio de varios sensores; en SQLite, con una sola consulta para todos"""
+        if self.backend != "sqlite":
+            return {name: self._readSensorHistory(name, start, end) for name in sensors}
         
-        values = [v for _, v in data]
+        database = self.getDatabase()
+        firsts = database.firstTimestamps(sensors)
+        stored = database.readMany([name for name in sensors if name in firsts], start, end)
+        return {name: self._withText(name, firsts.get(name), stored.get(name), start, end) for name in sensors}
+    
+    def _readSensorHistory(self, sensorName: str, start: int = None, end: int = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Lecturas con start <= marca < end (segundos int64; None = sin límite)
+        del formato activo, precedidas por las del .txt sin migrar anteriores
+        a su primera lectura
+        """
+        first, stored = None, None
+        if self.backend == "sqlite":
+            first = self.getDatabase().firstTimestamp(sensorName)
+            if first is not None:
+                stored = self.getDatabase().read(sensorName, start, end)
+        elif self.backend == "columnar" and self.getSeries(sensorName).exists():
+            first = self.getSeries(sensorName).firstTimestamp()
+            stored = self.getSeries(sensorName).read(start, end)
+        return self._withText(sensorName, first, stored, start, end)
+    
+    def _withText(self, sensorName: str, first: Optional[int], stored: Optional[tuple], start: int = None, end: int = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Lecturas guardadas (marcas int64, valores) precedidas por las del .txt anteriores a first"""
+        if first is None:
+            return self._readTextHistory(sensorName, start, end)
+        timestamps, values = stored
+        timestamps = timestamps.astype('datetime64[s]')
+        if start is not None and start >= first:
+            return timestamps, values
+        
+        textStamps, textValues = self._readTextHistory(sensorName, start, first if end is None else min(end, first))
+        if not len(textStamps):
+            return timestamps, values
+        return np.concatenate([textStamps, timestamps]), np.concatenate([textValues, values])
+    
+    def _readTextHistory(self, sensorName: str, start: int = None, end: int = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Lecturas del .txt del sensor con start <= marca < end"""
+        filepath = self._textPath(sensorName)
+        if not os.path.exists(filepath):
+            return np.empty(0, dtype='datetime64[s]'), np.empty(0, dtype=np.float64)
+        
+        offset = self.getTextIndex(sensorName).seek(start)
+        timestamps, values = parseTextHistory(filepath, offset)
+        mask = np.ones(len(timestamps), dtype=bool)
+        if start is not None:
+            mask &= timestamps >= np.datetime64(start, 's')
+        if end is not None:
+            mask &= timestamps < np.datetime64(end, 's')
+        return timestamps[mask], values[mask]
+    
+    def query(
+        self,
+        sensors: Sequence[str],
+        start=None,
+        end=None,
+        resolution: int = None,
+        minPoints: int = None
+    ) -> dict:
+        """
+        Consulta por rango de varios sensores, alineados en un eje de tiempo
+        común. start/end en segundos, datetime o datetime64 (None = sin
+        límite; end excluido).
+        
+        resolution son los segundos por intervalo: None elige la más gruesa
+        de ROLLUP_RESOLUTIONS con al menos minPoints intervalos en algún
+        sensor, o las lecturas individuales (1) si ni los minutos alcanzan.
+        Otros valores se agrupan desde el agregado múltiplo más grueso.
+        
+        Devuelve {"resolution", "timestamps": datetime64[s] comunes,
+        "mean"/"min"/"max"/"count": {sensor: arreglo alineado, NaN (0 en
+        count) donde el sensor no tiene datos}, "stats": {sensor:
+        count/mean/min/max/std del período}}. Los arreglos son de solo
+        lectura porque se comparten con la caché.
+        """
+        sensors = [sensors] if isinstance(sensors, str) else list(sensors)
+        start, end = _toSeconds(start), _toSeconds(end)
+        minPoints = minPoints or Settings.REPORT_MIN_POINTS
+        self.flush()
+        
+        key = (self.backend, tuple(sensors), start, end, resolution, minPoints)
+        versions, cached = self._queryCache.lookup(key, sensors)
+        if cached is not None:
+            return cached
+        
+        result = self.queries.run(sensors, start, end, resolution, minPoints)
+        self._queryCache.store(key, versions, result)
+        return result
+    
+    def loadSensorAggregate(self, sensorName: str, days: int = 0, minPoints: int = None) -> dict:
+        """
+        Historial resumido de un sensor para reportes (ver loadAggregates()).
+        
+        Devuelve {"resolution", "timestamps", "mean", "min", "max", "count":
+        arreglos por intervalo, "stats": count/mean/min/max/std}.
+        """
+        return self.loadAggregates([sensorName], days, minPoints)[sensorName]
+    
+    def loadAggregates(self, sensorNames: Sequence[str], days: int = 0, minPoints: int = None) -> Dict[str, dict]:
+        """
+        Historial resumido de varios sensores con una sola query(). El
+        inicio de "últimos days días" se redondea al minuto, así reporte,
+        vista previa y PDF del mismo período reutilizan la caché.
+        
+        Devuelve {sensor: resumen como loadSensorAggregate()}; cada sensor
+        conserva solo los intervalos del eje común en los que tiene valor.
+        """
+        start = None
+        if days > 0:
+            limit = np.datetime64(datetime.datetime.now() - datetime.timedelta(days=days), 's')
+            start = int(limit.astype(np.int64)) // 60 * 60
         
-        import numpy as np
-        return {
-            "count": len(values),
-            "mean": np.mean(values),
-            "min": np.min(values),
-            "max": np.max(values),
-            "std": np.std(values)
-        }
+        result = self.query(list(sensorNames), start, None, minPoints=minPoints)
+        summaries = {}
+        for name in sensorNames:
+            present = ~np.isnan(result["mean"][name])
+            summaries[name] = {
+                "resolution": result["resolution"],
+                "timestamps": result["timestamps"][present],
+                "mean": result["mean"][name][present],
+                "min": result["min"][name][present],
+                "max": result["max"][name][present],
+                "count": result["count"][name][present],
+                "stats": result["stats"][name]
+            }
+        return summaries
     
-    def clearSensorHistory(self, sensorName: str):
-        filepath = os.path.join(self.historyDir, f"{sensorName}.txt")
+    def loadSensorHistory(self, sensorName: str, days: int = 0) -> list:
+        """Historial como lista de (datetime, valor)"""
+        timestamps, values = self.loadSensorArrays(sensorName, days)
+        return list(zip(timestamps.tolist(), values.tolist()))
+    
+    def getSensorStats(self, sensorName: str, days: int = 0) -> dict:
+        """count/mean/min/max/std calculados desde los agregados"""
+        return self.loadSensorAggregate(sensorName, days)["stats"]
+    
+    def clearSensorHistory(self, sensorName: str, olderThanDays: int = 0):
+        """
+        Elimina el historial del sensor. Con olderThanDays > 0 solo se
+        eliminan las particiones columnares, las filas SQLite, las líneas
+        del .txt y los agregados anteriores a esos días.
+        La serie ancha es común a todos los sensores y no se toca (ver
+        clearSnapshots).
+        """
+        filepath = self._textPath(sensorName)
+        self.flush()
         try:
+            if olderThanDays > 0:
+                cutoff = np.datetime64(datetime.datetime.now() - datetime.timedelta(days=olderThanDays), 's')
+                self.getSeries(sensorName).deleteBefore(int(cutoff.astype(np.int64)))
+                self.getRollups(sensorName).deleteBefore(int(cutoff.astype(np.int64)))
+                if self.backend == "sqlite":
+                    self.getDatabase().deleteBefore(sensorName, int(cutoff.astype(np.int64)))
+                self._trimTextHistory(sensorName, int(cutoff.astype(np.int64)))
+                return
+            self.getSeries(sensorName).clear()
+            if self.backend == "sqlite":
+                self.getDatabase().clear(sensorName)
+            self.getRollups(sensorName).clear()
+            self._compressors.discard(sensorName)
+            self.getTextIndex(sensorName).clear()
             if os.path.exists(filepath):
                 os.remove(filepath)
         except Exception as e:
             print(f"Error eliminando historial de {sensorName}: {e}")
+        finally:
+            self._bumpVersion(sensorName)
+    
+    def _trimTextHistory(self, sensorName: str, cutoff: int):
+        """Reescribe el .txt del sensor sin las líneas anteriores a cutoff"""
+        filepath = self._textPath(sensorName)
+        if not os.path.exists(filepath):
+            return
+        
+        index = self.getTextIndex(sensorName)
+        stamp = str(np.datetime64(cutoff, 's'))
+        cutoffPrefix = f"{stamp[:10]} {stamp[11:]}".encode("ascii")
+        # Bajo el lock de los agregados, que es el que toma el hilo de escritura
+        with self.getRollups(sensorName).lock:
+            offset = index.seek(cutoff)
+            with open(filepath, "rb") as f:
+                f.seek(offset)
+                for line in iter(f.readline, b""):
+                    if line[:TEXT_STAMP_WIDTH] >= cutoffPrefix:
+                        offset = f.tell() - len(line)
+                        break
+                else:
+                    offset = f.tell()
+                if offset == 0:
+                    return
+                f.seek(offset)
+                with open(filepath + ".tmp", "wb") as out:
+                    shutil.copyfileobj(f, out)
+                    out.flush()
+                    os.fsync(out.fileno())
+            os.replace(filepath + ".tmp", filepath)
+            index.clear()
+    
+    def clearSnapshots(self, olderThanDays: int = 0):
+        """
+        Elimina la serie ancha (o sus particiones anteriores a olderThanDays
+        días). Los agregados de cada sensor no cambian; clearSensorHistory
+        los elimina por sensor.
+        """
+        self.flush()
+        series = self.getSnapshotSeries(create=False)
+        if series is None:
+            return
+        try:
+            if olderThanDays > 0:
+                cutoff = np.datetime64(datetime.datetime.now() - datetime.timedelta(days=olderThanDays), 's')
+                series.deleteBefore(int(cutoff.astype(np.int64)))
+            else:
+                series.clear()
+        except Exception as e:
+            print(f"Error eliminando instantáneas: {e}")
+        finally:
+            for name in series.columns:
+                self._bumpVersion(name)
@@ -0,0 +1,168 @@
+"""
+Consultas por rango de varios sensores sobre el historial
+Elige la resolución, lee de los agregados o de las lecturas crudas y
+alinea los sensores en un eje de tiempo común; los resultados quedan en
+una caché LRU por versiones
+"""
+import threading
+import numpy as np
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from config.settings import Settings
+from core.compression import interpolate
+from core.rollups import aggregate, regroup, summarize
+
+
+class QueryCache:
+    """
+    Resultados de consultas, como mucho QUERY_CACHE_SIZE (LRU). Cada
+    sensor lleva una versión que sube con cada escritura, borrado o
+    compactación; una entrada solo se reutiliza si las versiones de sus
+    sensores no han cambiado.
+    """
+    
+    def __init__(self):
+        self._versions: Dict[str, int] = {}
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def bump(self, sensorName: str):
+        """Invalida los resultados que incluyen al sensor"""
+        with self._lock:
+            self._versions[sensorName] = self._versions.get(sensorName, 0) + 1
+    
+    def lookup(self, key: tuple, sensors: Sequence[str]) -> Tuple[tuple, Optional[dict]]:
+        """Versiones actuales de los sensores y el resultado guardado con ellas (None si no hay)"""
+        with self._lock:
+            versions = tuple(self._versions.get(name, 0) for name in sensors)
+            cached = self._entries.get(key)
+            if cached is None or cached[0] != versions:
+                return versions, None
+            self._entries.move_to_end(key)
+            return versions, cached[1]
+    
+    def store(self, key: tuple, versions: tuple, result: dict):
+        with self._lock:
+            self._entries[key] = (versions, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > Settings.QUERY_CACHE_SIZE:
+                self._entries.popitem(last=False)
+
+
+class HistoryQuery:
+    """
+    Ejecuta una consulta sobre el historial de DataStorage:
+        readHistories(sensores, start, end)          {sensor: (datetime64[s], valores)}
+        readRollups(sensor, resolución, start, end)  agregados ROLLUP_DTYPE guardados
+        isCompressed(sensor)                         si el sensor guarda con compresión
+    """
+    
+    def __init__(
+        self,
+        readHistories: Callable[[List[str], Optional[int], Optional[int]], Dict[str, Tuple[np.ndarray, np.ndarray]]],
+        readRollups: Callable[[str, int, Optional[int], Optional[int]], np.ndarray],
+        isCompressed: Callable[[str], bool]
+    ):
+        self.readHistories = readHistories
+        self.readRollups = readRollups
+        self.isCompressed = isCompressed
+    
+    @staticmethod
+    def rollupBase(resolution: int) -> Optional[int]:
+        """Agregado guardado más grueso del que se obtiene la resolución; None = lecturas crudas"""
+        stored = [r for r in Settings.ROLLUP_RESOLUTIONS if r <= resolution and resolution % r == 0]
+        return max(stored) if resolution > 1 and stored else None
+    
+    def run(self, sensors: List[str], start: Optional[int], end: Optional[int], resolution: Optional[int], minPoints: int) -> dict:
+        """Resultado de DataStorage.query() (sin caché)"""
+        if resolution is None:
+            resolution = 1
+            for candidate in sorted(Settings.ROLLUP_RESOLUTIONS, reverse=True):
+                records = self._sensorRecords(sensors, start, end, candidate)
+                if max((len(r) for r in records.values()), default=0) >= minPoints:
+                    resolution = candidate
+                    break
+            else:
+                records = self._sensorRecords(sensors, start, end, 1)
+        else:
+            resolution = max(1, int(resolution))
+            records = self._sensorRecords(sensors, start, end, resolution)
+        
+        buckets = [r['bucket'] for r in records.values()]
+        axis = np.unique(np.concatenate(buckets)) if buckets else np.empty(0, dtype=np.int64)
+        
+        result = {
+            "resolution": resolution,
+            "timestamps": axis.astype('datetime64[s]'),
+            "mean": {}, "min": {}, "max": {}, "count": {}, "stats": {}
+        }
+        for name, sensorRecords in records.items():
+            positions = np.searchsorted(axis, sensorRecords['bucket'])
+            columns = {
+                "mean": sensorRecords['sum'] / np.maximum(sensorRecords['count'], 1),
+                "min": sensorRecords['min'],
+                "max": sensorRecords['max']
+            }
+            for field, column in columns.items():
+                aligned = np.full(len(axis), np.nan)
+                aligned[positions] = column
+                result[field][name] = aligned
+            count = np.zeros(len(axis), dtype=np.int64)
+            count[positions] = sensorRecords['count']
+            result["count"][name] = count
+            result["stats"][name] = summarize(sensorRecords)
+            
+            if self.rollupBase(resolution) is None and self.isCompressed(name):
+                self._fillCompressed(name, result, axis, sensorRecords, start, end)
+        
+        result["timestamps"].flags.writeable = False
+        for field in ("mean", "min", "max", "count"):
+            for array in result[field].values():
+                array.flags.writeable = False
+        return result
+    
+    def _sensorRecords(self, sensors: List[str], start: Optional[int], end: Optional[int], resolution: int) -> Dict[str, np.ndarray]:
+        """Intervalos ROLLUP_DTYPE de cada sensor a la resolución pedida"""
+        if start is not None:
+            start = start // resolution * resolution
+        empty = aggregate(np.empty(0, dtype=np.int64), np.empty(0), resolution)
+        
+        base = self.rollupBase(resolution)
+        if base is None:
+            try:
+                histories = self.readHistories(sensors, start, end)
+            except Exception as e:
+                print(f"Error consultando historial de {', '.join(sensors)}: {e}")
+                return {name: empty for name in sensors}
+            return {
+                name: aggregate(timestamps.astype(np.int64), values, resolution)
+                for name, (timestamps, values) in histories.items()
+            }
+        
+        records = {}
+        for name in sensors:
+            try:
+                sensorRecords = self.readRollups(name, base, start, end)
+                records[name] = sensorRecords if base == resolution else regroup(sensorRecords, resolution)
+            except Exception as e:
+                print(f"Error consultando historial de {name}: {e}")
+                records[name] = empty
+        return records
+    
+    def _fillCompressed(self, sensorName: str, result: dict, axis: np.ndarray, records: np.ndarray, start: Optional[int], end: Optional[int]):
+        """
+        Sensor comprimido a resolución cruda: interpola sus huecos en el eje
+        común (count queda en 0 ahí) y toma las estadísticas de los agregados
+        por minuto, que cuentan todas las lecturas
+        """
+        mean = records['sum'] / np.maximum(records['count'], 1)
+        for field in ("mean", "min", "max"):
+            aligned = result[field][sensorName]
+            missing = np.isnan(aligned)
+            aligned[missing] = interpolate(records['bucket'], mean, axis[missing])
+        
+        try:
+            stats = summarize(self.readRollups(sensorName, min(Settings.ROLLUP_RESOLUTIONS), start, end))
+            result["stats"][sensorName] = stats or result["stats"][sensorName]
+        except Exception as e:
+            print(f"Error consultando agregados de {sensorName}: {e}")
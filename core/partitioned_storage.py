@@ -0,0 +1,410 @@
+"""
+Historial particionado por tiempo con manifiesto, retención y compactación
+Cada sensor guarda una partición columnar por día; las antiguas se
+reescriben a menor resolución y se fusionan en particiones mensuales
+"""
+import datetime
+import json
+import os
+import shutil
+import threading
+import time
+import numpy as np
+from typing import Callable, Dict, List, Optional, Tuple
+from config.settings import Settings
+from config.config_manager import ConfigManager
+from core.columnar_storage import ColumnarSeries, TIMESTAMP_DTYPE, VALUE_DTYPE
+
+
+DAY_SECONDS = 86400
+
+
+def _dayName(day: int) -> str:
+    return str(np.datetime64(day * DAY_SECONDS, 's').astype('datetime64[D]'))
+
+
+def _monthBounds(monthName: str) -> Tuple[int, int]:
+    month = np.datetime64(monthName, 'M')
+    start = month.astype('datetime64[s]').astype(np.int64)
+    end = (month + 1).astype('datetime64[s]').astype(np.int64)
+    return int(start), int(end)
+
+
+def downsample(timestamps: np.ndarray, values: np.ndarray, resolution: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Promedio por intervalos de resolution segundos sin contar los NaN (NaN
+    si el intervalo no tiene valores); la marca es el inicio del intervalo.
+    values puede tener una columna por sensor (filas, sensores).
+    """
+    if len(timestamps) == 0:
+        return timestamps, values
+    buckets = timestamps // resolution
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    values = values.astype(np.float64)
+    finite = np.isfinite(values)
+    sums = np.add.reduceat(np.where(finite, values, 0.0), starts)
+    counts = np.add.reduceat(finite.astype(np.int64), starts)
+    with np.errstate(invalid='ignore'):
+        means = sums / counts
+    return (buckets[starts] * resolution).astype(TIMESTAMP_DTYPE), means.astype(VALUE_DTYPE)
+
+
+class PartitionedSeries:
+    """
+    Carpeta de un sensor:
+        manifest.json      particiones con sus límites, filas y resolución
+        2026-10-18/        partición diaria cruda (ColumnarSeries)
+        2026-09/           partición mensual compactada (promedios)
+    
+    Una lectura por rango consulta el manifiesto y solo abre las
+    particiones que se solapan con el rango. El manifiesto se reescribe de
+    forma atómica (archivo temporal + os.replace).
+    
+    Las filas de una partición mensual se confirman en el manifiesto tras
+    cada fusión; si una compactación se interrumpe, las filas sin confirmar
+    se descartan antes de reintentarla.
+    
+    Con width > 1 cada fila guarda width valores (serie ancha, ver
+    ColumnarSeries).
+    """
+    
+    MANIFEST = "manifest.json"
+    
+    def __init__(self, directory: str, segmentRows: int = 65536, width: int = 1):
+        self.directory = directory
+        self.segmentRows = segmentRows
+        self.width = width
+        self.lock = threading.RLock()
+        self.manifestPath = os.path.join(directory, self.MANIFEST)
+        self._partitions: Dict[str, dict] = {}
+        self._open: Dict[str, ColumnarSeries] = {}
+        self._loadManifest()
+        self._importLegacy()
+    
+    def _loadManifest(self):
+        if not os.path.exists(self.manifestPath):
+            self._rebuildManifest()
+            return
+        try:
+            with open(self.manifestPath, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            self._partitions = {p["name"]: p for p in manifest.get("partitions", [])}
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Error leyendo manifiesto {self.manifestPath}: {e}")
+            self._rebuildManifest()
+    
+    def _rebuildManifest(self):
+        """Reconstruye el manifiesto a partir de las carpetas de partición"""
+        self._partitions = {}
+        if not os.path.isdir(self.directory):
+            return
+        for name in sorted(os.listdir(self.directory)):
+            path = os.path.join(self.directory, name)
+            if not os.path.isdir(path) or name.endswith(".tmp"):
+                continue
+            try:
+                if len(name) == 10:
+                    start = int(np.datetime64(name, 's').astype(np.int64))
+                    entry = self._entry(name, start, start + DAY_SECONDS, 0)
+                else:
+                    start, end = _monthBounds(name)
+                    entry = self._entry(name, start, end, Settings.RETENTION_DOWNSAMPLE_SECONDS)
+            except ValueError:
+                continue
+            entry["rows"] = len(self._series(name))
+            self._partitions[name] = entry
+        if self._partitions:
+            self._saveManifest()
+    
+    def _saveManifest(self):
+        os.makedirs(self.directory, exist_ok=True)
+        manifest = {
+            "version": 1,
+            "partitions": sorted(self._partitions.values(), key=lambda p: p["start"])
+        }
+        temporary = self.manifestPath + ".tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=1)
+        os.replace(temporary, self.manifestPath)
+    
+    @staticmethod
+    def _entry(name: str, start: int, end: int, resolution: int) -> dict:
+        return {"name": name, "start": start, "end": end, "rows": None, "resolution": resolution}
+    
+    def _series(self, name: str) -> ColumnarSeries:
+        series = self._open.get(name)
+        if series is None:
+            series = ColumnarSeries(os.path.join(self.directory, name), self.segmentRows, self.width)
+            self._open[name] = series
+        return series
+    
+    def _importLegacy(self):
+        """Reparte en particiones una serie sin particionar (formato anterior)"""
+        legacy = ColumnarSeries(self.directory, self.segmentRows, self.width)
+        if not legacy.exists():
+            return
+        timestamps, values = legacy.read()
+        self.append(timestamps, values)
+        legacy.clear()
+        print(f"Historial {self.directory} convertido a particiones diarias")
+    
+    def partitions(self) -> List[dict]:
+        with self.lock:
+            return sorted((dict(p) for p in self._partitions.values()), key=lambda p: p["start"])
+    
+    def exists(self) -> bool:
+        return bool(self._partitions)
+    
+    def __len__(self) -> int:
+        with self.lock:
+            return sum(len(self._series(name)) for name in self._partitions)
+    
+    def firstTimestamp(self) -> Optional[int]:
+        """Marca más antigua guardada (None si la serie está vacía)"""
+        with self.lock:
+            for partition in sorted(self._partitions.values(), key=lambda p: p["start"]):
+                first = self._series(partition["name"]).firstTimestamp()
+                if first is not None:
+                    return first
+        return None
+    
+    def append(self, timestamps, values, fsync: bool = False):
+        timestamps = np.atleast_1d(np.asarray(timestamps))
+        if np.issubdtype(timestamps.dtype, np.datetime64):
+            timestamps = timestamps.astype('datetime64[s]').astype(np.int64)
+        timestamps = timestamps.astype(TIMESTAMP_DTYPE, copy=False)
+        values = np.asarray(values, dtype=VALUE_DTYPE).reshape((-1,) if self.width == 1 else (-1, self.width))
+        if timestamps.size == 0:
+            return
+        
+        days = timestamps // DAY_SECONDS
+        starts = np.flatnonzero(np.r_[True, days[1:] != days[:-1]])
+        ends = np.r_[starts[1:], len(days)]
+        
+        with self.lock:
+            changed = False
+            for first, last in zip(starts, ends):
+                name = _dayName(int(days[first]))
+                if name not in self._partitions:
+                    start = int(days[first]) * DAY_SECONDS
+                    self._partitions[name] = self._entry(name, start, start + DAY_SECONDS, 0)
+                    changed = True
+                self._series(name).append(timestamps[first:last], values[first:last], fsync)
+            if changed:
+                self._saveManifest()
+    
+    def prepend(self, timestamps, values, fsync: bool = False) -> int:
+        """
+        Añade lecturas anteriores a la primera guardada (p. ej. un historial
+        migrado); las demás se descartan. Cada partición debe quedar
+        ordenada por marca, así que una partición con datos en la que caen
+        se reescribe con ellas delante. Devuelve las filas añadidas.
+        """
+        timestamps = np.atleast_1d(np.asarray(timestamps))
+        if np.issubdtype(timestamps.dtype, np.datetime64):
+            timestamps = timestamps.astype('datetime64[s]').astype(np.int64)
+        timestamps = timestamps.astype(TIMESTAMP_DTYPE, copy=False)
+        values = np.asarray(values, dtype=VALUE_DTYPE).reshape((-1,) if self.width == 1 else (-1, self.width))
+        
+        with self.lock:
+            first = self.firstTimestamp()
+            if first is not None:
+                keep = timestamps < first
+                timestamps, values = timestamps[keep], values[keep]
+            if timestamps.size == 0:
+                return 0
+            order = np.argsort(timestamps, kind='stable')
+            timestamps, values = timestamps[order], values[order]
+            
+            loose = np.ones(len(timestamps), dtype=bool)
+            for partition in list(self._partitions.values()):
+                inside = (timestamps >= partition["start"]) & (timestamps < partition["end"]) & loose
+                if inside.any() and len(self._series(partition["name"])):
+                    self._rewritePartition(partition, timestamps[inside], values[inside])
+                    loose &= ~inside
+            self.append(timestamps[loose], values[loose], fsync)
+            return len(timestamps)
+    
+    def _rewritePartition(self, partition: dict, timestamps: np.ndarray, values: np.ndarray):
+        """Reescribe la partición con las lecturas dadas (anteriores a las suyas) delante"""
+        name = partition["name"]
+        if partition["resolution"]:
+            timestamps, values = downsample(timestamps, values, partition["resolution"])
+        oldTs, oldVals = self._series(name).read()
+        
+        path = os.path.join(self.directory, name)
+        temporary = path + ".tmp"
+        shutil.rmtree(temporary, ignore_errors=True)
+        ColumnarSeries(temporary, self.segmentRows, self.width).append(
+            np.concatenate([timestamps, oldTs]), np.concatenate([values, oldVals]), fsync=True
+        )
+        self._open.pop(name, None)
+        os.rename(path, path + ".old.tmp")
+        os.rename(temporary, path)
+        shutil.rmtree(path + ".old.tmp", ignore_errors=True)
+        
+        if partition["rows"] is not None:
+            partition["rows"] = len(self._series(name))
+        self._saveManifest()
+    
+    def read(self, start: Optional[int] = None, end: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        tsParts = []
+        valParts = []
+        with self.lock:
+            for partition in sorted(self._partitions.values(), key=lambda p: p["start"]):
+                if (start is not None and partition["end"] <= start) or (end is not None and partition["start"] >= end):
+                    continue
+                ts, vals = self._series(partition["name"]).read(start, end)
+                if len(ts):
+                    tsParts.append(ts)
+                    valParts.append(vals)
+        
+        if not tsParts:
+            empty = (0,) if self.width == 1 else (0, self.width)
+            return np.empty(0, dtype=TIMESTAMP_DTYPE), np.empty(empty, dtype=VALUE_DTYPE)
+        return np.concatenate(tsParts), np.concatenate(valParts)
+    
+    def _dropPartition(self, name: str):
+        self._partitions.pop(name, None)
+        self._open.pop(name, None)
+        shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
+    
+    def deleteBefore(self, cutoff: int) -> int:
+        """Elimina las particiones que terminan antes de cutoff; devuelve cuántas"""
+        with self.lock:
+            old = [p["name"] for p in self._partitions.values() if p["end"] <= cutoff]
+            for name in old:
+                self._dropPartition(name)
+            if old:
+                self._saveManifest()
+            return len(old)
+    
+    def compact(self, now: int, rawDays: int, resolution: int, maxDays: int = 0, averageOld: bool = True) -> dict:
+        """
+        Aplica la política de retención con now en segundos locales:
+          - elimina las particiones con más de maxDays días (0 = sin límite)
+          - las particiones diarias con más de rawDays días se promedian a
+            resolution segundos y se fusionan en la partición de su mes
+            (solo con averageOld)
+        """
+        stats = {"deleted": 0, "merged": 0, "rows_before": 0, "rows_after": 0}
+        
+        with self.lock:
+            if maxDays > 0:
+                stats["deleted"] = self.deleteBefore(now - maxDays * DAY_SECONDS)
+            if not averageOld:
+                return stats
+            
+            rawCutoff = now - rawDays * DAY_SECONDS
+            oldDays = sorted(
+                (p for p in self._partitions.values() if p["resolution"] == 0 and p["end"] <= rawCutoff),
+                key=lambda p: p["start"]
+            )
+            
+            for day in oldDays:
+                monthName = day["name"][:7]
+                month = self._partitions.get(monthName)
+                if month is None:
+                    monthStart, monthEnd = _monthBounds(monthName)
+                    month = self._entry(monthName, monthStart, monthEnd, resolution)
+                    month["rows"] = 0
+                
+                monthSeries = self._series(monthName)
+                if len(monthSeries) != month["rows"]:
+                    monthSeries.truncate(month["rows"])
+                
+                ts, vals = self._series(day["name"]).read()
+                reducedTs, reducedVals = downsample(ts, vals, month["resolution"])
+                monthSeries.append(reducedTs, reducedVals, fsync=True)
+                
+                month["rows"] += len(reducedTs)
+                self._partitions[monthName] = month
+                self._partitions.pop(day["name"])
+                self._saveManifest()
+                
+                self._open.pop(day["name"], None)
+                shutil.rmtree(os.path.join(self.directory, day["name"]), ignore_errors=True)
+                
+                stats["merged"] += 1
+                stats["rows_before"] += len(ts)
+                stats["rows_after"] += len(reducedTs)
+        
+        return stats
+    
+    def clear(self):
+        with self.lock:
+            for name in list(self._partitions):
+                self._dropPartition(name)
+            if os.path.exists(self.manifestPath):
+                os.remove(self.manifestPath)
+
+
+class CompactionJob:
+    """
+    Hilo que aplica periódicamente la retención a todas las series que
+    entrega seriesProvider(). Corre con baja frecuencia (COMPACTION_INTERVAL)
+    y no interfiere con las escrituras más allá del lock de cada serie.
+    onCompacted(serie) se llama tras cada serie modificada. Las series con
+    keepRaw(serie) solo pierden las particiones de más de maxDays: guardan
+    lecturas comprimidas (puntos de giro a intervalos irregulares) y
+    promediarlas a intervalos fijos rompería la cota de interpolación.
+    """
+    
+    def __init__(
+        self,
+        seriesProvider: Callable[[], List[PartitionedSeries]],
+        interval: float = None,
+        onCompacted: Callable[[PartitionedSeries], None] = None,
+        keepRaw: Callable[[PartitionedSeries], bool] = None
+    ):
+        self.seriesProvider = seriesProvider
+        self.onCompacted = onCompacted
+        self.keepRaw = keepRaw
+        self.interval = interval or Settings.COMPACTION_INTERVAL
+        self._stopEvent = threading.Event()
+        self._thread = None
+        self.lastRun = None
+        self.lastStats: Dict[str, dict] = {}
+    
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stopEvent.clear()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        self._stopEvent.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+    
+    def _loop(self):
+        # Primera pasada con retraso para no competir con el arranque
+        while not self._stopEvent.wait(min(60.0, self.interval) if self.lastRun is None else self.interval):
+            try:
+                self.runOnce()
+            except Exception as e:
+                print(f"[ERROR] en compactación del historial: {e}")
+    
+    def runOnce(self, rawDays: int = None, maxDays: int = None) -> Dict[str, dict]:
+        config = ConfigManager()
+        rawDays = config.get_retention_raw_days() if rawDays is None else rawDays
+        maxDays = config.get_retention_max_days() if maxDays is None else maxDays
+        now = int(np.datetime64(datetime.datetime.now(), 's').astype(np.int64))
+        
+        results = {}
+        for series in self.seriesProvider():
+            averageOld = not (self.keepRaw and self.keepRaw(series))
+            stats = series.compact(now, rawDays, Settings.RETENTION_DOWNSAMPLE_SECONDS, maxDays, averageOld)
+            if stats["merged"] or stats["deleted"]:
+                results[series.directory] = stats
+                print(f"Compactado {series.directory}: {stats['merged']} días fusionados "
+                      f"({stats['rows_before']} -> {stats['rows_after']} filas), "
+                      f"{stats['deleted']} particiones eliminadas")
+                if self.onCompacted:
+                    self.onCompacted(series)
+        
+        self.lastRun = time.time()
+        self.lastStats = results
+        return results
@@ -0,0 +1,131 @@
+"""
+Buffer circular preasignado para muestras (tiempo, valor)
+Evita crear tuplas por muestra y conversiones list -> array en cada lectura
+"""
+import threading
+import numpy as np
+
+
+class SampleRingBuffer:
+    """
+    Anillo de capacidad fija con dos arreglos float64 (tiempos, valores).
+    Con channels > 1 los valores son una matriz (canales x muestras) con
+    una marca de tiempo común por muestra; con un canal son un vector.
+    
+    Los datos se escriben dos veces (en i y en i + capacidad) para que
+    cualquier ventana de hasta `capacity` muestras sea una vista contigua,
+    sin copias. Las vistas devueltas son de solo lectura y válidas hasta
+    que se sobrescriban con nuevas muestras; los consumidores de otro hilo
+    que retengan ventanas grandes deben pedir copy=True.
+    
+    writeIndex funciona como número de secuencia: la muestra k es la
+    k-ésima escrita desde la creación del anillo.
+    """
+    
+    def __init__(self, capacity: int, channels: int = 1):
+        self.capacity = int(capacity)
+        self.channels = int(channels)
+        self._times = np.zeros(2 * self.capacity, dtype=np.float64)
+        self._values = np.zeros(self._shape(2 * self.capacity), dtype=np.float64)
+        self.writeIndex = 0  # Total de muestras escritas (monótono)
+        self.lock = threading.RLock()
+    
+    def __len__(self) -> int:
+        return min(self.writeIndex, self.capacity)
+    
+    def _shape(self, samples: int) -> tuple:
+        return (samples,) if self.channels == 1 else (self.channels, samples)
+    
+    @property
+    def oldestIndex(self) -> int:
+        """Secuencia de la muestra más antigua aún disponible"""
+        return max(0, self.writeIndex - self.capacity)
+    
+    def appendOne(self, time: float, value):
+        with self.lock:
+            pos = self.writeIndex % self.capacity
+            self._times[pos] = self._times[pos + self.capacity] = time
+            self._values[..., pos] = self._values[..., pos + self.capacity] = value
+            self.writeIndex += 1
+    
+    def append(self, times, values):
+        with self.lock:
+            self._append(times, values)
+    
+    def _append(self, times, values):
+        times = np.asarray(times, dtype=np.float64).ravel()
+        values = np.asarray(values, dtype=np.float64).reshape(self._shape(-1))
+        n = values.shape[-1]
+        if n == 0:
+            return
+        
+        if n > self.capacity:
+            times = times[-self.capacity:]
+            values = values[..., -self.capacity:]
+            self.writeIndex += n - self.capacity
+            n = self.capacity
+        
+        start = self.writeIndex % self.capacity
+        first = min(n, self.capacity - start)
+        
+        for buf, data in ((self._times, times), (self._values, values)):
+            buf[..., start:start + first] = data[..., :first]
+            buf[..., start + self.capacity:start + self.capacity + first] = data[..., :first]
+            if first < n:
+                buf[..., :n - first] = data[..., first:]
+                buf[..., self.capacity:self.capacity + n - first] = data[..., first:]
+        
+        self.writeIndex += n
+    
+    def latest(self, n: int = None, copy: bool = False) -> tuple:
+        """Devuelve vistas (tiempos, valores) de las últimas n muestras"""
+        with self.lock:
+            available = len(self)
+            n = available if n is None else max(0, min(int(n), available))
+            return self._window(self.writeIndex - n, self.writeIndex, copy)
+    
+    def since(self, seq: int, copy: bool = False) -> tuple:
+        """
+        Devuelve (tiempos, valores, siguienteSecuencia) con todo lo escrito
+        desde la secuencia seq. Si seq ya fue sobrescrita, empieza en la
+        muestra más antigua disponible.
+        """
+        with self.lock:
+            times, values = self.read(seq, self.writeIndex, copy)
+            return times, values, self.writeIndex
+    
+    def read(self, start: int, end: int, copy: bool = False) -> tuple:
+        """Muestras con secuencia en [start, end), recortadas a lo disponible"""
+        with self.lock:
+            end = min(int(end), self.writeIndex)
+            start = min(max(int(start), self.oldestIndex), end)
+            return self._window(start, end, copy)
+    
+    def sampleAt(self, seq: int) -> tuple:
+        with self.lock:
+            if not self.oldestIndex <= seq < self.writeIndex:
+                return (None, None)
+            pos = seq % self.capacity
+            value = self._values[..., pos]
+            return (float(self._times[pos]), float(value) if self.channels == 1 else value.copy())
+    
+    def clear(self):
+        with self.lock:
+            self.writeIndex = 0
+    
+    def _window(self, start: int, end: int, copy: bool) -> tuple:
+        n = end - start
+        stop = end % self.capacity
+        if stop < n or (stop == 0 and n > 0):
+            stop += self.capacity
+        
+        times = self._times[stop - n:stop]
+        values = self._values[..., stop - n:stop]
+        if copy:
+            return times.copy(), values.copy()
+        return self._readOnly(times), self._readOnly(values)
+    
+    @staticmethod
+    def _readOnly(view: np.ndarray) -> np.ndarray:
+        view.flags.writeable = False
+        return view
@@ -0,0 +1,204 @@
+"""
+Agregados incrementales del historial de sensores (minuto, hora y día)
+Se actualizan con cada lote escrito, así un reporte largo lee unos miles
+de filas en lugar de todas las lecturas
+"""
+import os
+import threading
+import numpy as np
+from typing import Dict, Optional, Sequence
+
+
+ROLLUP_DTYPE = np.dtype([
+    ('bucket', '<i8'),  # inicio del intervalo, segundos en hora local
+    ('count', '<i8'),
+    ('sum', '<f8'),
+    ('sumsq', '<f8'),
+    ('min', '<f8'),
+    ('max', '<f8')
+])
+
+
+def aggregate(timestamps: np.ndarray, values: np.ndarray, resolution: int, floor: Optional[int] = None) -> np.ndarray:
+    """
+    Agrupa lecturas (marcas int64 crecientes) en intervalos de resolution
+    segundos. Una marca anterior a floor o a la marca previa se suma al
+    intervalo más reciente para que los intervalos queden ordenados.
+    """
+    timestamps = np.asarray(timestamps, dtype=np.int64)
+    values = np.asarray(values, dtype=np.float64)
+    finite = np.isfinite(values)
+    if not finite.all():
+        timestamps, values = timestamps[finite], values[finite]
+    if timestamps.size == 0:
+        return np.empty(0, dtype=ROLLUP_DTYPE)
+    
+    buckets = np.maximum.accumulate(timestamps // resolution)
+    if floor is not None:
+        np.maximum(buckets, floor // resolution, out=buckets)
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    
+    records = np.empty(len(starts), dtype=ROLLUP_DTYPE)
+    records['bucket'] = buckets[starts] * resolution
+    records['count'] = np.diff(np.r_[starts, len(buckets)])
+    records['sum'] = np.add.reduceat(values, starts)
+    records['sumsq'] = np.add.reduceat(values * values, starts)
+    records['min'] = np.minimum.reduceat(values, starts)
+    records['max'] = np.maximum.reduceat(values, starts)
+    return records
+
+
+def regroup(records: np.ndarray, resolution: int) -> np.ndarray:
+    """Agrupa intervalos en otros de resolution segundos (múltiplo de los originales)"""
+    if len(records) == 0:
+        return records
+    buckets = records['bucket'] // resolution
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    
+    grouped = np.empty(len(starts), dtype=ROLLUP_DTYPE)
+    grouped['bucket'] = buckets[starts] * resolution
+    for field in ('count', 'sum', 'sumsq'):
+        grouped[field] = np.add.reduceat(records[field], starts)
+    grouped['min'] = np.minimum.reduceat(records['min'], starts)
+    grouped['max'] = np.maximum.reduceat(records['max'], starts)
+    return grouped
+
+
+def summarize(records: np.ndarray) -> dict:
+    """count/mean/min/max/std de un conjunto de intervalos (std poblacional)"""
+    count = int(records['count'].sum())
+    if count == 0:
+        return {}
+    mean = float(records['sum'].sum() / count)
+    variance = max(0.0, float(records['sumsq'].sum() / count) - mean * mean)
+    return {
+        "count": count,
+        "mean": mean,
+        "min": float(records['min'].min()),
+        "max": float(records['max'].max()),
+        "std": variance ** 0.5
+    }
+
+
+class RollupSeries:
+    """
+    Un archivo de registros ROLLUP_DTYPE por resolución dentro de la
+    carpeta (rollup_60.bin, rollup_3600.bin, rollup_86400.bin). Solo se
+    anexan registros; el último intervalo, todavía abierto, se reescribe en
+    su sitio mientras siguen llegando lecturas suyas.
+    
+    Los agregados no dependen de las lecturas crudas: siguen siendo exactos
+    después de que la compactación promedie o elimine particiones antiguas.
+    """
+    
+    def __init__(self, directory: str, resolutions: Sequence[int] = (60, 3600, 86400)):
+        self.directory = directory
+        self.resolutions = tuple(sorted(int(r) for r in resolutions))
+        self.lock = threading.RLock()
+        self._last: Dict[int, np.ndarray] = {}
+    
+    def _path(self, resolution: int) -> str:
+        return os.path.join(self.directory, f"rollup_{resolution}.bin")
+    
+    def exists(self) -> bool:
+        return all(os.path.exists(self._path(r)) for r in self.resolutions)
+    
+    def _lastRecord(self, resolution: int) -> Optional[np.ndarray]:
+        if resolution not in self._last:
+            path = self._path(resolution)
+            count = os.path.getsize(path) // ROLLUP_DTYPE.itemsize if os.path.exists(path) else 0
+            if count == 0:
+                return None
+            with open(path, 'rb') as f:
+                f.seek((count - 1) * ROLLUP_DTYPE.itemsize)
+                self._last[resolution] = np.frombuffer(f.read(ROLLUP_DTYPE.itemsize), dtype=ROLLUP_DTYPE).copy()
+        return self._last[resolution]
+    
+    def update(self, timestamps: np.ndarray, values: np.ndarray):
+        """Incorpora un lote de lecturas a todas las resoluciones"""
+        with self.lock:
+            os.makedirs(self.directory, exist_ok=True)
+            for resolution in self.resolutions:
+                path = self._path(resolution)
+                last = self._lastRecord(resolution)
+                floor = None if last is None else int(last['bucket'][0])
+                records = aggregate(timestamps, values, resolution, floor)
+                
+                mode = 'r+b' if os.path.exists(path) else 'wb'
+                with open(path, mode) as f:
+                    size = f.seek(0, os.SEEK_END)
+                    # Tamaño múltiplo del registro (descarta una escritura cortada)
+                    f.truncate(size - size % ROLLUP_DTYPE.itemsize)
+                    f.seek(0, os.SEEK_END)
+                    if not len(records):
+                        continue
+                    if last is not None and records['bucket'][0] == last['bucket'][0]:
+                        first = records[0]
+                        first['count'] += last['count'][0]
+                        first['sum'] += last['sum'][0]
+                        first['sumsq'] += last['sumsq'][0]
+                        first['min'] = min(first['min'], last['min'][0])
+                        first['max'] = max(first['max'], last['max'][0])
+                        f.seek(-ROLLUP_DTYPE.itemsize, os.SEEK_END)
+                    f.write(records.tobytes())
+                self._last[resolution] = records[-1:].copy()
+    
+    def read(self, resolution: int, start: Optional[int] = None, end: Optional[int] = None) -> np.ndarray:
+        """
+        Intervalos de la resolución con inicio en [start redondeado hacia
+        abajo al intervalo, end). Devuelve una copia ROLLUP_DTYPE.
+        """
+        path = self._path(resolution)
+        with self.lock:
+            count = os.path.getsize(path) // ROLLUP_DTYPE.itemsize if os.path.exists(path) else 0
+            if count == 0:
+                return np.empty(0, dtype=ROLLUP_DTYPE)
+            records = np.memmap(path, dtype=ROLLUP_DTYPE, mode='r', shape=(count,))
+            buckets = records['bucket']
+            first = 0 if start is None else int(np.searchsorted(buckets, start // resolution * resolution, side='left'))
+            last = count if end is None else int(np.searchsorted(buckets, end, side='left'))
+            return np.array(records[first:last])
+    
+    def rebuild(self, timestamps: np.ndarray, values: np.ndarray):
+        """Recalcula todas las resoluciones a partir del historial completo"""
+        with self.lock:
+            self.clear()
+            os.makedirs(self.directory, exist_ok=True)
+            for resolution in self.resolutions:
+                open(self._path(resolution), 'wb').close()
+            if len(timestamps):
+                self.update(timestamps, values)
+    
+    def mergeOlder(self, timestamps: np.ndarray, values: np.ndarray):
+        """
+        Suma lecturas anteriores a las ya agregadas (p. ej. un historial
+        migrado); la primera se puede sumar al primer intervalo guardado
+        """
+        with self.lock:
+            os.makedirs(self.directory, exist_ok=True)
+            for resolution in self.resolutions:
+                merged = regroup(np.concatenate([aggregate(timestamps, values, resolution), self.read(resolution)]), resolution)
+                temporary = self._path(resolution) + ".tmp"
+                merged.tofile(temporary)
+                os.replace(temporary, self._path(resolution))
+                self._last.pop(resolution, None)
+    
+    def deleteBefore(self, cutoff: int):
+        """Elimina los intervalos que terminan antes de cutoff"""
+        with self.lock:
+            for resolution in self.resolutions:
+                records = self.read(resolution)
+                kept = records[records['bucket'] + resolution > cutoff]
+                if len(kept) == len(records):
+                    continue
+                temporary = self._path(resolution) + ".tmp"
+                kept.tofile(temporary)
+                os.replace(temporary, self._path(resolution))
+                self._last.pop(resolution, None)
+    
+    def clear(self):
+        with self.lock:
+            for resolution in self.resolutions:
+                if os.path.exists(self._path(resolution)):
+                    os.remove(self._path(resolution))
+            self._last = {}
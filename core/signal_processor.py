@@ -1,12 +1,497 @@
+import threading
+from abc import ABC, abstractmethod
+from functools import lru_cache
 import numpy as np
-from scipy.signal import iirnotch, butter, filtfilt
+from typing import Dict, List, Sequence, Tuple
+from scipy.signal import iirnotch, butter, filtfilt, firwin, sosfilt, sosfilt_zi, tf2sos
 from config.settings import Settings
+from core.ring_buffer import SampleRingBuffer
+
+
+@lru_cache(maxsize=32)
+def bandSlices(n: int, fs: float, bands: Tuple[Tuple[float, float], ...]) -> Tuple[slice, ...]:
+    """Índices [fmin, fmax) de cada banda en un rfft de n muestras, calculados una vez por n"""
+    freqs = np.fft.rfftfreq(n, d=1/fs)
+    return tuple(
+        slice(int(np.searchsorted(freqs, fmin, side='left')), int(np.searchsorted(freqs, fmax, side='left')))
+        for fmin, fmax in bands
+    )
+
+
+@lru_cache(maxsize=8)
+def analysisWindow(n: int) -> np.ndarray:
+    """Ventana de Hann de n muestras (compartida, de solo lectura)"""
+    window = np.hanning(n)
+    window.flags.writeable = False
+    return window
+
+
+def bandName(fmin: float, fmax: float) -> str:
+    return f"{fmin:g}-{fmax:g}Hz"
+
+
+def channelValue(value):
+    """float para un stream de un canal; arreglo (uno por canal) con varios"""
+    value = np.asarray(value, dtype=np.float64)
+    return float(value) if value.ndim == 0 else value
+
+
+class RollingFeatures:
+    """
+    Media, desviación estándar y RMS en ventanas deslizantes de la señal y
+    de su primera diferencia, para varias longitudes de ventana a la vez.
+    
+    Cada ventana lleva sumas y sumas de cuadrados: un bloque nuevo suma sus
+    muestras y resta las que salen de la ventana (leídas del anillo), así
+    el costo es O(1) por muestra sin importar la longitud de la ventana, y
+    features() es O(1). Las sumas de la señal se llevan respecto a una
+    referencia cercana a su media, y cada `capacity` muestras se recalculan
+    exactas para que el redondeo no se acumule.
+    
+    Con varios canales las sumas son arreglos por canal y todas las
+    operaciones van sobre el eje de muestras, sin recorrer canales.
+    """
+    
+    def __init__(self, windows: Sequence[int], channels: int = 1):
+        self.windows = tuple(sorted(set(int(w) for w in windows)))
+        self.capacity = 2 * self.windows[-1]
+        self.channels = int(channels)
+        self._channelShape = () if self.channels == 1 else (self.channels,)
+        self.lock = threading.Lock()
+        self._signal = SampleRingBuffer(self.capacity, self.channels)
+        self._diff = SampleRingBuffer(self.capacity, self.channels)
+        self.reset()
+    
+    def reset(self):
+        with self.lock:
+            self._signal.clear()
+            self._diff.clear()
+            self._last = None
+            self._reference = np.zeros(self._channelShape)
+            # [ventana, señal/diferencia, suma/suma de cuadrados(, canal)]
+            self._sums = np.zeros((len(self.windows), 2, 2) + self._channelShape)
+            self._sinceRefresh = 0
+    
+    def update(self, times, values):
+        """Incorpora las muestras nuevas (ya filtradas)"""
+        times = np.asarray(times, dtype=np.float64).ravel()
+        values = np.asarray(values, dtype=np.float64).reshape(self._channelShape + (-1,))
+        count = values.shape[-1]
+        if count == 0:
+            return
+        
+        with self.lock:
+            if self._last is None:
+                self._reference = values[..., 0].copy()
+                diffs = np.diff(values, axis=-1)
+            else:
+                diffs = np.diff(values, axis=-1, prepend=self._last[..., None])
+            self._last = values[..., -1].copy()
+            
+            self._sinceRefresh += count
+            if count > self.windows[-1] or self._sinceRefresh >= self.capacity:
+                self._signal.append(times, values)
+                self._diff.append(times[len(times) - diffs.shape[-1]:], diffs)
+                self._refresh()
+                return
+            
+            for column, (ring, new, offset) in enumerate((
+                (self._signal, values, self._reference),
+                (self._diff, diffs, np.zeros(self._channelShape))
+            )):
+                start = ring.writeIndex
+                ring.append(times[len(times) - new.shape[-1]:], new)
+                added = self._moments(new, offset)
+                for i, window in enumerate(self.windows):
+                    _, leaving = ring.read(max(0, start - window), max(0, start + new.shape[-1] - window))
+                    self._sums[i, column] += added - self._moments(leaving, offset)
+    
+    @staticmethod
+    def _moments(values: np.ndarray, offset: np.ndarray) -> np.ndarray:
+        """[suma, suma de cuadrados] respecto a offset sobre el eje de muestras"""
+        values = values - offset[..., None]
+        return np.stack((values.sum(axis=-1), np.einsum('...i,...i->...', values, values)))
+    
+    def _refresh(self):
+        """Recalcula las sumas desde los anillos con la media actual como referencia"""
+        self._sinceRefresh = 0
+        _, recent = self._signal.latest(self.windows[-1])
+        self._reference = recent.mean(axis=-1) if recent.shape[-1] else np.zeros(self._channelShape)
+        for column, (ring, offset) in enumerate(((self._signal, self._reference), (self._diff, np.zeros(self._channelShape)))):
+            for i, window in enumerate(self.windows):
+                _, values = ring.latest(window)
+                self._sums[i, column] = self._moments(values, offset)
+    
+    def features(self, window: int = None) -> dict:
+        """
+        Estadísticas de la ventana (la más larga si no se indica; debe ser
+        una de windows): mean/std/rms de la señal y diff_mean/diff_std/diff_rms
+        de su diferencia, las muestras que cubre la ventana y las vistas en total.
+        Con varios canales cada estadística es un arreglo por canal.
+        """
+        with self.lock:
+            window = self.windows[-1] if window is None else int(window)
+            i = self.windows.index(window)
+            result = {"window": window, "samples": min(window, len(self._signal)), "seen": self._signal.writeIndex}
+            for column, (prefix, ring, offset) in enumerate((("", self._signal, self._reference), ("diff_", self._diff, 0.0))):
+                count = min(window, len(ring))
+                if count == 0:
+                    empty = channelValue(np.full(self._channelShape, np.nan))
+                    result.update({f"{prefix}mean": empty, f"{prefix}std": empty, f"{prefix}rms": empty})
+                    continue
+                total, squares = self._sums[i, column] / count
+                mean = total + offset
+                variance = np.maximum(0.0, squares - total * total)
+                result[f"{prefix}mean"] = channelValue(mean)
+                result[f"{prefix}std"] = channelValue(np.sqrt(variance))
+                result[f"{prefix}rms"] = channelValue(np.sqrt(variance + mean * mean))
+            return result
+
+
+class SegmentedStream(ABC):
+    """
+    Base de los análisis por segmentos de un stream: cada `hop` muestras
+    nuevas se completa un segmento con las últimas `window` muestras. Los
+    segmentos que completa un bloque se entregan juntos a _process como
+    una matriz (segmentos x window), vista sobre el anillo de muestras;
+    con varios canales, (canales x segmentos x window).
+    Un bloque de más de `history` muestras solo produce los segmentos que
+    caben en sus últimas `history` muestras.
+    """
+    
+    def __init__(self, window: int, hop: int, history: int = None, channels: int = 1):
+        self.window = int(window)
+        self.hop = int(hop)
+        self.channels = int(channels)
+        self._channelShape = () if self.channels == 1 else (self.channels,)
+        self.lock = threading.Lock()
+        self.samples = SampleRingBuffer(max(history or Settings.BUFFER_MAX_SIZE, self.window + self.hop), self.channels)
+        self._nextEnd = self.window  # Secuencia de la muestra que cierra el próximo segmento
+    
+    def reset(self):
+        with self.lock:
+            self.samples.clear()
+            self._nextEnd = self.window
+            self._reset()
+    
+    def _reset(self):
+        pass
+    
+    def update(self, times, values):
+        """Incorpora muestras nuevas y procesa los segmentos que completan"""
+        with self.lock:
+            self.samples.append(times, values)
+            written = self.samples.writeIndex
+            if written < self._nextEnd:
+                return
+            
+            # Si el bloque trae más de lo que cabe, se salta a los segmentos más recientes
+            oldestEnd = self.samples.oldestIndex + self.window
+            if self._nextEnd < oldestEnd:
+                self._nextEnd += -(-(oldestEnd - self._nextEnd) // self.hop) * self.hop
+            count = (written - self._nextEnd) // self.hop + 1
+            first = self._nextEnd - self.window
+            sampleTimes, sampleValues = self.samples.read(first, self._nextEnd + (count - 1) * self.hop)
+            
+            windows = np.lib.stride_tricks.sliding_window_view
+            segments = windows(sampleValues, self.window, axis=-1)[..., ::self.hop, :]
+            ends = windows(sampleTimes, self.window)[::self.hop, -1]
+            self._process(ends, segments)
+            self._nextEnd += count * self.hop
+    
+    @abstractmethod
+    def _process(self, times: np.ndarray, segments: np.ndarray):
+        """times: marca de la última muestra de cada segmento"""
+
+
+class StftEngine(SegmentedStream):
+    """
+    STFT por saltos sobre un stream: cada `hop` muestras nuevas se
+    transforma la última ventana de `window` muestras (ventana de Hann) y
+    se guarda un cuadro con el centroide espectral y la energía (suma de
+    magnitudes) de cada banda en un anillo de `frames` cuadros.
+    
+    Cada cuadro cuesta un rfft de `window` muestras, sin importar cuánto
+    historial haya; los cuadros que completa un bloque se transforman
+    juntos, y con varios canales todos los canales en el mismo rfft. Los
+    índices de las bandas se calculan una vez por tamaño de ventana
+    (bandSlices).
+    """
+    
+    def __init__(
+        self,
+        fs: float,
+        window: int,
+        hop: int,
+        frames: int,
+        bands: Sequence[Tuple[float, float]],
+        history: int = None,
+        channels: int = 1
+    ):
+        super().__init__(window, hop, history, channels)
+        self.fs = fs
+        self.bands = tuple((float(fmin), float(fmax)) for fmin, fmax in bands)
+        self.bandNames = [bandName(fmin, fmax) for fmin, fmax in self.bands]
+        self._slices = bandSlices(self.window, self.fs, self.bands)
+        self._freqs = np.fft.rfftfreq(self.window, d=1/self.fs)
+        
+        self.capacity = int(frames)
+        self._times = np.zeros(self.capacity)
+        self._centroids = np.zeros((self.capacity,) + self._channelShape)
+        self._energies = np.zeros((self.capacity,) + self._channelShape + (len(self.bands),))
+        self.frameIndex = 0  # Cuadros calculados (monótono)
+    
+    def _reset(self):
+        self.frameIndex = 0
+    
+    def _process(self, times: np.ndarray, segments: np.ndarray):
+        magnitudes = np.abs(np.fft.rfft(segments * analysisWindow(self.window), axis=-1))
+        totals = magnitudes.sum(axis=-1)
+        centroids = np.divide(magnitudes @ self._freqs, totals, out=np.zeros(totals.shape), where=totals > 0)
+        energies = np.stack([magnitudes[..., band].sum(axis=-1) for band in self._slices], axis=-1)
+        
+        # Cuadros al frente: (cuadros[, canales]) y (cuadros[, canales], bandas)
+        centroids = np.moveaxis(centroids, -1, 0)
+        energies = np.moveaxis(energies, -2, 0)
+        kept = min(len(times), self.capacity)
+        positions = np.arange(self.frameIndex + len(times) - kept, self.frameIndex + len(times)) % self.capacity
+        self._times[positions] = times[-kept:]
+        self._centroids[positions] = centroids[-kept:]
+        self._energies[positions] = energies[-kept:]
+        self.frameIndex += len(times)
+    
+    def frames(self, n: int = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Copias de los últimos n cuadros en orden: (tiempos de la última
+        muestra de cada ventana, centroides, energías cuadros x bandas);
+        con varios canales, centroides cuadros x canales y energías
+        cuadros x canales x bandas
+        """
+        with self.lock:
+            available = min(self.frameIndex, self.capacity)
+            n = available if n is None else max(0, min(int(n), available))
+            positions = np.arange(self.frameIndex - n, self.frameIndex) % self.capacity
+            return self._times[positions], self._centroids[positions], self._energies[positions]
+    
+    def latest(self) -> dict:
+        """Último cuadro como {"time", "spectral_centroid", "band_energy": {banda: energía}}; None sin cuadros"""
+        times, centroids, energies = self.frames(1)
+        if len(times) == 0:
+            return None
+        return {
+            "time": float(times[0]),
+            "spectral_centroid": channelValue(centroids[0]),
+            "band_energy": {name: channelValue(energies[0][..., i]) for i, name in enumerate(self.bandNames)}
+        }
+
+
+class WelchEstimator(SegmentedStream):
+    """
+    Densidad espectral de potencia de Welch en streaming: segmentos de
+    `segment` muestras con `overlap` de solapamiento, media restada y
+    ventana de Hann. Cada segmento completo actualiza el promedio con
+    olvido exponencial: suma = forgetting * suma + periodograma, y la
+    PSD es suma / peso (con peso = forgetting * peso + 1), así las
+    primeras estimaciones no quedan sesgadas hacia cero.
+    
+    Con forgetting = 1 coincide con scipy.signal.welch sobre los mismos
+    segmentos; con forgetting < 1 la memoria efectiva es de unos
+    1 / (1 - forgetting) segmentos. psd() y bandPower() solo leen el
+    promedio acumulado. Los segmentos de un bloque (y de todos los
+    canales) se suman con sus pesos en una sola operación.
+    """
+    
+    def __init__(
+        self,
+        fs: float,
+        segment: int,
+        overlap: int,
+        forgetting: float,
+        bands: Sequence[Tuple[float, float]],
+        history: int = None,
+        channels: int = 1
+    ):
+        super().__init__(segment, segment - overlap, history, channels)
+        self.fs = fs
+        self.forgetting = float(forgetting)
+        self.bands = tuple((float(fmin), float(fmax)) for fmin, fmax in bands)
+        self.bandNames = [bandName(fmin, fmax) for fmin, fmax in self.bands]
+        self.freqs = np.fft.rfftfreq(self.window, d=1/fs)
+        self._slices = bandSlices(self.window, fs, self.bands)
+        
+        self._taper = analysisWindow(self.window)
+        # Escala de densidad unilateral (sin duplicar DC ni Nyquist)
+        self._scale = np.full(len(self.freqs), 2.0 / (fs * np.sum(self._taper ** 2)))
+        self._scale[0] /= 2
+        if self.window % 2 == 0:
+            self._scale[-1] /= 2
+        self._reset()
+    
+    def _reset(self):
+        self._sum = np.zeros(self._channelShape + (len(self.freqs),))
+        self._weight = 0.0
+        self.segments = 0
+        self.lastTime = None
+    
+    def _process(self, times: np.ndarray, segments: np.ndarray):
+        centered = segments - segments.mean(axis=-1, keepdims=True)
+        periodograms = np.abs(np.fft.rfft(centered * self._taper, axis=-1)) ** 2 * self._scale
+        # El segmento k de S queda con peso forgetting^(S-1-k)
+        count = len(times)
+        weights = self.forgetting ** np.arange(count - 1, -1, -1)
+        self._sum = self.forgetting ** count * self._sum + np.einsum('...sf,s->...f', periodograms, weights)
+        self._weight = self.forgetting ** count * self._weight + float(weights.sum())
+        self.segments += count
+        self.lastTime = float(times[-1])
+    
+    def psd(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(frecuencias, PSD en unidades²/Hz, canales x frecuencias con varios); PSD vacía sin segmentos"""
+        with self.lock:
+            if self._weight == 0:
+                return self.freqs, np.empty(0)
+            return self.freqs, self._sum / self._weight
+    
+    def bandPower(self) -> dict:
+        """Potencia de cada banda (integral de la PSD en [fmin, fmax)); {} sin segmentos"""
+        freqs, psd = self.psd()
+        if psd.size == 0:
+            return {}
+        df = freqs[1] - freqs[0]
+        return {name: channelValue(psd[..., band].sum(axis=-1) * df) for name, band in zip(self.bandNames, self._slices)}
+
+
+class PolyphaseDecimator:
+    """
+    Decimador FIR en streaming por un factor entero: filtro antialias
+    (firwin, corte en 0.8 de la nueva Nyquist) evaluado solo en las
+    muestras que se conservan, una de cada `factor`. Es la forma polifásica:
+    cada salida cuesta len(taps) productos a la tasa de salida, no a la de
+    entrada.
+    
+    Entre bloques se conservan las últimas len(taps) - 1 entradas y la fase
+    de la próxima salida, así el resultado no depende de cómo lleguen
+    partidos los bloques. Cada salida lleva la marca de la muestra central
+    de su ventana (compensa el retardo de grupo del FIR) y se guarda en su
+    propio anillo. Con varios canales se decima la matriz completa a la vez.
+    """
+    
+    def __init__(self, fs: float, factor: int, capacity: int, tapsPerPhase: int = 8, channels: int = 1):
+        self.factor = int(factor)
+        self.rate = fs / self.factor
+        self.taps = firwin(tapsPerPhase * self.factor + 1, 0.8 / self.factor)
+        self._kernel = self.taps[::-1].copy()
+        self.delay = (len(self.taps) - 1) // 2
+        self.channels = int(channels)
+        self.ring = SampleRingBuffer(capacity, self.channels)
+        self.reset()
+    
+    def reset(self):
+        self._history = None  # Últimas len(taps) - 1 entradas
+        self._historyTimes = None
+        self._phase = self.delay  # Índice en el próximo bloque de la siguiente salida
+        self.ring.clear()
+    
+    def process(self, times, values) -> Tuple[np.ndarray, np.ndarray]:
+        """Decima un bloque; devuelve (y agrega al anillo) las salidas que completa"""
+        times = np.asarray(times, dtype=np.float64)
+        values = np.asarray(values, dtype=np.float64)
+        count = values.shape[-1]
+        if count == 0:
+            return times, values
+        
+        length = len(self.taps)
+        if self._history is None:
+            # Historia en estado estacionario, como sosfilt_zi en el filtro
+            self._history = np.repeat(values[..., :1], length - 1, axis=-1)
+            self._historyTimes = np.full(length - 1, times[0])
+        extended = np.concatenate((self._history, values), axis=-1)
+        extendedTimes = np.concatenate((self._historyTimes, times))
+        
+        positions = np.arange(self._phase, count, self.factor)
+        windows = np.lib.stride_tricks.sliding_window_view(extended, length, axis=-1)[..., positions, :]
+        outputs = windows @ self._kernel
+        outputTimes = extendedTimes[positions + length - 1 - self.delay]
+        self.ring.append(outputTimes, outputs)
+        
+        self._phase = (positions[-1] + self.factor if positions.size else self._phase) - count
+        self._history = extended[..., -(length - 1):].copy()
+        self._historyTimes = extendedTimes[-(length - 1):].copy()
+        return outputTimes, outputs
+
+
+class StreamingFilter:
+    """
+    Filtro causal con estado para una señal en tiempo real.
+    Conserva las condiciones iniciales (zi) de las secciones SOS entre
+    bloques, de modo que solo se filtran las muestras nuevas.
+    Las muestras filtradas alimentan también sus RollingFeatures y sus
+    análisis por segmentos (StftEngine, WelchEstimator), y pasan en cascada
+    por sus decimadores (por ejemplo 200 -> 50 -> 10 Hz), cada uno con su
+    anillo a su tasa.
+    
+    Con channels > 1 los bloques son matrices (canales x muestras): una
+    sola llamada a sosfilt filtra todos los canales sobre el eje de
+    muestras, y el resto de la cadena trabaja igual sobre la matriz.
+    """
+    
+    def __init__(
+        self,
+        sos: np.ndarray,
+        capacity: int,
+        windows: Sequence[int] = None,
+        stft: StftEngine = None,
+        welch: WelchEstimator = None,
+        decimators: Sequence[PolyphaseDecimator] = (),
+        channels: int = 1
+    ):
+        self.sos = sos
+        self.zi = None
+        self.channels = int(channels)
+        self.ring = SampleRingBuffer(capacity, self.channels)
+        self.features = RollingFeatures(windows or Settings.FEATURE_WINDOWS, self.channels)
+        self.stft = stft
+        self.welch = welch
+        self._analyses = [a for a in (stft, welch) if a is not None]
+        self.decimators = list(decimators)
+    
+    def process(self, times, values) -> np.ndarray:
+        values = np.asarray(values, dtype=np.float64)
+        if values.size == 0:
+            return values
+        if self.channels > 1:
+            values = values.reshape(self.channels, -1)
+        
+        if self.zi is None:
+            # Arranque en estado estacionario para evitar el transitorio inicial;
+            # zi es (secciones[, canales], 2)
+            zi = sosfilt_zi(self.sos)
+            self.zi = zi * values[0] if self.channels == 1 else zi[:, None, :] * values[None, :, :1]
+        
+        filtered, self.zi = sosfilt(self.sos, values, axis=-1, zi=self.zi)
+        self.ring.append(times, filtered)
+        self.features.update(times, filtered)
+        for analysis in self._analyses:
+            analysis.update(times, filtered)
+        stageTimes, stageValues = times, filtered
+        for decimator in self.decimators:
+            stageTimes, stageValues = decimator.process(stageTimes, stageValues)
+        return filtered
+    
+    def reset(self):
+        self.zi = None
+        self.ring.clear()
+        self.features.reset()
+        for analysis in self._analyses:
+            analysis.reset()
+        for decimator in self.decimators:
+            decimator.reset()
 
 
 class SignalProcessor:
     
     def __init__(self):
         self.fs = Settings.SAMPLING_FREQUENCY
+        self._streams: Dict[str, StreamingFilter] = {}
         self._setupFilters()
     
     def _setupFilters(self):
@@ -25,8 +510,15 @@ class SignalProcessor:
             fc/(0.5*self.fs), 
             btype='low'
         )
+        
+        # Cascada notch + pasa-bajas en secciones de segundo orden (modo streaming)
+        self.sos = np.vstack([
+            tf2sos(self.bNotch, self.aNotch),
+            butter(order, fc/(0.5*self.fs), btype='low', output='sos')
+        ])
     
     def convertRawToMv(self, rawVoltage: float, offset: float = None, gain: float = None) -> float:
+        # Acepta escalares o arreglos NumPy (conversión vectorizada por bloque)
         offset = offset or Settings.SIGNAL_OFFSET
         gain = gain or Settings.SIGNAL_GAIN
         
@@ -34,7 +526,8 @@ class SignalProcessor:
         return voltageReal * 1000
     
     def applyFilters(self, signal: np.ndarray) -> np.ndarray:
-        if len(signal) < 15:
+        """Filtrado de fase cero sobre el último eje (una señal o canales x muestras)"""
+        if np.shape(signal)[-1] < 15:
             return signal
         
         try:
@@ -45,39 +538,151 @@ class SignalProcessor:
             print(f"Error aplicando filtros: {e}")
             return signal
     
-    def calculateFeatures(self, signal: np.ndarray) -> dict:
-        if len(signal) < 100:
+    def getStream(self, streamId: str, channels: int = 1) -> StreamingFilter:
+        """Stream existente o uno nuevo de `channels` canales"""
+        stream = self._streams.get(streamId)
+        if stream is None:
+            stft = StftEngine(
+                self.fs, Settings.STFT_WINDOW, Settings.STFT_HOP, Settings.STFT_FRAMES, Settings.SPECTRAL_BANDS,
+                channels=channels
+            )
+            welch = WelchEstimator(
+                self.fs, Settings.WELCH_SEGMENT, Settings.WELCH_OVERLAP, Settings.WELCH_FORGETTING, Settings.SPECTRAL_BANDS,
+                channels=channels
+            )
+            stream = StreamingFilter(
+                self.sos, Settings.BUFFER_MAX_SIZE, stft=stft, welch=welch,
+                decimators=self._makeDecimators(channels), channels=channels
+            )
+            self._streams[streamId] = stream
+        return stream
+    
+    def _makeDecimators(self, channels: int = 1) -> List[PolyphaseDecimator]:
+        """
+        Cascada de Settings.DECIMATION_RATES; cada anillo cubre el mismo
+        tiempo que el de tasa completa
+        """
+        decimators = []
+        rate = self.fs
+        for target in Settings.DECIMATION_RATES:
+            factor = rate / target
+            if factor < 2 or factor != int(factor):
+                raise ValueError(f"La tasa {target} Hz no divide a {rate} Hz")
+            capacity = max(1, int(np.ceil(Settings.BUFFER_MAX_SIZE * target / self.fs)))
+            decimators.append(
+                PolyphaseDecimator(rate, int(factor), capacity, Settings.DECIMATION_TAPS_PER_PHASE, channels)
+            )
+            rate = target
+        return decimators
+    
+    def getRing(self, streamId: str, rate: float = None) -> SampleRingBuffer:
+        """Anillo filtrado del stream a la tasa pedida (None o fs: tasa completa)"""
+        stream = self.getStream(streamId)
+        if rate is None or rate == self.fs:
+            return stream.ring
+        for decimator in stream.decimators:
+            if decimator.rate == rate:
+                return decimator.ring
+        raise ValueError(f"El stream {streamId} no tiene salida a {rate} Hz")
+    
+    def processStream(self, streamId: str, times, values) -> np.ndarray:
+        """
+        Filtra solo las muestras nuevas y las agrega al anillo filtrado del
+        stream; un primer bloque canales x muestras crea el stream multicanal
+        """
+        try:
+            channels = np.shape(values)[0] if np.ndim(values) == 2 else 1
+            return self.getStream(streamId, channels).process(times, values)
+        except Exception as e:
+            print(f"Error filtrando stream {streamId}: {e}")
+            return np.asarray(values, dtype=np.float64)
+    
+    def getFilteredStream(self, streamId: str, n: int = None) -> tuple:
+        """Devuelve (tiempos, voltajes filtrados) de las últimas n muestras del stream"""
+        return self.getStream(streamId).ring.latest(n)
+    
+    def getDecimatedStream(self, streamId: str, rate: float, n: int = None) -> tuple:
+        """(tiempos, voltajes filtrados) de las últimas n muestras a la tasa rate"""
+        return self.getRing(streamId, rate).latest(n)
+    
+    def getStreamSince(self, streamId: str, rate: float, seq: int) -> tuple:
+        """
+        (tiempos, voltajes, siguienteSecuencia) escritos a la tasa rate desde
+        seq, para consumidores que leen por partes (por ejemplo un archivo)
+        """
+        return self.getRing(streamId, rate).since(seq, copy=True)
+    
+    def getFeatures(self, streamId: str, window: int = None) -> dict:
+        """Estadísticas actuales del stream filtrado en la ventana (ver RollingFeatures.features), en O(1)"""
+        return self.getStream(streamId).features.features(window)
+    
+    def getSpectralFrames(self, streamId: str, n: int = None) -> tuple:
+        """(tiempos, centroides, energías por banda) de los últimos n cuadros STFT del stream"""
+        return self.getStream(streamId).stft.frames(n)
+    
+    def getPsd(self, streamId: str) -> tuple:
+        """(frecuencias, PSD de Welch promediada) del stream filtrado"""
+        return self.getStream(streamId).welch.psd()
+    
+    def getBandPower(self, streamId: str) -> dict:
+        """Potencia por banda de la PSD de Welch del stream"""
+        return self.getStream(streamId).welch.bandPower()
+    
+    def resetStream(self, streamId: str):
+        if streamId in self._streams:
+            self._streams[streamId].reset()
+    
+    def calculateFeatures(self, signal: np.ndarray, isFiltered: bool = False, streamId: str = None) -> dict:
+        """
+        Con streamId, rms/mean/std de la diferencia se toman de las
+        RollingFeatures del stream (ventana más larga) y el espectro del
+        último cuadro de su StftEngine, en lugar de recalcularse sobre signal;
+        se añade "band_power" de su WelchEstimator.
+        
+        signal puede ser una matriz canales x muestras: cada feature se
+        calcula sobre el eje de muestras y queda como un arreglo por canal.
+        """
+        if np.shape(signal)[-1] < 100:
             return None
         
         try:
-            signalFiltered = self.applyFilters(signal)
-            differences = np.diff(signalFiltered)
-            
-            rms = np.sqrt(np.mean(np.square(differences)))
-            mean = np.mean(differences)
-            std = np.std(differences)
-            
-            fftResult = np.fft.rfft(signalFiltered)
-            fftFreq = np.fft.rfftfreq(len(signalFiltered), d=1/self.fs)
-            fftMagnitude = np.abs(fftResult)
-            
-            centroid = np.sum(fftFreq * fftMagnitude) / np.sum(fftMagnitude)
+            signalFiltered = signal if isFiltered else self.applyFilters(signal)
+            samples = signalFiltered.shape[-1]
             
-            bands = [(0, 5), (5, 10), (10, 20), (20, 50), (50, 100)]
-            bandEnergy = {}
+            if streamId is not None:
+                rolling = self.getFeatures(streamId)
+                rms, mean, std = rolling["diff_rms"], rolling["diff_mean"], rolling["diff_std"]
+            else:
+                differences = np.diff(signalFiltered, axis=-1)
+                rms = channelValue(np.sqrt(np.mean(np.square(differences), axis=-1)))
+                mean = channelValue(np.mean(differences, axis=-1))
+                std = channelValue(np.std(differences, axis=-1))
             
-            for fmin, fmax in bands:
-                idx = np.where((fftFreq >= fmin) & (fftFreq < fmax))
-                energy = np.sum(fftMagnitude[idx])
-                bandEnergy[f"{fmin}-{fmax}Hz"] = energy
+            frame = self.getStream(streamId).stft.latest() if streamId is not None else None
+            if frame is not None:
+                centroid, bandEnergy = frame["spectral_centroid"], frame["band_energy"]
+            else:
+                fftMagnitude = np.abs(np.fft.rfft(signalFiltered, axis=-1))
+                fftFreq = np.fft.rfftfreq(samples, d=1/self.fs)
+                centroid = channelValue((fftMagnitude @ fftFreq) / np.sum(fftMagnitude, axis=-1))
+                
+                bands = Settings.SPECTRAL_BANDS
+                slices = bandSlices(samples, self.fs, bands)
+                bandEnergy = {
+                    bandName(fmin, fmax): channelValue(np.sum(fftMagnitude[..., band], axis=-1))
+                    for (fmin, fmax), band in zip(bands, slices)
+                }
             
-            return {
+            features = {
                 "rms": rms,
                 "mean": mean,
                 "std": std,
                 "spectral_centroid": centroid,
                 "band_energy": bandEnergy
             }
+            if streamId is not None:
+                features["band_power"] = self.getBandPower(streamId)
+            return features
         except Exception as e:
             print(f"Error calculando features: {e}")
             return None
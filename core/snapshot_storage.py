@@ -0,0 +1,83 @@
+"""
+Historial ancho de sensores: una fila por tick de adquisición
+Todos los sensores van en la misma serie columnar, así un tick es una
+sola escritura y un reporte de varios sensores una sola lectura
+"""
+import json
+import os
+import numpy as np
+from typing import Dict, List, Sequence, Tuple
+from core.partitioned_storage import PartitionedSeries
+
+
+class SnapshotSeries(PartitionedSeries):
+    """
+    Serie particionada por día como la de un sensor, con una columna de
+    valores por sensor en cada fila (NaN = sin dato en ese tick):
+        columnas.json      nombres de los sensores, en el orden de las columnas
+        manifest.json      particiones (ver PartitionedSeries)
+        2026-10-18/        seg_NNNNNN.ts (int64) y .val (float32, filas x sensores)
+    
+    Las columnas se fijan al crear la serie; una carpeta existente conserva
+    las suyas aunque cambie la lista configurada.
+    """
+    
+    COLUMNS_FILE = "columnas.json"
+    
+    def __init__(self, directory: str, columns: Sequence[str], segmentRows: int = 65536):
+        self.columns = self._loadColumns(directory, list(columns))
+        super().__init__(directory, segmentRows, width=len(self.columns))
+    
+    @classmethod
+    def _loadColumns(cls, directory: str, columns: List[str]) -> List[str]:
+        path = os.path.join(directory, cls.COLUMNS_FILE)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return list(json.load(f))
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            print(f"Error leyendo columnas {path}: {e}")
+        
+        os.makedirs(directory, exist_ok=True)
+        temporary = path + ".tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump(columns, f)
+        os.replace(temporary, path)
+        return columns
+    
+    def row(self, values: dict) -> np.ndarray:
+        """Fila en el orden de las columnas desde {sensor: valor}; NaN si falta"""
+        return np.array([values.get(name, np.nan) for name in self.columns], dtype=np.float64)
+    
+    def readColumns(self, names: Sequence[str], start: int = None, end: int = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Marcas int64 y matriz float64 (filas, len(names)) con start <= marca
+        < end; un nombre que no es columna de la serie queda en NaN.
+        """
+        timestamps, values = self.read(start, end)
+        matrix = np.full((len(timestamps), len(names)), np.nan)
+        for i, name in enumerate(names):
+            if name in self.columns:
+                matrix[:, i] = values.reshape(len(timestamps), self.width)[:, self.columns.index(name)]
+        return timestamps, matrix
+    
+    def mergeInto(self, histories: Dict[str, Tuple[np.ndarray, np.ndarray]], start: int = None, end: int = None):
+        """
+        Añade a cada historial {sensor: (datetime64[s], valores)} las
+        lecturas de su columna con start <= marca < end, ordenadas por marca;
+        las columnas se leen juntas en una sola lectura
+        """
+        names = [name for name in histories if name in self.columns]
+        if not names:
+            return
+        
+        timestamps, matrix = self.readColumns(names, start, end)
+        stamps = timestamps.astype('datetime64[s]')
+        for i, name in enumerate(names):
+            keep = np.isfinite(matrix[:, i])
+            ownStamps, ownValues = histories[name]
+            mergedStamps = np.concatenate([ownStamps, stamps[keep]])
+            mergedValues = np.concatenate([ownValues, matrix[keep, i]])
+            order = np.argsort(mergedStamps, kind='stable')
+            histories[name] = (mergedStamps[order], mergedValues[order])
@@ -0,0 +1,180 @@
+"""
+Historial de sensores en SQLite (modo WAL)
+Una sola base para todas las plantas y sensores, con índice por
+(planta, sensor, marca) para consultas por rango y entre sensores
+"""
+import os
+import sqlite3
+import threading
+import numpy as np
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+class SqliteHistory:
+    """
+    Tabla lecturas(planta, sensor, ts, valor) con ts en segundos de hora
+    local, la misma base que las marcas del resto de formatos.
+    
+    Cada hilo usa su propia conexión. En modo WAL los lectores leen una
+    instantánea consistente sin bloquear al hilo escritor (el StorageWriter),
+    que inserta cada lote con executemany en una sola transacción.
+    
+    synchronous=NORMAL deja la durabilidad a los checkpoints de WAL; un
+    lote con fsync=True se confirma con synchronous=FULL.
+    """
+    
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS lecturas ("
+        " planta TEXT NOT NULL,"
+        " sensor TEXT NOT NULL,"
+        " ts INTEGER NOT NULL,"
+        " valor REAL NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS idx_lecturas ON lecturas (planta, sensor, ts)"
+    )
+    
+    def __init__(self, path: str, plant: str = ""):
+        self.path = path
+        self.plant = plant
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connectionsLock = threading.Lock()
+        
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = self._connection()
+        with connection:
+            for statement in self.SCHEMA:
+                connection.execute(statement)
+    
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            with self._connectionsLock:
+                self._connections.append(connection)
+        return connection
+    
+    def append(self, sensorName: str, timestamps: np.ndarray, values: np.ndarray, fsync: bool = False):
+        timestamps = np.atleast_1d(np.asarray(timestamps, dtype=np.int64))
+        values = np.atleast_1d(np.asarray(values, dtype=np.float64))
+        if timestamps.size != values.size:
+            raise ValueError("timestamps y values deben tener la misma longitud")
+        if timestamps.size == 0:
+            return
+        
+        rows = zip([self.plant] * len(timestamps), [sensorName] * len(timestamps), timestamps.tolist(), values.tolist())
+        connection = self._connection()
+        if fsync:
+            connection.execute("PRAGMA synchronous=FULL")
+        try:
+            with connection:
+                connection.executemany("INSERT INTO lecturas (planta, sensor, ts, valor) VALUES (?, ?, ?, ?)", rows)
+        finally:
+            if fsync:
+                connection.execute("PRAGMA synchronous=NORMAL")
+    
+    @staticmethod
+    def _rangeClause(start: Optional[int], end: Optional[int]) -> Tuple[str, list]:
+        clause = ""
+        params = []
+        if start is not None:
+            clause += " AND ts >= ?"
+            params.append(int(start))
+        if end is not None:
+            clause += " AND ts < ?"
+            params.append(int(end))
+        return clause, params
+    
+    def read(self, sensorName: str, start: Optional[int] = None, end: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Lecturas con start <= ts < end ordenadas por marca: (int64, float64)"""
+        clause, params = self._rangeClause(start, end)
+        rows = self._connection().execute(
+            "SELECT ts, valor FROM lecturas WHERE planta = ? AND sensor = ?" + clause + " ORDER BY ts",
+            [self.plant, sensorName] + params
+        ).fetchall()
+        if not rows:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+        data = np.array(rows, dtype=np.float64)
+        return data[:, 0].astype(np.int64), data[:, 1]
+    
+    def readMany(self, sensorNames: Sequence[str], start: Optional[int] = None, end: Optional[int] = None) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+        """Varias series en una sola consulta: {sensor: (marcas, valores)}"""
+        sensorNames = list(sensorNames)
+        result = {name: (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)) for name in sensorNames}
+        if not sensorNames:
+            return result
+        
+        clause, params = self._rangeClause(start, end)
+        marks = ", ".join("?" * len(sensorNames))
+        rows = self._connection().execute(
+            f"SELECT sensor, ts, valor FROM lecturas WHERE planta = ? AND sensor IN ({marks})" + clause
+            + " ORDER BY sensor, ts",
+            [self.plant] + sensorNames + params
+        ).fetchall()
+        if not rows:
+            return result
+        
+        sensors = np.array([row[0] for row in rows])
+        data = np.array([row[1:] for row in rows], dtype=np.float64)
+        for name in sensorNames:
+            mask = sensors == name
+            if mask.any():
+                result[name] = (data[mask, 0].astype(np.int64), data[mask, 1])
+        return result
+    
+    def exists(self, sensorName: str) -> bool:
+        row = self._connection().execute(
+            "SELECT 1 FROM lecturas WHERE planta = ? AND sensor = ? LIMIT 1",
+            (self.plant, sensorName)
+        ).fetchone()
+        return row is not None
+    
+    def firstTimestamp(self, sensorName: str) -> Optional[int]:
+        """Marca más antigua del sensor (None si no tiene lecturas)"""
+        return self.firstTimestamps([sensorName]).get(sensorName)
+    
+    def firstTimestamps(self, sensorNames: Sequence[str]) -> Dict[str, int]:
+        """Marca más antigua de cada sensor con lecturas, en una sola consulta"""
+        sensorNames = list(sensorNames)
+        if not sensorNames:
+            return {}
+        marks = ", ".join("?" * len(sensorNames))
+        rows = self._connection().execute(
+            f"SELECT sensor, MIN(ts) FROM lecturas WHERE planta = ? AND sensor IN ({marks}) GROUP BY sensor",
+            [self.plant] + sensorNames
+        ).fetchall()
+        return {sensor: first for sensor, first in rows}
+    
+    def count(self, sensorName: str) -> int:
+        return self._connection().execute(
+            "SELECT COUNT(*) FROM lecturas WHERE planta = ? AND sensor = ?",
+            (self.plant, sensorName)
+        ).fetchone()[0]
+    
+    def deleteBefore(self, sensorName: str, cutoff: int) -> int:
+        connection = self._connection()
+        with connection:
+            cursor = connection.execute(
+                "DELETE FROM lecturas WHERE planta = ? AND sensor = ? AND ts < ?",
+                (self.plant, sensorName, int(cutoff))
+            )
+        return cursor.rowcount
+    
+    def clear(self, sensorName: str):
+        connection = self._connection()
+        with connection:
+            connection.execute("DELETE FROM lecturas WHERE planta = ? AND sensor = ?", (self.plant, sensorName))
+    
+    def close(self):
+        with self._connectionsLock:
+            for connection in self._connections:
+                try:
+                    connection.close()
+                except sqlite3.Error:
+                    pass
+            self._connections = []
+        self._local = threading.local()
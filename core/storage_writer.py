@@ -0,0 +1,216 @@
+"""
+Escritor en segundo plano para el historial de sensores
+Saca la E/S de disco del hilo de la GUI y agrupa las escrituras por sensor
+"""
+import queue
+import threading
+import time
+import numpy as np
+from collections import defaultdict
+from typing import Callable, Dict, List, Tuple
+from config.settings import Settings
+
+
+class StorageWriter:
+    """
+    Los productores llaman submit() (no bloquea) y un hilo acumula los
+    registros por sensor. Un lote se escribe cuando alcanza batchSize o
+    cuando su registro más antiguo cumple flushInterval segundos; así
+    cada archivo se abre una vez por lote y no una vez por lectura.
+    
+    sink(sensor, marcas int64, valores como texto, fsync) hace la escritura.
+    
+    Política de fsync:
+        siempre    tras cada lote
+        periodico  como mucho cada fsyncInterval segundos
+        nunca      se deja al sistema operativo
+    
+    Si la cola se llena, el registro se descarta y se cuenta en dropped
+    (no se bloquea al productor). Tras stop(), submit() escribe directo.
+    """
+    
+    FSYNC_POLICIES = ("siempre", "periodico", "nunca")
+    
+    def __init__(
+        self,
+        sink: Callable[[str, np.ndarray, List[str], bool], None],
+        maxQueue: int = None,
+        batchSize: int = None,
+        flushInterval: float = None,
+        fsyncPolicy: str = None,
+        fsyncInterval: float = None
+    ):
+        self.sink = sink
+        self.batchSize = batchSize or Settings.STORAGE_BATCH_SIZE
+        self.flushInterval = flushInterval if flushInterval is not None else Settings.STORAGE_FLUSH_INTERVAL
+        self.fsyncPolicy = fsyncPolicy or Settings.STORAGE_FSYNC_POLICY
+        if self.fsyncPolicy not in self.FSYNC_POLICIES:
+            self.fsyncPolicy = "periodico"
+        self.fsyncInterval = fsyncInterval if fsyncInterval is not None else Settings.STORAGE_FSYNC_INTERVAL
+        
+        self._queue = queue.Queue(maxsize=maxQueue or Settings.STORAGE_QUEUE_SIZE)
+        self._pending: Dict[str, List[Tuple[int, str]]] = defaultdict(list)
+        self._pendingSince: Dict[str, float] = {}
+        self._lastFsync: Dict[str, float] = {}
+        self._thread = None
+        self.isRunning = False
+        
+        self.written = 0
+        self.dropped = 0
+        self.flushes = 0
+        self.fsyncs = 0
+        self.errors = 0
+        self._lastFlushMs = 0.0
+        self._maxFlushMs = 0.0
+        self._totalFlushMs = 0.0
+        self._lastDropWarning = 0.0
+    
+    def start(self):
+        if self.isRunning:
+            return
+        self.isRunning = True
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+    
+    def stop(self, timeout: float = 5.0):
+        """Escribe todo lo pendiente y detiene el hilo"""
+        if not self.isRunning:
+            return
+        self.isRunning = False
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            print("[ERROR] Cola de escritura llena al detener el escritor")
+        if self._thread:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+    
+    def submit(self, sensorName: str, timestamp: int, value: str) -> bool:
+        if not self.isRunning:
+            # Escritor detenido (cierre de la aplicación): escritura directa
+            self.sink(sensorName, np.array([timestamp], dtype=np.int64), [value], False)
+            self.written += 1
+            return True
+        try:
+            self._queue.put_nowait((sensorName, timestamp, value))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            now = time.monotonic()
+            if now - self._lastDropWarning > 10:
+                self._lastDropWarning = now
+                print(f"[ERROR] Cola de escritura llena, {self.dropped} lecturas descartadas")
+            return False
+    
+    def flush(self, timeout: float = 5.0) -> bool:
+        """
+        Espera a que todo lo encolado hasta ahora esté escrito; False si no
+        termina en timeout segundos (contando la espera por sitio en la cola)
+        """
+        if not self.isRunning:
+            return True
+        deadline = time.monotonic() + timeout
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(max(0.0, deadline - time.monotonic()))
+    
+    def _loop(self):
+        while True:
+            try:
+                item = self._queue.get(timeout=self._nextDeadline())
+            except queue.Empty:
+                item = False
+            
+            if item is None:
+                self._drainQueue()
+                self._flushAll()
+                return
+            
+            if isinstance(item, threading.Event):
+                self._flushAll()
+                item.set()
+            elif item:
+                sensorName, timestamp, value = item
+                pending = self._pending[sensorName]
+                if not pending:
+                    self._pendingSince[sensorName] = time.monotonic()
+                pending.append((timestamp, value))
+                if len(pending) >= self.batchSize:
+                    self._flush(sensorName)
+            
+            now = time.monotonic()
+            for sensorName, since in list(self._pendingSince.items()):
+                if now - since >= self.flushInterval:
+                    self._flush(sensorName)
+    
+    def _drainQueue(self):
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if isinstance(item, threading.Event):
+                item.set()
+            elif item:
+                sensorName, timestamp, value = item
+                self._pending[sensorName].append((timestamp, value))
+    
+    def _nextDeadline(self) -> float:
+        if not self._pendingSince:
+            return self.flushInterval or 1.0
+        oldest = min(self._pendingSince.values())
+        return max(0.0, oldest + self.flushInterval - time.monotonic())
+    
+    def _flushAll(self):
+        for sensorName in list(self._pending):
+            self._flush(sensorName)
+    
+    def _flush(self, sensorName: str):
+        records = self._pending.pop(sensorName, None)
+        self._pendingSince.pop(sensorName, None)
+        if not records:
+            return
+        
+        now = time.monotonic()
+        fsync = self.fsyncPolicy == "siempre" or (
+            self.fsyncPolicy == "periodico"
+            and now - self._lastFsync.get(sensorName, 0.0) >= self.fsyncInterval
+        )
+        
+        timestamps = np.fromiter((r[0] for r in records), dtype=np.int64, count=len(records))
+        values = [r[1] for r in records]
+        
+        start = time.perf_counter()
+        try:
+            self.sink(sensorName, timestamps, values, fsync)
+        except Exception as e:
+            self.errors += 1
+            print(f"Error guardando sensor {sensorName}: {e}")
+            return
+        elapsedMs = (time.perf_counter() - start) * 1e3
+        
+        self.written += len(records)
+        self.flushes += 1
+        self._lastFlushMs = elapsedMs
+        self._maxFlushMs = max(self._maxFlushMs, elapsedMs)
+        self._totalFlushMs += elapsedMs
+        if fsync:
+            self.fsyncs += 1
+            self._lastFsync[sensorName] = now
+    
+    def getStats(self) -> dict:
+        return {
+            "queue_depth": self._queue.qsize(),
+            "pending": sum(len(p) for p in list(self._pending.values())),
+            "written": self.written,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "flushes": self.flushes,
+            "fsyncs": self.fsyncs,
+            "last_flush_ms": self._lastFlushMs,
+            "mean_flush_ms": self._totalFlushMs / self.flushes if self.flushes else 0.0,
+            "max_flush_ms": self._maxFlushMs
+        }
@@ -0,0 +1,203 @@
+"""
+Índices de tiempo dispersos para el historial de sensores
+Permiten que una consulta por rango salte directo al primer registro
+relevante en lugar de recorrer el historial desde el principio
+"""
+import os
+import struct
+import threading
+import numpy as np
+from typing import List, Optional
+
+
+class TextTimeIndex:
+    """
+    Índice de un historial de texto ("YYYY-mm-dd HH:MM:SS,valor"): una
+    entrada (inicio de la hora en segundos, desplazamiento en bytes) por
+    cada hora que aparece en el archivo, apuntando a su primera línea.
+    
+    Se guarda junto al historial como <archivo>.idx:
+        cabecera  8s magic, int64 bytes ya indexados
+        entradas  pares int64 (segundos, desplazamiento)
+    
+    refresh() solo recorre los bytes añadidos desde la última vez; si el
+    archivo se truncó o reemplazó, el índice se reconstruye.
+    Se asume que las marcas están en orden creciente.
+    """
+    
+    MAGIC = b'PSYTIDX1'
+    HEADER = struct.Struct('<8sq')
+    ENTRY_DTYPE = np.dtype('<i8')
+    BUCKET_CHARS = 13  # "YYYY-mm-dd HH"
+    
+    def __init__(self, filepath: str):
+        self.filepath = filepath
+        self.indexPath = filepath + ".idx"
+        self.lock = threading.Lock()
+        self.indexedBytes = 0
+        self._buckets = np.empty(0, dtype=np.int64)
+        self._offsets = np.empty(0, dtype=np.int64)
+        self._load()
+    
+    def _load(self):
+        try:
+            with open(self.indexPath, 'rb') as f:
+                header = f.read(self.HEADER.size)
+                magic, indexedBytes = self.HEADER.unpack(header)
+                if magic != self.MAGIC:
+                    return
+                pairs = np.frombuffer(f.read(), dtype=self.ENTRY_DTYPE)
+        except (OSError, struct.error):
+            return
+        
+        pairs = pairs[:len(pairs) // 2 * 2].reshape(-1, 2)
+        self._buckets = pairs[:, 0].copy()
+        self._offsets = pairs[:, 1].copy()
+        self.indexedBytes = indexedBytes
+    
+    def _reset(self):
+        self.indexedBytes = 0
+        self._buckets = np.empty(0, dtype=np.int64)
+        self._offsets = np.empty(0, dtype=np.int64)
+        with open(self.indexPath, 'wb') as f:
+            f.write(self.HEADER.pack(self.MAGIC, 0))
+    
+    def _isStale(self, size: int) -> bool:
+        if size < self.indexedBytes:
+            return True
+        if self.indexedBytes == 0:
+            return False
+        # El último byte indexado debe seguir siendo un fin de línea
+        with open(self.filepath, 'rb') as f:
+            f.seek(self.indexedBytes - 1)
+            return f.read(1) != b'\n'
+    
+    def refresh(self):
+        """Indexa las líneas completas añadidas al historial desde la última llamada"""
+        with self.lock:
+            if not os.path.exists(self.filepath):
+                if self.indexedBytes:
+                    self._reset()
+                return
+            
+            size = os.path.getsize(self.filepath)
+            if self._isStale(size) or not os.path.exists(self.indexPath):
+                self._reset()
+            if size == self.indexedBytes:
+                return
+            
+            with open(self.filepath, 'rb') as f:
+                f.seek(self.indexedBytes)
+                data = f.read(size - self.indexedBytes)
+            
+            end = data.rfind(b'\n')
+            if end < 0:
+                return
+            
+            lastBucket = self._buckets[-1] if len(self._buckets) else None
+            lastPrefix = None
+            newBuckets = []
+            newOffsets = []
+            position = 0
+            for line in data[:end + 1].splitlines(keepends=True):
+                prefix = line[:self.BUCKET_CHARS]
+                if prefix != lastPrefix:
+                    lastPrefix = prefix
+                    bucket = self._bucketSeconds(prefix)
+                    if bucket is not None and (lastBucket is None or bucket > lastBucket):
+                        newBuckets.append(bucket)
+                        newOffsets.append(self.indexedBytes + position)
+                        lastBucket = bucket
+                position += len(line)
+            
+            self.indexedBytes += end + 1
+            self._buckets = np.append(self._buckets, np.array(newBuckets, dtype=np.int64))
+            self._offsets = np.append(self._offsets, np.array(newOffsets, dtype=np.int64))
+            
+            with open(self.indexPath, 'r+b') as f:
+                f.write(self.HEADER.pack(self.MAGIC, self.indexedBytes))
+                f.seek(0, os.SEEK_END)
+                pairs = np.column_stack([newBuckets, newOffsets]).astype(self.ENTRY_DTYPE)
+                f.write(pairs.tobytes())
+    
+    def _bucketSeconds(self, prefix: bytes) -> Optional[int]:
+        if len(prefix) < self.BUCKET_CHARS or prefix[10:11] != b' ':
+            return None
+        try:
+            hour = np.datetime64(prefix[:10].decode('ascii') + 'T' + prefix[11:13].decode('ascii'), 'h')
+        except (ValueError, UnicodeDecodeError):
+            return None
+        return int(hour.astype('datetime64[s]').astype(np.int64))
+    
+    def seek(self, start: Optional[int]) -> int:
+        """Desplazamiento en bytes desde el que leer para obtener marcas >= start"""
+        self.refresh()
+        if start is None or not len(self._buckets):
+            return 0
+        i = int(np.searchsorted(self._buckets, start, side='right')) - 1
+        return int(self._offsets[i]) if i >= 0 else 0
+    
+    def clear(self):
+        with self.lock:
+            if os.path.exists(self.indexPath):
+                os.remove(self.indexPath)
+            self.indexedBytes = 0
+            self._buckets = np.empty(0, dtype=np.int64)
+            self._offsets = np.empty(0, dtype=np.int64)
+
+
+class SegmentIndex:
+    """
+    Índice de los segmentos llenos de una serie columnar: una fila int64
+    (número, primera marca, última marca, filas) por segmento, en
+    segmentos.idx dentro de la carpeta de la serie. Los segmentos llenos
+    ya no cambian, así que cada fila se escribe una sola vez.
+    """
+    
+    FILE_NAME = "segmentos.idx"
+    COLUMNS = 4
+    
+    def __init__(self, directory: str):
+        self.path = os.path.join(directory, self.FILE_NAME)
+        self._entries = np.empty((0, self.COLUMNS), dtype=np.int64)
+        self._load()
+    
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        raw = np.fromfile(self.path, dtype='<i8')
+        entries = raw[:len(raw) // self.COLUMNS * self.COLUMNS].reshape(-1, self.COLUMNS)
+        # Filas repetidas (p. ej. dos procesos registrando el mismo segmento)
+        _, unique = np.unique(entries[:, 0], return_index=True)
+        self._entries = entries[np.sort(unique)].astype(np.int64)
+    
+    def __contains__(self, number: int) -> bool:
+        return bool(np.any(self._entries[:, 0] == number))
+    
+    def add(self, number: int, first: int, last: int, rows: int):
+        if number in self:
+            return
+        entry = np.array([[number, first, last, rows]], dtype=np.int64)
+        self._entries = np.vstack([self._entries, entry])
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, 'ab') as f:
+            f.write(entry.astype('<i8').tobytes())
+    
+    def select(self, start: Optional[int], end: Optional[int]) -> List[int]:
+        """Números de los segmentos con marcas en [start, end)"""
+        entries = self._entries
+        mask = np.ones(len(entries), dtype=bool)
+        if start is not None:
+            mask &= entries[:, 2] >= start
+        if end is not None:
+            mask &= entries[:, 1] < end
+        return sorted(entries[mask, 0].tolist())
+    
+    @property
+    def rows(self) -> int:
+        return int(self._entries[:, 3].sum())
+    
+    def clear(self):
+        self._entries = np.empty((0, self.COLUMNS), dtype=np.int64)
+        if os.path.exists(self.path):
+            os.remove(self.path)
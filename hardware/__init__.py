@@ -1,4 +1,5 @@
 # Hardware Package
 from .serial_reader import SerialReader
+from .acquisition_manager import AcquisitionManager
 
-__all__ = ['SerialReader']
+__all__ = ['SerialReader', 'AcquisitionManager']
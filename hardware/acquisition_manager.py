@@ -0,0 +1,235 @@
+"""
+Gestor de adquisición multi-dispositivo
+Un solo hilo atiende N puertos (una planta por ESP32) con selectors,
+en lugar de un hilo bloqueante por puerto
+"""
+import os
+import selectors
+import threading
+import time
+from typing import Dict, Optional, Set
+from config.settings import Settings
+from config.config_manager import ConfigManager
+from core.sensor_manager import SensorManager
+from hardware.serial_reader import SerialReader
+from hardware.binary_protocol import BINARY_MODE_COMMAND
+
+
+class AcquisitionManager:
+    """
+    Mantiene un SerialReader en modo gestionado por dispositivo (buffer,
+    reloj de muestras, parser y SensorManager propios) y los alimenta
+    desde un único bucle de eventos. Los consumidores usan el mismo API
+    del lector: getDevice(id).drainBioValues(), readSince(), etc.
+    
+    Los transportes con fileno() se atienden con select(); los que no lo
+    admiten (o todos, en Windows) se sondean en cada vuelta del bucle.
+    """
+    
+    def __init__(self):
+        self.devices: Dict[str, SerialReader] = {}
+        self._status: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._selector = selectors.DefaultSelector()
+        # Windows no permite select() sobre puertos serie: se sondea in_waiting
+        self._usePolling = os.name == 'nt'
+        self._polled: Set[str] = set()
+        self._thread = None
+        self.isRunning = False
+        
+        self._nextHousekeeping = 0.0
+        
+        self.loopIterations = 0
+        self.loopCpuTime = 0.0
+    
+    def addDevice(self, deviceId: str, port: str, baudrate: int = None,
+                  protocol: str = None) -> SerialReader:
+        """port puede ser serial, tcp://host:puerto o udp://0.0.0.0:puerto"""
+        reader = SerialReader(
+            port=port,
+            baudrate=baudrate,
+            sensorManager=SensorManager(),
+            protocol=protocol,
+            useRealData=True,
+            managed=True
+        )
+        
+        with self._lock:
+            self.devices[deviceId] = reader
+            self._status[deviceId] = {
+                "port": port,
+                "status": "desconectado",
+                "bytes": 0,
+                "last_data": None,
+                "next_retry": 0.0,
+                "mode_request_at": None
+            }
+            if reader.isConnected():
+                self._register(deviceId, reader)
+        
+        return reader
+    
+    def addDevicesFromConfig(self):
+        """Registra los puertos definidos en configuracion.txt (puertos=id:puerto,...)"""
+        for deviceId, port in ConfigManager().get_acquisition_ports().items():
+            self.addDevice(deviceId, port)
+    
+    def removeDevice(self, deviceId: str):
+        with self._lock:
+            reader = self.devices.pop(deviceId, None)
+            self._status.pop(deviceId, None)
+            if reader is not None:
+                self._unregister(deviceId)
+                reader.disconnect()
+    
+    def getDevice(self, deviceId: str) -> Optional[SerialReader]:
+        return self.devices.get(deviceId)
+    
+    def getStatus(self) -> Dict[str, dict]:
+        """Estado de conexión y contadores por dispositivo"""
+        with self._lock:
+            result = {}
+            for deviceId, reader in self.devices.items():
+                status = dict(self._status[deviceId])
+                status.pop("next_retry", None)
+                status.pop("mode_request_at", None)
+                status["samples"] = reader.getWriteIndex()
+                status["dropped"] = reader.getDroppedSamples()
+                result[deviceId] = status
+            return result
+    
+    def start(self):
+        if self.isRunning:
+            return
+        self.isRunning = True
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        self.isRunning = False
+        if self._thread:
+            self._thread.join(timeout=2)
+            self._thread = None
+        
+        with self._lock:
+            for deviceId, reader in self.devices.items():
+                self._unregister(deviceId)
+                reader.disconnect()
+    
+    def _register(self, deviceId: str, reader: SerialReader):
+        """Marca el dispositivo como conectado y lo añade al selector o al sondeo (llamar con _lock)"""
+        status = self._status[deviceId]
+        status["status"] = "conectado"
+        if reader.protocol == "binario":
+            # El ESP32 se reinicia al abrir el puerto
+            status["mode_request_at"] = time.time() + (2 if reader.transport.resetsOnOpen else 0)
+        
+        if self._usePolling or not reader.transport.selectable:
+            self._polled.add(deviceId)
+            return
+        try:
+            fd = reader.transport.fileno()
+            try:
+                self._selector.register(fd, selectors.EVENT_READ, deviceId)
+            except KeyError:
+                # El SO reutilizó el número de un fd cerrado que seguía registrado
+                self._selector.unregister(fd)
+                self._selector.register(fd, selectors.EVENT_READ, deviceId)
+        except (ValueError, OSError, AttributeError):
+            self._polled.add(deviceId)
+    
+    def _unregister(self, deviceId: str):
+        """Quita el dispositivo del sondeo o del selector, esté o no abierto su transporte"""
+        self._polled.discard(deviceId)
+        for key in list(self._selector.get_map().values()):
+            if key.data == deviceId:
+                try:
+                    self._selector.unregister(key.fileobj)
+                except (KeyError, ValueError, OSError):
+                    pass
+    
+    def _loop(self):
+        cpuStart = time.thread_time()
+        
+        while self.isRunning:
+            try:
+                # Con dispositivos sondeados, select() espera solo un intervalo de sondeo
+                timeout = Settings.ACQUISITION_POLL_INTERVAL * (1 if self._polled else 10)
+                if self._selector.get_map():
+                    for key, _ in self._selector.select(timeout=timeout):
+                        self._readDevice(key.data)
+                else:
+                    time.sleep(timeout)
+                self._pollDevices()
+                
+                now = time.time()
+                if now >= self._nextHousekeeping:
+                    self._housekeeping(now)
+                    self._nextHousekeeping = now + Settings.ACQUISITION_HOUSEKEEPING_INTERVAL
+                self.loopIterations += 1
+                self.loopCpuTime = time.thread_time() - cpuStart
+            
+            except Exception as e:
+                print(f"[ERROR] en bucle de adquisición: {e}")
+                time.sleep(0.1)
+    
+    def _pollDevices(self):
+        with self._lock:
+            polled = list(self._polled)
+        for deviceId in polled:
+            reader = self.devices.get(deviceId)
+            if reader is not None and reader.isConnected():
+                self._readDevice(deviceId)
+    
+    def _readDevice(self, deviceId: str):
+        reader = self.devices.get(deviceId)
+        if reader is None:
+            return
+        
+        try:
+            chunk = reader.transport.read()
+        except Exception as e:
+            self._markDisconnected(deviceId, reader, e)
+            return
+        
+        if not chunk:
+            return
+        
+        now = time.time()
+        reader.ingestChunk(chunk, reader.transport.arrivalTime())
+        with self._lock:
+            status = self._status.get(deviceId)
+            if status is not None:
+                status["bytes"] += len(chunk)
+                status["last_data"] = now
+    
+    def _markDisconnected(self, deviceId: str, reader: SerialReader, error: Exception):
+        print(f"[ERROR] Dispositivo {deviceId} desconectado: {error}")
+        with self._lock:
+            self._unregister(deviceId)
+            reader.disconnect()
+            status = self._status.get(deviceId)
+            if status is not None:
+                status["status"] = "desconectado"
+                status["next_retry"] = time.time() + Settings.ACQUISITION_RECONNECT_INTERVAL
+    
+    def _housekeeping(self, now: float):
+        """Reconexiones pendientes y solicitud diferida de modo binario"""
+        with self._lock:
+            for deviceId, reader in self.devices.items():
+                status = self._status[deviceId]
+                
+                if status["status"] == "desconectado" and now >= status["next_retry"]:
+                    reader.start()
+                    if reader.isConnected():
+                        self._register(deviceId, reader)
+                    else:
+                        status["next_retry"] = now + Settings.ACQUISITION_RECONNECT_INTERVAL
+                
+                requestAt = status["mode_request_at"]
+                if requestAt is not None and now >= requestAt:
+                    status["mode_request_at"] = None
+                    try:
+                        reader.transport.write(BINARY_MODE_COMMAND)
+                    except Exception as e:
+                        print(f"[ERROR] No se pudo solicitar modo binario a {deviceId}: {e}")
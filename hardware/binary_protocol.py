@@ -0,0 +1,182 @@
+"""
+Protocolo binario por tramas para el enlace con el ESP32
+Alternativa compacta al protocolo de texto ("B:1.6952")
+
+Formato de trama (little-endian):
+    sync     2 bytes  0xA5 0x5A
+    flags    uint8    bit0: muestras float32 (si no, int16), bit1: bloque de sensores,
+                      bit2: varios canales
+    seq      uint32   número de secuencia de la primera muestra de la trama
+    count    uint16   número de muestras (por canal)
+    channels uint8 (solo con bit2)   canales por muestra
+    samples  count * channels * int16|float32   voltaje crudo (int16 en pasos de
+                      INT16_LSB_VOLTS), intercalado por muestra: m0c1 m0c2 ... m1c1 ...
+    sensores 4 * float32 (opcional)  T, H, L, S
+    crc      uint16   CRC-CCITT (0xFFFF) de flags..sensores
+"""
+import binascii
+import struct
+import numpy as np
+from typing import List, Optional, Tuple
+
+
+SYNC = b'\xa5\x5a'
+HEADER = struct.Struct('<BIH')
+CHANNEL_COUNT = struct.Struct('<B')
+SENSOR_BLOCK = struct.Struct('<4f')
+CRC = struct.Struct('<H')
+
+FLAG_FLOAT32 = 0x01
+FLAG_SENSORS = 0x02
+FLAG_CHANNELS = 0x04
+
+INT16_LSB_VOLTS = 1e-4
+MAX_SAMPLES_PER_FRAME = 1024
+SEQ_MODULO = 1 << 32
+
+# Comando que el firmware acepta para cambiar de protocolo
+BINARY_MODE_COMMAND = b'MODE:BIN\n'
+TEXT_MODE_COMMAND = b'MODE:TXT\n'
+
+
+def encodeFrame(seq: int, samples, sensors: Optional[Tuple[float, float, float, float]] = None,
+                useFloat32: bool = False) -> bytes:
+    """
+    Construye una trama; lo usan el emulador y las pruebas de robustez.
+    samples puede ser una matriz (canales x muestras) para una trama multicanal.
+    """
+    samples = np.asarray(samples, dtype=np.float64)
+    flags = 0
+    prefix = b''
+    
+    if samples.ndim == 2:
+        flags |= FLAG_CHANNELS
+        prefix = CHANNEL_COUNT.pack(samples.shape[0])
+    interleaved = samples.T.ravel()
+    
+    if useFloat32:
+        flags |= FLAG_FLOAT32
+        payload = interleaved.astype('<f4').tobytes()
+    else:
+        counts = np.clip(np.round(interleaved / INT16_LSB_VOLTS), -32768, 32767)
+        payload = counts.astype('<i2').tobytes()
+    
+    if sensors is not None:
+        flags |= FLAG_SENSORS
+        payload += SENSOR_BLOCK.pack(*sensors)
+    
+    body = HEADER.pack(flags, seq % SEQ_MODULO, samples.shape[-1]) + prefix + payload
+    return SYNC + body + CRC.pack(binascii.crc_hqx(body, 0xFFFF))
+
+
+class FrameDecoder:
+    """
+    Decodificador incremental de tramas. Busca la palabra de sincronía,
+    valida longitud y CRC, y resincroniza ante tramas truncadas o corruptas.
+    Los saltos en la secuencia se cuentan como muestras perdidas.
+    
+    Con channels > 1 devuelve matrices (canales x muestras): una trama de
+    un canal llena el canal 1 y los canales que una trama no trae quedan
+    en NaN. Con un canal, de una trama multicanal se toma el canal 1.
+    """
+    
+    def __init__(self, channels: int = 1):
+        self.channels = int(channels)
+        self._buffer = bytearray()
+        self._expectedSeq = None
+        self.validFrames = 0
+        self.crcErrors = 0
+        self.droppedSamples = 0
+        self.bytesSeen = 0
+    
+    def feed(self, chunk: bytes) -> Tuple[np.ndarray, List[Tuple[str, str, str, str]]]:
+        """
+        Devuelve (voltajes crudos float64, lista de lecturas (temp, hum, luz, suelo)),
+        con la misma forma que LineParser.feed (matriz canales x muestras con
+        varios canales).
+        """
+        self._buffer += chunk
+        self.bytesSeen += len(chunk)
+        blocks = []
+        sensors = []
+        
+        while True:
+            start = self._buffer.find(SYNC)
+            if start < 0:
+                # Conserva un posible primer byte de sync al final
+                del self._buffer[:max(0, len(self._buffer) - 1)]
+                break
+            if start > 0:
+                del self._buffer[:start]
+            
+            if len(self._buffer) < 2 + HEADER.size:
+                break
+            
+            flags, seq, count = HEADER.unpack_from(self._buffer, 2)
+            prefixSize = CHANNEL_COUNT.size if flags & FLAG_CHANNELS else 0
+            if len(self._buffer) < 2 + HEADER.size + prefixSize:
+                break
+            frameChannels = self._buffer[2 + HEADER.size] if prefixSize else 1
+            if (count * frameChannels > MAX_SAMPLES_PER_FRAME or not 1 <= frameChannels <= 8
+                    or flags & ~(FLAG_FLOAT32 | FLAG_SENSORS | FLAG_CHANNELS)):
+                del self._buffer[:1]
+                continue
+            
+            sampleSize = 4 if flags & FLAG_FLOAT32 else 2
+            sensorSize = SENSOR_BLOCK.size if flags & FLAG_SENSORS else 0
+            samplesStart = HEADER.size + prefixSize
+            bodyEnd = 2 + samplesStart + count * frameChannels * sampleSize + sensorSize
+            frameEnd = bodyEnd + CRC.size
+            
+            if len(self._buffer) < frameEnd:
+                break
+            
+            body = bytes(self._buffer[2:bodyEnd])
+            (crc,) = CRC.unpack_from(self._buffer, bodyEnd)
+            if binascii.crc_hqx(body, 0xFFFF) != crc:
+                self.crcErrors += 1
+                del self._buffer[:1]
+                continue
+            
+            del self._buffer[:frameEnd]
+            self.validFrames += 1
+            self._trackSequence(seq, count)
+            
+            total = count * frameChannels
+            samplesEnd = samplesStart + total * sampleSize
+            if flags & FLAG_FLOAT32:
+                values = np.frombuffer(body, dtype='<f4', count=total, offset=samplesStart).astype(np.float64)
+            else:
+                values = np.frombuffer(body, dtype='<i2', count=total, offset=samplesStart) * INT16_LSB_VOLTS
+            blocks.append(self._channelBlock(values.reshape(count, frameChannels).T))
+            
+            if sensorSize:
+                reading = SENSOR_BLOCK.unpack_from(body, samplesEnd)
+                sensors.append(tuple(f"{v:g}" for v in reading))
+        
+        if not blocks:
+            return np.empty(0 if self.channels == 1 else (self.channels, 0), dtype=np.float64), sensors
+        return (blocks[0] if len(blocks) == 1 else np.concatenate(blocks, axis=-1)), sensors
+    
+    def _channelBlock(self, values: np.ndarray) -> np.ndarray:
+        """Matriz (canales de la trama x muestras) llevada a los canales del decodificador"""
+        if self.channels == 1:
+            return values[0]
+        if values.shape[0] == self.channels:
+            return values
+        block = np.full((self.channels, values.shape[1]), np.nan)
+        kept = min(self.channels, values.shape[0])
+        block[:kept] = values[:kept]
+        return block
+    
+    def _trackSequence(self, seq: int, count: int):
+        if self._expectedSeq is not None:
+            gap = (seq - self._expectedSeq) % SEQ_MODULO
+            # Un salto "negativo" indica reinicio del dispositivo, no pérdida
+            if gap < SEQ_MODULO // 2:
+                self.droppedSamples += gap
+        self._expectedSeq = (seq + count) % SEQ_MODULO
+    
+    def reset(self):
+        self._buffer.clear()
+        self._expectedSeq = None
@@ -0,0 +1,96 @@
+"""
+Captura de bytes crudos de adquisición para reproducir sesiones
+Guarda cada bloque recibido con su instante de llegada en un archivo
+binario de solo anexado, que ReplayTransport vuelve a entregar al parser
+
+Formato (little-endian):
+    cabecera  8s magic "PSYNCAP1", uint8 protocolo (0 texto, 1 binario), float64 creación
+    registro  float64 llegada (epoch), uint32 longitud, bytes
+"""
+import os
+import struct
+import time
+from typing import Iterator, Tuple
+
+
+MAGIC = b'PSYNCAP1'
+FILE_HEADER = struct.Struct('<8sBd')
+RECORD_HEADER = struct.Struct('<dI')
+
+PROTOCOL_CODES = {"texto": 0, "binario": 1}
+PROTOCOL_NAMES = {code: name for name, code in PROTOCOL_CODES.items()}
+
+
+class CaptureWriter:
+    """
+    Anexa bloques crudos a un archivo de captura. Si el archivo ya existe
+    se continúa al final; el búfer se vacía a disco cada FLUSH_INTERVAL
+    para no perder más de ese tramo ante un cierre inesperado.
+    """
+    
+    FLUSH_INTERVAL = 1.0  # s
+    
+    def __init__(self, path: str, protocol: str = "texto"):
+        self.path = path
+        self.bytesWritten = 0
+        self.records = 0
+        
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        isNew = not os.path.exists(path) or os.path.getsize(path) == 0
+        if not isNew:
+            with open(path, 'rb') as f:
+                if f.read(len(MAGIC)) != MAGIC:
+                    raise ValueError(f"{path} no es un archivo de captura")
+        
+        self._file = open(path, 'ab')
+        if isNew:
+            self._file.write(FILE_HEADER.pack(MAGIC, PROTOCOL_CODES.get(protocol, 0), time.time()))
+        self._lastFlush = time.monotonic()
+    
+    def write(self, chunk: bytes, arrivalTime: float):
+        if self._file is None:
+            return
+        self._file.write(RECORD_HEADER.pack(arrivalTime, len(chunk)))
+        self._file.write(chunk)
+        self.bytesWritten += len(chunk)
+        self.records += 1
+        
+        now = time.monotonic()
+        if now - self._lastFlush >= self.FLUSH_INTERVAL:
+            self._file.flush()
+            self._lastFlush = now
+    
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class CaptureReader:
+    """Recorre los registros de una captura; ignora un último registro truncado"""
+    
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            header = f.read(FILE_HEADER.size)
+        if len(header) < FILE_HEADER.size or header[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} no es un archivo de captura")
+        
+        _, protocolCode, self.createdAt = FILE_HEADER.unpack(header)
+        self.protocol = PROTOCOL_NAMES.get(protocolCode, "texto")
+    
+    def __iter__(self) -> Iterator[Tuple[float, bytes]]:
+        with open(self.path, 'rb') as f:
+            f.seek(FILE_HEADER.size)
+            while True:
+                header = f.read(RECORD_HEADER.size)
+                if len(header) < RECORD_HEADER.size:
+                    return
+                arrivalTime, length = RECORD_HEADER.unpack(header)
+                chunk = f.read(length)
+                if len(chunk) < length:
+                    return
+                yield arrivalTime, chunk
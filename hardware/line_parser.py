@@ -0,0 +1,88 @@
+"""
+Parser por bloques del protocolo de texto del ESP32
+Procesa todas las líneas completas de un bloque de bytes en una sola pasada
+"""
+import re
+import numpy as np
+from typing import List, Tuple
+
+
+class LineParser:
+    """
+    Convierte bloques de bytes crudos en muestras bioeléctricas y lecturas
+    de sensores. Las líneas incompletas al final de un bloque se conservan
+    y se completan con el siguiente.
+    
+    Líneas reconocidas:
+        B:<voltaje crudo>
+        B1:<v1>,B2:<v2>,...,B8:<v8>   (varios electrodos; B: equivale a B1:)
+        T:<temp>,H:<humedad>,L:<luz>,S:<suelo>
+    
+    Con channels > 1 cada muestra es un grupo B1..Bn en orden creciente de
+    canal (en una línea o en líneas seguidas): un canal menor o igual al
+    anterior empieza la muestra siguiente. Un canal ausente queda en NaN y
+    los mayores que channels se ignoran.
+    """
+    
+    BIO_PATTERN = re.compile(rb'^\s*B:([-+]?\d*\.\d+|\d+)', re.MULTILINE)
+    CHANNEL_PATTERN = re.compile(rb'(?:^|[,;\s])B([1-8]?):([-+]?\d*\.\d+|\d+)', re.MULTILINE)
+    SENSOR_PATTERN = re.compile(rb'T:([^,\r\n]+),H:([^,\r\n]+),L:([^,\r\n]+),S:([^,\r\n]+)')
+    MAX_PENDING_BYTES = 4096
+    
+    def __init__(self, channels: int = 1):
+        self.channels = int(channels)
+        self._pending = b''
+    
+    def feed(self, chunk: bytes) -> Tuple[np.ndarray, List[Tuple[str, str, str, str]]]:
+        """
+        Devuelve (voltajes crudos como arreglo float64, lista de lecturas
+        (temp, hum, luz, suelo)) para las líneas completas disponibles. Con
+        varios canales los voltajes son una matriz (canales x muestras).
+        """
+        data = self._pending + chunk
+        end = data.rfind(b'\n')
+        
+        if end < 0:
+            # Sin fin de línea: se descarta basura si crece sin control
+            self._pending = data[-self.MAX_PENDING_BYTES:]
+            return self._empty(), []
+        
+        complete = data[:end]
+        self._pending = data[end + 1:]
+        
+        if self.channels == 1:
+            bioValues = self.BIO_PATTERN.findall(complete)
+            values = np.array(bioValues, dtype=np.float64) if bioValues else self._empty()
+        else:
+            values = self._parseChannels(complete)
+        
+        sensors = [
+            tuple(g.strip().decode('utf-8', errors='ignore') for g in groups)
+            for groups in self.SENSOR_PATTERN.findall(complete)
+        ]
+        
+        return values, sensors
+    
+    def _empty(self) -> np.ndarray:
+        return np.empty(0 if self.channels == 1 else (self.channels, 0), dtype=np.float64)
+    
+    def _parseChannels(self, complete: bytes) -> np.ndarray:
+        tokens = self.CHANNEL_PATTERN.findall(complete)
+        if not tokens:
+            return self._empty()
+        
+        names, numbers = zip(*tokens)
+        channels = np.array([int(name or 1) for name in names]) - 1
+        values = np.array(numbers, dtype=np.float64)
+        wanted = channels < self.channels
+        channels, values = channels[wanted], values[wanted]
+        if channels.size == 0:
+            return self._empty()
+        
+        samples = np.cumsum(np.r_[True, channels[1:] <= channels[:-1]]) - 1
+        matrix = np.full((self.channels, samples[-1] + 1), np.nan)
+        matrix[channels, samples] = values
+        return matrix
+    
+    def reset(self):
+        self._pending = b''
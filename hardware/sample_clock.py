@@ -0,0 +1,129 @@
+"""
+Reloj de muestras para estampar tiempos en una rejilla uniforme
+Deriva los tiempos del contador de muestras y la frecuencia nominal,
+reanclando periódicamente al reloj de pared con estimación de deriva
+"""
+import numpy as np
+from collections import deque
+
+
+class SampleClock:
+    """
+    t(k) = anchorTime + (k - anchorIndex) / rate
+    
+    La llegada de un bloque siempre es posterior al instante real de su
+    última muestra (latencia USB / SO). En cada intervalo se guarda el
+    bloque con menor retraso, que es la mejor estimación del instante
+    real; la pendiente entre dos de esos puntos consecutivos estima la
+    frecuencia efectiva (fs) del oscilador del ESP32.
+    
+    Al reanclar, si la rejilla va atrasada se salta hacia adelante; si va
+    adelantada no se retrocede (los tiempos deben ser crecientes) y el
+    error se absorbe durante el siguiente intervalo ajustando rate.
+    """
+    
+    MAX_DRIFT = 0.05  # Desviación máxima aceptada respecto a la frecuencia nominal
+    DRIFT_SMOOTHING = 0.2
+    
+    def __init__(self, nominalFs: float, reanchorInterval: float = 10.0, historySize: int = 256):
+        self.nominalFs = float(nominalFs)
+        self.fs = float(nominalFs)
+        self._rate = float(nominalFs)
+        self.reanchorInterval = reanchorInterval
+        self.sampleCount = 0
+        
+        self._anchorIndex = 0
+        self._anchorTime = None
+        self._lastAnchorArrival = None
+        self._bestPoint = None      # (índice, llegada, retraso) del intervalo actual
+        self._previousPoint = None  # Mejor punto del intervalo anterior
+        self._lastTime = None
+        
+        self.blockStats = deque(maxlen=historySize)
+    
+    def stamp(self, n: int, arrivalTime: float, skipped: int = 0) -> np.ndarray:
+        """
+        Tiempos de un bloque de n muestras que terminó de llegar en arrivalTime.
+        skipped indica muestras perdidas antes del bloque (saltos de secuencia).
+        """
+        if self._anchorTime is None:
+            self._anchorTime = arrivalTime - (n - 1) / self._rate
+            self._anchorIndex = 0
+            self._lastAnchorArrival = arrivalTime
+        
+        self.sampleCount += skipped
+        indices = self.sampleCount + np.arange(n)
+        times = self._anchorTime + (indices - self._anchorIndex) / self._rate
+        self.sampleCount += n
+        
+        lastIndex = self.sampleCount - 1
+        lateness = arrivalTime - times[-1]
+        self.blockStats.append((lastIndex, n, lateness))
+        
+        if self._bestPoint is None or lateness < self._bestPoint[2]:
+            self._bestPoint = (lastIndex, arrivalTime, lateness)
+        
+        self._lastTime = times[-1]
+        if arrivalTime - self._lastAnchorArrival >= self.reanchorInterval:
+            self._reanchor(arrivalTime)
+        
+        return times
+    
+    def _reanchor(self, arrivalTime: float):
+        index, arrival, _ = self._bestPoint
+        
+        if self._previousPoint is not None:
+            prevIndex, prevArrival = self._previousPoint
+            elapsed = arrival - prevArrival
+            if elapsed > 0:
+                measured = (index - prevIndex) / elapsed
+                estimate = self.fs + self.DRIFT_SMOOTHING * (measured - self.fs)
+                limit = self.nominalFs * self.MAX_DRIFT
+                self.fs = min(max(estimate, self.nominalFs - limit), self.nominalFs + limit)
+        
+        error = float(self.timeOf(index)) - arrival
+        if error <= 0:
+            # Rejilla atrasada: saltar al punto de menor retraso conserva el orden
+            self._anchorIndex = index
+            self._anchorTime = arrival
+            self._rate = self.fs
+        else:
+            # Rejilla adelantada: se frena el reloj para absorber el error
+            correction = min(error / self.reanchorInterval, 0.5)
+            self._anchorIndex = self.sampleCount - 1
+            self._anchorTime = self._lastTime
+            self._rate = self.fs / (1.0 - correction)
+        
+        self._previousPoint = (index, arrival)
+        self._bestPoint = None
+        self._lastAnchorArrival = arrivalTime
+    
+    def timeOf(self, index) -> np.ndarray:
+        """Tiempo en la rejilla uniforme de uno o varios índices de muestra"""
+        if self._anchorTime is None:
+            return np.full(np.shape(index), np.nan)
+        return self._anchorTime + (np.asarray(index) - self._anchorIndex) / self._rate
+    
+    @property
+    def driftPpm(self) -> float:
+        return (self.fs / self.nominalFs - 1.0) * 1e6
+    
+    def getJitterStats(self) -> dict:
+        """Estadísticas de retraso de llegada de los últimos bloques"""
+        if not self.blockStats:
+            return {}
+        
+        stats = np.array(self.blockStats, dtype=np.float64)
+        lateness = stats[:, 2]
+        return {
+            "blocks": len(stats),
+            "mean_block_size": float(np.mean(stats[:, 1])),
+            "mean_lateness": float(np.mean(lateness)),
+            "std_lateness": float(np.std(lateness)),
+            "max_lateness": float(np.max(lateness)),
+            "effective_fs": self.fs,
+            "drift_ppm": self.driftPpm
+        }
+    
+    def reset(self):
+        self.__init__(self.nominalFs, self.reanchorInterval, self.blockStats.maxlen)
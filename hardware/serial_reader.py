@@ -2,15 +2,22 @@
 Lector de puerto serial para comunicación con ESP32
 Maneja la adquisición de datos del hardware o simulación
 """
-import serial
+import os
+import re
 import threading
 import time
-import re
-from collections import deque
+import numpy as np
 from config.settings import Settings
 from config.simulation_config import SimulationConfig
+from config.config_manager import ConfigManager
 from core.signal_processor import SignalProcessor
 from core.sensor_manager import SensorManager
+from core.ring_buffer import SampleRingBuffer
+from hardware.line_parser import LineParser
+from hardware.binary_protocol import FrameDecoder, BINARY_MODE_COMMAND
+from hardware.sample_clock import SampleClock
+from hardware.transports import Transport, ReplayTransport, createTransport
+from hardware.capture import CaptureWriter
 
 
 class SerialReader:
@@ -19,25 +26,68 @@ class SerialReader:
         self,
         port: str = None,
         baudrate: int = None,
-        sensorManager: SensorManager = None
+        sensorManager: SensorManager = None,
+        protocol: str = None,
+        useRealData: bool = None,
+        managed: bool = False,
+        transport: Transport = None,
+        capturePath: str = None,
+        channels: int = None
     ):
+        """
+        port admite un puerto serial (COM7, /dev/ttyUSB0) o una dirección de
+        red (tcp://host:puerto, udp://0.0.0.0:puerto); también se puede pasar
+        un Transport ya construido (p. ej. replay://sesion.cap para reproducir
+        una captura).
+        
+        capturePath guarda cada bloque crudo recibido en un archivo de captura;
+        si no se indica, se usa la carpeta "captura" de configuracion.txt.
+        
+        managed=True abre el puerto en modo no bloqueante y no crea hilo de
+        lectura: un AcquisitionManager entrega los bytes con ingestChunk().
+        
+        channels > 1 (por defecto "canales" de configuracion.txt) lee varios
+        electrodos (B1..Bn): el buffer y todas las lecturas devuelven matrices
+        (canales x muestras) con una marca de tiempo por muestra.
+        """
         self.port = port or Settings.DEFAULT_PORT
         self.baudrate = baudrate or Settings.DEFAULT_BAUDRATE
         self.sensorManager = sensorManager or SensorManager()
         self.signalProcessor = SignalProcessor()
         self.simulationConfig = SimulationConfig()
-        self.usarDatosReales = self.simulationConfig.debeUsarDatosReales()
+        self.usarDatosReales = (
+            self.simulationConfig.debeUsarDatosReales() if useRealData is None else useRealData
+        )
+        self.managed = managed
+        self.channels = channels or ConfigManager().get_bio_channels()
         
-        self.bioBuffer = deque(maxlen=Settings.BUFFER_MAX_SIZE)
-        self.bufferLock = threading.Lock()
+        self.bioBuffer = SampleRingBuffer(Settings.BUFFER_MAX_SIZE, self.channels)
+        self._lastValues = np.full(self.channels, np.nan)  # Último valor por canal, para huecos
+        self.bufferLock = self.bioBuffer.lock
+        self._nextReadSeq = 0
+        self._lostSamples = 0  # Muestras sobrescritas antes de ser leídas
         
-        self.serialConnection = None
+        self.transport = transport or createTransport(
+            self.port,
+            self.baudrate,
+            timeout=0 if managed else Settings.SERIAL_TIMEOUT
+        )
         self.readerThread = None
         self.isRunning = False
         self.startTime = time.time()
+        self.sampleClock = SampleClock(Settings.SAMPLING_FREQUENCY, Settings.CLOCK_REANCHOR_INTERVAL)
+        self.useSampleClock = Settings.TIMESTAMP_MODE == "reloj_muestras"
+        
+        # Una captura reproducida conserva el protocolo con el que se grabó
+        self.protocol = (
+            protocol or getattr(self.transport, "protocol", None) or ConfigManager().get_serial_protocol()
+        )
+        self.lineParser = LineParser(self.channels)
+        self.frameDecoder = FrameDecoder(self.channels)
+        self.parser = self.frameDecoder if self.protocol == "binario" else self.lineParser
         
-        self.bioPattern = re.compile(r'B:([-+]?\d*\.\d+|\d+)')
-        self.sensorPattern = re.compile(r'T:([^,]+),H:([^,]+),L:([^,]+),S:([^,]+)')
+        self.capturePath = capturePath
+        self.capture = None
         
         self._connect()
     
@@ -45,83 +95,174 @@ class SerialReader:
         if not self.usarDatosReales:
             print("Modo SIMULACIÓN activado - Generando datos aleatorios")
             print(f"   Revisa {Settings.SIMULATION_FILE} para configurar rangos")
-            self.serialConnection = None
             self.isRunning = True
             self.readerThread = threading.Thread(target=self._simulationLoop, daemon=True)
             self.readerThread.start()
             return
         
         try:
-            self.serialConnection = serial.Serial(
-                self.port,
-                self.baudrate,
-                timeout=Settings.SERIAL_TIMEOUT
-            )
-            print(f"Puerto serial {self.port} abierto correctamente")
+            self.transport.open()
+            print(f"Conexión {self.transport} abierta correctamente")
+            self._openCapture()
             self.isRunning = True
-            self.readerThread = threading.Thread(target=self._serialLoop, daemon=True)
-            self.readerThread.start()
-        except serial.SerialException as e:
-            print(f"[ERROR] No se pudo abrir el puerto serial: {e}")
+            if not self.managed:
+                self.readerThread = threading.Thread(target=self._serialLoop, daemon=True)
+                self.readerThread.start()
+        except (OSError, ValueError) as e:
+            # SerialException y los errores de socket derivan de OSError
+            print(f"[ERROR] No se pudo abrir {self.transport}: {e}")
             print("   Revisa configuracion.txt o activa modo simulación en simulacion.txt")
-            self.serialConnection = None
+            self.transport.close()
+    
+    def _openCapture(self):
+        path = self.capturePath
+        if path is None:
+            directory = ConfigManager().get_capture_dir()
+            # Reproducir una captura no genera otra salvo que se pida explícitamente
+            if not directory or isinstance(self.transport, ReplayTransport):
+                return
+            name = re.sub(r'[^\w.-]+', '_', str(self.transport)).strip('_')
+            path = os.path.join(directory, f"captura_{name}_{time.strftime('%Y%m%d_%H%M%S')}.cap")
+        
+        try:
+            self.capture = CaptureWriter(path, self.protocol)
+            print(f"Capturando datos crudos en {path}")
+        except (OSError, ValueError) as e:
+            print(f"[ERROR] No se pudo crear la captura: {e}")
     
     def _serialLoop(self):
-        time.sleep(2)
+        # El ESP32 se reinicia al abrir el puerto; el modo se pide ya arrancado
+        if self.transport.resetsOnOpen:
+            time.sleep(2)
+        
+        if self.protocol == "binario" and self.transport.isOpen:
+            self._requestBinaryMode()
         
         while self.isRunning:
             try:
-                if self.serialConnection is None:
+                if not self.transport.isOpen:
                     time.sleep(1)
+                    self._reopen()
                     continue
                 
-                line = self.serialConnection.readline().decode('utf-8', errors='ignore').strip()
+                # Lee todo lo disponible de una vez (bloquea hasta el timeout por el primer byte)
+                chunk = self.transport.read()
                 
-                if not line:
+                if not chunk:
                     continue
                 
-                bioMatch = self.bioPattern.match(line)
-                if bioMatch:
-                    self._processBioSignal(float(bioMatch.group(1)), isSimulated=False)
-                    continue
-                
-                sensorMatch = self.sensorPattern.search(line)
-                if sensorMatch:
-                    temp, hum, light, soil = sensorMatch.groups()
-                    self.sensorManager.updateAllSensors(temp, hum, light, soil)
-                    continue
-                    
+                self.ingestChunk(chunk, self.transport.arrivalTime())
+            
+            except OSError as e:
+                # Conexión perdida: se cierra y la vuelta siguiente la reabre
+                print(f"[ERROR] Conexión {self.transport} perdida: {e}")
+                self.transport.close()
             except Exception as e:
                 print(f"[ERROR] al procesar línea serial: {e}")
+                time.sleep(0.1)
+    
+    def _reopen(self):
+        """Reintento de conexión tras una caída (p. ej. el ESP32 cerró el socket)"""
+        try:
+            self.transport.open()
+            print(f"Conexión {self.transport} restablecida")
+        except (OSError, ValueError):
+            self.transport.close()
+    
+    def _requestBinaryMode(self):
+        try:
+            self.transport.write(BINARY_MODE_COMMAND)
+        except OSError as e:
+            print(f"[ERROR] No se pudo solicitar modo binario: {e}")
+    
+    def _binaryNotDetected(self) -> bool:
+        decoder = self.frameDecoder
+        return decoder.validFrames == 0 and decoder.bytesSeen >= Settings.PROTOCOL_DETECTION_BYTES
+    
+    def ingestChunk(self, chunk: bytes, arrivalTime: float):
+        if self.capture is not None:
+            self.capture.write(chunk, arrivalTime)
+        
+        if self.parser is self.frameDecoder and self._binaryNotDetected():
+            # Firmware sin soporte binario: se vuelve al protocolo de texto
+            print("No se detectaron tramas binarias, usando protocolo de texto")
+            self.parser = self.lineParser
+        
+        droppedBefore = self.frameDecoder.droppedSamples
+        rawValues, sensorReadings = self.parser.feed(chunk)
+        skipped = self.frameDecoder.droppedSamples - droppedBefore
+        
+        if rawValues.shape[-1]:
+            self._processBioBlock(rawValues, arrivalTime, skipped)
+        
+        for temp, hum, light, soil in sensorReadings:
+            self.sensorManager.updateAllSensors(temp, hum, light, soil)
     
     def _simulationLoop(self):
         print("Loop de simulación iniciado...")
         
+        fs = Settings.SAMPLING_FREQUENCY
+        blockSize = self.simulationConfig.getTamanoBloque()
+        speed = self.simulationConfig.getVelocidad()
+        
+        # Ritmo por plazos: el bloque k se publica en inicio + k*N/(fs*velocidad),
+        # así los retrasos de sleep no se acumulan y la tasa media es exacta
+        wallStart = time.time()
+        paceStart = time.perf_counter()
+        timeOffset = wallStart - self.startTime
+        produced = 0
+        
         while self.isRunning:
             try:
-                voltajeMv = self.simulationConfig.generarVoltajeBioelectrico()
-                self._processBioSignal(voltajeMv, isSimulated=True)
+                voltagesMv = self.simulationConfig.generarBloqueBioelectrico(blockSize, self.channels)
+                relativeTimes = timeOffset + (produced + np.arange(blockSize)) / fs
+                self.bioBuffer.append(relativeTimes, voltagesMv)
+                produced += blockSize
                 
-                if self.simulationConfig.deberiActualizarSensores():
+                simulatedNow = wallStart + produced / fs
+                if self.simulationConfig.deberiActualizarSensores(simulatedNow):
                     temp, hum, light, soil = self.simulationConfig.generarDatosSensores()
                     self.sensorManager.updateAllSensors(temp, hum, light, soil)
                 
-                time.sleep(1.0 / 200.0)
+                if speed > 0:
+                    delay = paceStart + produced / (fs * speed) - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
                 
             except Exception as e:
                 print(f"[ERROR] en simulación: {e}")
                 time.sleep(0.1)
     
-    def _processBioSignal(self, rawVoltage: float, isSimulated: bool = False):
-        if isSimulated:
-            voltageMv = rawVoltage
-        else:
-            voltageMv = self.signalProcessor.convertRawToMv(rawVoltage)
+    def _processBioBlock(self, rawValues: np.ndarray, arrivalTime: float, skipped: int = 0):
+        voltagesMv = self.signalProcessor.convertRawToMv(rawValues)
+        if self.channels > 1:
+            voltagesMv = self._holdMissing(voltagesMv)
+        relativeTimes = self._timestamps(voltagesMv.shape[-1], arrivalTime, skipped)
+        self.bioBuffer.append(relativeTimes, voltagesMv)
+    
+    def _holdMissing(self, voltages: np.ndarray) -> np.ndarray:
+        """
+        Un canal sin dato en una muestra (NaN) repite su último valor, así el
+        filtro con estado no propaga el NaN; sin valor previo queda en 0
+        """
+        missing = np.isnan(voltages)
+        if missing.any():
+            extended = np.concatenate((self._lastValues[:, None], voltages), axis=1)
+            columns = np.where(np.isnan(extended), 0, np.arange(extended.shape[1]))
+            np.maximum.accumulate(columns, axis=1, out=columns)
+            voltages = np.nan_to_num(np.take_along_axis(extended, columns, axis=1)[:, 1:])
+        self._lastValues = voltages[:, -1].copy()
+        return voltages
+    
+    def _timestamps(self, n: int, arrivalTime: float, skipped: int = 0) -> np.ndarray:
+        relativeArrival = arrivalTime - self.startTime
         
-        relativeTime = time.time() - self.startTime
+        if self.useSampleClock:
+            return self.sampleClock.stamp(n, relativeArrival, skipped)
         
-        with self.bufferLock:
-            self.bioBuffer.append((relativeTime, voltageMv))
+        # Modo llegada: el bloque se reparte hacia atrás con el periodo nominal
+        period = 1.0 / Settings.SAMPLING_FREQUENCY
+        return relativeArrival - period * np.arange(n - 1, -1, -1)
     
     def start(self):
         if not self.isRunning and self.readerThread is None:
@@ -129,18 +270,69 @@ class SerialReader:
     
     def getNextBioValue(self) -> tuple:
         with self.bufferLock:
-            if self.bioBuffer:
-                return self.bioBuffer.popleft()
-        return (None, None)
+            self._skipOverwritten()
+            sample = self.bioBuffer.sampleAt(self._nextReadSeq)
+            if sample[0] is not None:
+                self._nextReadSeq += 1
+            return sample
     
-    def getBufferCopy(self) -> list:
+    def drainBioValues(self, maxSamples: int = None) -> tuple:
+        """
+        Consume todas las muestras pendientes en una sola adquisición del lock.
+        Devuelve (tiempos, voltajes, perdidas), donde perdidas es el número de
+        muestras sobrescritas por desbordamiento desde la llamada anterior.
+        """
         with self.bufferLock:
-            return list(self.bioBuffer)
+            self._skipOverwritten()
+            end = self.bioBuffer.writeIndex
+            if maxSamples is not None:
+                end = min(end, self._nextReadSeq + maxSamples)
+            
+            times, values = self.bioBuffer.read(self._nextReadSeq, end, copy=True)
+            self._nextReadSeq = end
+            lost, self._lostSamples = self._lostSamples, 0
+        
+        return times, values, lost
+    
+    def readSince(self, seq: int) -> tuple:
+        """
+        Lectura sin consumir para consumidores con su propio cursor.
+        Devuelve (tiempos, voltajes, siguienteSecuencia, perdidas).
+        """
+        with self.bufferLock:
+            lost = max(0, self.bioBuffer.oldestIndex - seq)
+            times, values, nextSeq = self.bioBuffer.since(seq, copy=True)
+        return times, values, nextSeq, lost
+    
+    def _skipOverwritten(self):
+        oldest = self.bioBuffer.oldestIndex
+        if self._nextReadSeq < oldest:
+            self._lostSamples += oldest - self._nextReadSeq
+            self._nextReadSeq = oldest
+    
+    def getLatest(self, n: int = None, copy: bool = False) -> tuple:
+        """(tiempos, voltajes) de las últimas n muestras como arreglos NumPy"""
+        return self.bioBuffer.latest(n, copy)
+    
+    def getWriteIndex(self) -> int:
+        return self.bioBuffer.writeIndex
+    
+    def getClockStats(self) -> dict:
+        """Deriva estimada y estadísticas de jitter por bloque del reloj de muestras"""
+        return self.sampleClock.getJitterStats()
+    
+    def getDroppedSamples(self) -> int:
+        """Muestras perdidas en el enlace (saltos de secuencia del protocolo binario)"""
+        return self.frameDecoder.droppedSamples
+    
+    def getBufferCopy(self) -> list:
+        times, values = self.bioBuffer.latest(copy=True)
+        return list(zip(times.tolist(), values.T.tolist()))
     
     def isConnected(self) -> bool:
         if not self.usarDatosReales:
             return True
-        return self.serialConnection is not None and self.serialConnection.is_open
+        return self.transport.isOpen
     
     def getModoOperacion(self) -> str:
         return "SIMULACIÓN" if not self.usarDatosReales else "HARDWARE REAL"
@@ -150,14 +342,20 @@ class SerialReader:
         
         if self.readerThread:
             self.readerThread.join(timeout=2)
+            self.readerThread = None
+        
+        if self.capture is not None:
+            self.capture.close()
+            print(f"Captura guardada en {self.capture.path} ({self.capture.bytesWritten} bytes)")
+            self.capture = None
         
-        if self.serialConnection and self.serialConnection.is_open:
+        if self.usarDatosReales and self.transport.isOpen:
             try:
-                self.serialConnection.close()
-                print("Puerto serial cerrado")
+                self.transport.close()
+                print(f"Conexión {self.transport} cerrada")
             except Exception as e:
                 print(f"Error cerrando puerto serial: {e}")
-        else:
+        elif not self.usarDatosReales:
             print("Simulación detenida")
     
     def __del__(self):
@@ -0,0 +1,315 @@
+"""
+Capa de transporte para la adquisición
+Separa la conexión física (serial, TCP, UDP) del parser y del buffer
+"""
+import os
+import socket
+import time
+import serial
+from abc import ABC, abstractmethod
+from typing import Optional
+from hardware.capture import CaptureReader
+
+
+class Transport(ABC):
+    """
+    Interfaz mínima que usa SerialReader. read() devuelve b'' si no hay
+    datos dentro del timeout y lanza OSError si la conexión se perdió;
+    cerrarla queda a cargo de quien lee.
+    Con timeout=0 las lecturas no bloquean (modo gestionado por selectors).
+    """
+    
+    def __init__(self, timeout: Optional[float]):
+        self.timeout = timeout
+    
+    @abstractmethod
+    def open(self):
+        pass
+    
+    @abstractmethod
+    def close(self):
+        pass
+    
+    @abstractmethod
+    def read(self) -> bytes:
+        pass
+    
+    @abstractmethod
+    def write(self, data: bytes):
+        pass
+    
+    @abstractmethod
+    def fileno(self) -> int:
+        pass
+    
+    @property
+    @abstractmethod
+    def isOpen(self) -> bool:
+        pass
+    
+    @property
+    def selectable(self) -> bool:
+        return True
+    
+    @property
+    def resetsOnOpen(self) -> bool:
+        """El ESP32 se reinicia al abrir el puerto USB; por red no"""
+        return False
+    
+    def arrivalTime(self) -> float:
+        """Instante de llegada del último bloque leído"""
+        return time.time()
+
+
+class SerialTransport(Transport):
+    
+    def __init__(self, port: str, baudrate: int, timeout: Optional[float]):
+        super().__init__(timeout)
+        self.port = port
+        self.baudrate = baudrate
+        self.connection = None
+    
+    def open(self):
+        self.connection = serial.Serial(self.port, self.baudrate, timeout=self.timeout)
+    
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+    
+    def read(self) -> bytes:
+        # Todo lo disponible de una vez; bloquea hasta el timeout por el primer byte
+        return self.connection.read(max(1, self.connection.in_waiting))
+    
+    def write(self, data: bytes):
+        self.connection.write(data)
+    
+    def fileno(self) -> int:
+        return self.connection.fileno()
+    
+    @property
+    def isOpen(self) -> bool:
+        return self.connection is not None and self.connection.is_open
+    
+    @property
+    def selectable(self) -> bool:
+        # En Windows los puertos COM no admiten select()
+        return os.name != 'nt'
+    
+    @property
+    def resetsOnOpen(self) -> bool:
+        return True
+    
+    def __str__(self) -> str:
+        return self.port
+
+
+class TcpTransport(Transport):
+    """Flujo TCP (ESP32 por Wi-Fi como servidor); mismo formato que el serial"""
+    
+    RECV_SIZE = 65536
+    
+    def __init__(self, host: str, port: int, timeout: Optional[float]):
+        super().__init__(timeout)
+        self.host = host
+        self.port = port
+        self.sock = None
+    
+    def open(self):
+        self.sock = socket.create_connection((self.host, self.port), timeout=self.timeout or 5)
+        self.sock.settimeout(self.timeout)
+    
+    def close(self):
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+    
+    def read(self) -> bytes:
+        try:
+            data = self.sock.recv(self.RECV_SIZE)
+        except (socket.timeout, BlockingIOError):
+            return b''
+        if not data:
+            raise ConnectionResetError(f"Conexión TCP cerrada por {self.host}:{self.port}")
+        return data
+    
+    def write(self, data: bytes):
+        self.sock.sendall(data)
+    
+    def fileno(self) -> int:
+        return self.sock.fileno()
+    
+    @property
+    def isOpen(self) -> bool:
+        return self.sock is not None
+    
+    def __str__(self) -> str:
+        return f"tcp://{self.host}:{self.port}"
+
+
+class UdpTransport(Transport):
+    """
+    Datagramas UDP: cada paquete trae un lote de muestras (normalmente una
+    trama binaria con número de secuencia, así las pérdidas se cuentan).
+    Se escucha en host:port; write() responde al último emisor conocido.
+    """
+    
+    RECV_SIZE = 65536
+    
+    def __init__(self, host: str, port: int, timeout: Optional[float]):
+        super().__init__(timeout)
+        self.host = host
+        self.port = port
+        self.sock = None
+        self.peer = None
+    
+    def open(self):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind((self.host, self.port))
+        self.sock.settimeout(self.timeout)
+    
+    def close(self):
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+    
+    def read(self) -> bytes:
+        try:
+            data, self.peer = self.sock.recvfrom(self.RECV_SIZE)
+        except (socket.timeout, BlockingIOError):
+            return b''
+        return data
+    
+    def write(self, data: bytes):
+        if self.peer is not None:
+            self.sock.sendto(data, self.peer)
+    
+    def fileno(self) -> int:
+        return self.sock.fileno()
+    
+    @property
+    def isOpen(self) -> bool:
+        return self.sock is not None
+    
+    def __str__(self) -> str:
+        return f"udp://{self.host}:{self.port}"
+
+
+class ReplayTransport(Transport):
+    """
+    Reproduce un archivo de captura (hardware/capture.py) a través del
+    parser y del resto del pipeline. speed=1 respeta los intervalos
+    originales, speed=N los acelera y speed=0 entrega todo sin esperas.
+    
+    arrivalTime() devuelve la llegada original desplazada al momento de
+    apertura, de modo que las marcas de tiempo y el reloj de muestras se
+    reproducen igual a cualquier velocidad.
+    """
+    
+    def __init__(self, path: str, speed: float = 1.0, loop: bool = False,
+                 timeout: Optional[float] = None):
+        super().__init__(timeout)
+        self.path = path
+        self.speed = speed
+        self.loop = loop
+        self.finished = False
+        self.protocol = CaptureReader(path).protocol
+        self._records = None
+        self._pending = None
+        self._lastArrival = None
+    
+    def open(self):
+        self._records = iter(CaptureReader(self.path))
+        self._pending = None
+        self.finished = False
+        self._wallStart = time.perf_counter()
+        self._openTime = time.time()
+        self._captureStart = None
+        self._timeShift = 0.0
+    
+    def close(self):
+        self._records = None
+    
+    def _nextRecord(self):
+        record = next(self._records, None)
+        if record is None and self.loop:
+            # Cada vuelta continúa la línea de tiempo donde terminó la anterior
+            self._timeShift = self._lastArrival - self._openTime if self._lastArrival else 0.0
+            self._records = iter(CaptureReader(self.path))
+            self._captureStart = None
+            self._wallStart = time.perf_counter()
+            record = next(self._records, None)
+        return record
+    
+    def read(self) -> bytes:
+        if self._pending is None:
+            self._pending = self._nextRecord()
+            if self._pending is None:
+                self.finished = True
+                if self.timeout:
+                    time.sleep(self.timeout)
+                return b''
+        
+        arrival, chunk = self._pending
+        if self._captureStart is None:
+            self._captureStart = arrival
+        elapsed = arrival - self._captureStart
+        
+        if self.speed > 0:
+            delay = self._wallStart + elapsed / self.speed - time.perf_counter()
+            if delay > 0:
+                if self.timeout is not None and delay > self.timeout:
+                    time.sleep(self.timeout)
+                    return b''
+                time.sleep(delay)
+        
+        self._pending = None
+        self._lastArrival = self._openTime + self._timeShift + elapsed
+        return chunk
+    
+    def arrivalTime(self) -> float:
+        return self._lastArrival if self._lastArrival is not None else time.time()
+    
+    def write(self, data: bytes):
+        pass
+    
+    def fileno(self) -> int:
+        raise OSError("ReplayTransport no tiene descriptor de archivo")
+    
+    @property
+    def isOpen(self) -> bool:
+        return self._records is not None
+    
+    @property
+    def selectable(self) -> bool:
+        return False
+    
+    def __str__(self) -> str:
+        return f"replay://{self.path}"
+
+
+def createTransport(address: str, baudrate: int, timeout: Optional[float]) -> Transport:
+    """
+    Crea el transporte según la dirección configurada:
+        COM7, /dev/ttyUSB0        -> serial
+        tcp://192.168.1.50:3333   -> TCP
+        udp://0.0.0.0:5005        -> UDP (escucha)
+        replay://sesion.cap?velocidad=4&bucle=1  -> captura (velocidad 0 = máxima)
+    """
+    if address.startswith("replay://"):
+        path, _, query = address[len("replay://"):].partition("?")
+        options = dict(item.partition("=")[::2] for item in query.split("&") if item)
+        return ReplayTransport(
+            path,
+            speed=float(options.get("velocidad", 1.0)),
+            loop=options.get("bucle", "0") not in ("0", ""),
+            timeout=timeout
+        )
+    
+    if address.startswith(("tcp://", "udp://")):
+        scheme, rest = address.split("://", 1)
+        host, _, port = rest.rpartition(":")
+        transportClass = TcpTransport if scheme == "tcp" else UdpTransport
+        return transportClass(host or "0.0.0.0", int(port), timeout)
+    
+    return SerialTransport(address, baudrate, timeout)
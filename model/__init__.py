@@ -1,5 +1,5 @@
 # Model Package
 from .weather_info import WeatherInfo
-from .sensor_data import SensorReading
+from .sensor_data import SensorReading, SensorSnapshot, SensorSnapshotBatch
 
-__all__ = ['WeatherInfo', 'SensorReading']
+__all__ = ['WeatherInfo', 'SensorReading', 'SensorSnapshot', 'SensorSnapshotBatch']
@@ -3,7 +3,8 @@ Modelo de datos para lecturas de sensores
 """
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Optional
+from typing import ClassVar, Iterable, List, Optional, Tuple
+import numpy as np
 
 
 @dataclass
@@ -34,3 +35,66 @@ class SensorSnapshot:
             self.light is not None,
             self.soil_moisture is not None
         ])
+
+
+@dataclass
+class SensorSnapshotBatch:
+    """
+    Lote de snapshots como estructura de arreglos: una columna por campo,
+    marcas int64 (segundos en hora local) y NaN donde faltaba un sensor
+    """
+    timestamps: np.ndarray
+    temperature: np.ndarray
+    humidity: np.ndarray
+    light: np.ndarray
+    soil_moisture: np.ndarray
+
+    FIELDS: ClassVar[Tuple[str, ...]] = ("temperature", "humidity", "light", "soil_moisture")
+
+    @classmethod
+    def from_columns(cls, timestamps: np.ndarray, values: np.ndarray) -> "SensorSnapshotBatch":
+        """Desde marcas y una matriz (filas, FIELDS) de valores"""
+        values = np.asarray(values, dtype=np.float64).reshape(-1, len(cls.FIELDS))
+        columns = (np.ascontiguousarray(values[:, i]) for i in range(len(cls.FIELDS)))
+        return cls(np.asarray(timestamps, dtype=np.int64), *columns)
+
+    @classmethod
+    def from_snapshots(cls, snapshots: Iterable[SensorSnapshot]) -> "SensorSnapshotBatch":
+        snapshots = list(snapshots)
+        timestamps = np.array([s.timestamp for s in snapshots], dtype='datetime64[s]').astype(np.int64)
+        values = np.array(
+            [[np.nan if getattr(s, field) is None else getattr(s, field) for field in cls.FIELDS] for s in snapshots],
+            dtype=np.float64
+        )
+        return cls.from_columns(timestamps, values)
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def values(self) -> np.ndarray:
+        """Matriz (filas, FIELDS) con los valores"""
+        return np.column_stack([getattr(self, field) for field in self.FIELDS])
+
+    def is_complete(self) -> np.ndarray:
+        """Máscara de las filas con todos los sensores"""
+        return np.isfinite(self.values()).all(axis=1)
+
+    def select(self, rows) -> "SensorSnapshotBatch":
+        """Subconjunto por máscara, índices o slice"""
+        return type(self)(self.timestamps[rows], *(getattr(self, field)[rows] for field in self.FIELDS))
+
+    def to_snapshots(self) -> List[SensorSnapshot]:
+        snapshots = []
+        stamps = self.timestamps.astype('datetime64[s]').tolist()
+        for stamp, row in zip(stamps, self.values().tolist()):
+            values = {field: None if value != value else value for field, value in zip(self.FIELDS, row)}
+            snapshots.append(SensorSnapshot(timestamp=stamp, **values))
+        return snapshots
+
+    def correlation(self) -> np.ndarray:
+        """Correlación de Pearson entre campos usando las filas completas (NaN si hay menos de 2)"""
+        values = self.values()[self.is_complete()]
+        if len(values) < 2:
+            return np.full((len(self.FIELDS), len(self.FIELDS)), np.nan)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.corrcoef(values, rowvar=False)
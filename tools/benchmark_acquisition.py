@@ -0,0 +1,110 @@
+"""
+Benchmark del gestor de adquisición multi-dispositivo (solo POSIX)
+Crea N dispositivos falsos con pseudo-terminales (pty) que emiten el
+protocolo de texto del ESP32 a la frecuencia indicada, y mide la CPU del
+bucle de adquisición y las muestras recibidas. Uso:
+
+    python -m tools.benchmark_acquisition [dispositivos] [segundos] [frecuencia]
+"""
+import os
+import sys
+import threading
+import time
+import numpy as np
+from hardware.acquisition_manager import AcquisitionManager
+
+
+class FakeDevices:
+    """Un hilo escribe en todos los maestros pty en bloques de 50 ms"""
+
+    def __init__(self, count: int, rate: float):
+        self.rate = rate
+        self.masters = []
+        self.ports = []
+        for _ in range(count):
+            master, slave = os.openpty()
+            self.masters.append(master)
+            self.ports.append(os.ttyname(slave))
+        self.sent = 0
+        self.running = False
+        self._thread = None
+
+    def start(self):
+        self.running = True
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.running = False
+        if self._thread:
+            self._thread.join(timeout=2)
+
+    def _loop(self):
+        rng = np.random.default_rng(0)
+        blockPeriod = 0.05
+        perBlock = max(1, int(round(self.rate * blockPeriod)))
+        start = time.perf_counter()
+        blocks = 0
+        while self.running:
+            raw = 1.695 + rng.normal(0, 0.02, perBlock)
+            payload = b"".join(b"B:%.4f\r\n" % v for v in raw)
+            for master in self.masters:
+                os.write(master, payload)
+            self.sent += perBlock
+            blocks += 1
+            delay = start + blocks * blockPeriod - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+
+def main():
+    if os.name == 'nt':
+        print("Este benchmark requiere pseudo-terminales POSIX")
+        return
+
+    numDispositivos = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    segundos = float(sys.argv[2]) if len(sys.argv) > 2 else 10
+    frecuencia = float(sys.argv[3]) if len(sys.argv) > 3 else 200
+
+    fake = FakeDevices(numDispositivos, frecuencia)
+    manager = AcquisitionManager()
+    for i, port in enumerate(fake.ports):
+        manager.addDevice(f"planta{i:02d}", port, protocol="texto")
+
+    manager.start()
+    fake.start()
+    cpuInicio = time.process_time()
+    inicio = time.perf_counter()
+
+    # Consumidor típico: drena cada dispositivo cada 50 ms, como la GUI
+    recibidas = 0
+    perdidas = 0
+    while time.perf_counter() - inicio < segundos:
+        for deviceId in manager.devices:
+            _, valores, lost = manager.getDevice(deviceId).drainBioValues()
+            recibidas += len(valores)
+            perdidas += lost
+        time.sleep(0.05)
+
+    duracion = time.perf_counter() - inicio
+    cpuProceso = time.process_time() - cpuInicio
+    fake.stop()
+    time.sleep(0.2)
+    for deviceId in manager.devices:
+        _, valores, lost = manager.getDevice(deviceId).drainBioValues()
+        recibidas += len(valores)
+        perdidas += lost
+    manager.stop()
+
+    esperadas = fake.sent * numDispositivos
+    print(f"{numDispositivos} dispositivos a {frecuencia:.0f} Hz durante {duracion:.1f} s")
+    print(f"Muestras enviadas:  {esperadas:,}")
+    print(f"Muestras recibidas: {recibidas:,} ({perdidas} perdidas por desbordamiento)")
+    print(f"Tasa agregada:      {recibidas / duracion:,.0f} muestras/s")
+    print(f"CPU bucle de adquisición: {100 * manager.loopCpuTime / duracion:.1f} % de un núcleo "
+          f"({manager.loopIterations} iteraciones)")
+    print(f"CPU proceso (incluye emuladores): {100 * cpuProceso / duracion:.1f} %")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark de ingesta del protocolo de texto del ESP32
+Compara el parseo línea por línea (readline + regex + float) contra el
+parser por bloques con conversión vectorizada. Uso:
+
+    python -m tools.benchmark_serial_parser [lineas] [tamaño_bloque]
+"""
+import re
+import sys
+import time
+import numpy as np
+from core.signal_processor import SignalProcessor
+from hardware.line_parser import LineParser
+
+
+def generarTrafico(numLineas: int, seed: int = 0) -> bytes:
+    """Una lectura de sensores cada 200 muestras, como el firmware actual"""
+    rng = np.random.default_rng(seed)
+    raw = 1.695 + rng.normal(0, 0.02, numLineas)
+    lineas = []
+    for i, v in enumerate(raw):
+        if i % 200 == 199:
+            lineas.append(b"T:24.5,H:55.0,L:32000,S:48.0")
+        else:
+            lineas.append(b"B:%.4f" % v)
+    return b"\r\n".join(lineas) + b"\r\n"
+
+
+def parseoLegacy(datos: bytes, processor: SignalProcessor) -> int:
+    bioPattern = re.compile(r'B:([-+]?\d*\.\d+|\d+)')
+    sensorPattern = re.compile(r'T:([^,]+),H:([^,]+),L:([^,]+),S:([^,]+)')
+    muestras = 0
+    for raw in datos.splitlines(keepends=True):
+        line = raw.decode('utf-8', errors='ignore').strip()
+        if not line:
+            continue
+        bioMatch = bioPattern.match(line)
+        if bioMatch:
+            processor.convertRawToMv(float(bioMatch.group(1)))
+            time.time()
+            muestras += 1
+            continue
+        sensorPattern.search(line)
+    return muestras
+
+
+def parseoPorBloques(datos: bytes, processor: SignalProcessor, tamanoBloque: int) -> int:
+    parser = LineParser()
+    muestras = 0
+    for inicio in range(0, len(datos), tamanoBloque):
+        valores, _ = parser.feed(datos[inicio:inicio + tamanoBloque])
+        if valores.size:
+            processor.convertRawToMv(valores)
+            time.time()
+            muestras += valores.size
+    return muestras
+
+
+def medir(nombre: str, funcion, numLineas: int) -> float:
+    inicio = time.perf_counter()
+    muestras = funcion()
+    duracion = time.perf_counter() - inicio
+    tasa = numLineas / duracion
+    print(f"{nombre:<22} {muestras:>9} muestras  {duracion:8.3f} s  {tasa:>12,.0f} líneas/s")
+    return tasa
+
+
+def main():
+    numLineas = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    tamanoBloque = int(sys.argv[2]) if len(sys.argv) > 2 else 4096
+
+    processor = SignalProcessor()
+    datos = generarTrafico(numLineas)
+    print(f"{numLineas:,} líneas, {len(datos) / 1e6:.1f} MB, bloques de {tamanoBloque} bytes")
+
+    legacy = medir("línea por línea", lambda: parseoLegacy(datos, processor), numLineas)
+    bloques = medir("por bloques", lambda: parseoPorBloques(datos, processor, tamanoBloque), numLineas)
+    print(f"Aceleración: {bloques / legacy:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
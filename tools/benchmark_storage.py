@@ -0,0 +1,134 @@
+"""
+Benchmark de los formatos del historial de sensores: texto, columnar y SQLite
+Mide inserciones por segundo en lotes como los del StorageWriter y la
+latencia de consultas por rango (último día y última semana), también con
+un escritor insertando en paralelo. Uso:
+
+    python -m tools.benchmark_storage [lecturas] [periodo_s] [lote]
+"""
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import numpy as np
+from core.data_storage import parseTextHistory
+from core.partitioned_storage import PartitionedSeries
+from core.sqlite_storage import SqliteHistory
+from core.time_index import TextTimeIndex
+
+SENSOR = "temperatura"
+DAY = 86400
+
+
+class TextBackend:
+    def __init__(self, directory: str):
+        self.path = os.path.join(directory, f"{SENSOR}.txt")
+        self.index = TextTimeIndex(self.path)
+
+    def append(self, timestamps, values):
+        stamps = np.datetime_as_string(timestamps.astype('datetime64[s]'))
+        lines = "".join(f"{stamp[:10]} {stamp[11:]},{value:.2f}\n" for stamp, value in zip(stamps, values))
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(lines)
+
+    def read(self, start, end):
+        timestamps, values = parseTextHistory(self.path, self.index.seek(start))
+        mask = (timestamps >= np.datetime64(start, 's')) & (timestamps < np.datetime64(end, 's'))
+        return timestamps[mask], values[mask]
+
+
+class ColumnarBackend:
+    def __init__(self, directory: str):
+        self.series = PartitionedSeries(os.path.join(directory, SENSOR))
+
+    def append(self, timestamps, values):
+        self.series.append(timestamps, values)
+
+    def read(self, start, end):
+        return self.series.read(start, end)
+
+
+class SqliteBackend:
+    def __init__(self, directory: str):
+        self.database = SqliteHistory(os.path.join(directory, "historial.db"), "benchmark")
+
+    def append(self, timestamps, values):
+        self.database.append(SENSOR, timestamps, values)
+
+    def read(self, start, end):
+        return self.database.read(SENSOR, start, end)
+
+
+def medirConsulta(backend, start: int, end: int, repeticiones: int = 20) -> float:
+    backend.read(start, end)
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        backend.read(start, end)
+    return (time.perf_counter() - inicio) / repeticiones * 1e3
+
+
+def medir(nombre: str, backend, timestamps: np.ndarray, values: np.ndarray, lote: int) -> dict:
+    inicio = time.perf_counter()
+    for offset in range(0, len(timestamps), lote):
+        backend.append(timestamps[offset:offset + lote], values[offset:offset + lote])
+    insercion = len(timestamps) / (time.perf_counter() - inicio)
+
+    fin = int(timestamps[-1]) + 1
+    dia = medirConsulta(backend, fin - DAY, fin)
+    semana = medirConsulta(backend, fin - 7 * DAY, fin)
+
+    # Mismo rango mientras otro hilo inserta un lote cada 10 ms
+    activo = threading.Event()
+    activo.set()
+
+    def escritor():
+        marca = fin
+        while activo.is_set():
+            nuevas = np.arange(marca, marca + lote, dtype=np.int64)
+            backend.append(nuevas, np.full(lote, 20.0))
+            marca += lote
+            time.sleep(0.01)
+
+    hilo = threading.Thread(target=escritor, daemon=True)
+    hilo.start()
+    concurrente = medirConsulta(backend, fin - DAY, fin)
+    activo.clear()
+    hilo.join()
+
+    return {
+        "formato": nombre,
+        "inserciones/s": insercion,
+        "dia_ms": dia,
+        "semana_ms": semana,
+        "dia_con_escritor_ms": concurrente
+    }
+
+
+def main():
+    lecturas = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    periodo = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    lote = int(sys.argv[3]) if len(sys.argv) > 3 else 256
+
+    ahora = int(np.datetime64('now', 's').astype(np.int64))
+    timestamps = ahora - periodo * np.arange(lecturas, 0, -1, dtype=np.int64)
+    values = np.round(20 + 5 * np.sin(timestamps / DAY * 2 * np.pi), 2)
+
+    print(f"{lecturas:,} lecturas cada {periodo} s ({lecturas * periodo / DAY:.0f} días), lotes de {lote}")
+    resultados = []
+    for nombre, clase in (("texto", TextBackend), ("columnar", ColumnarBackend), ("sqlite", SqliteBackend)):
+        carpeta = tempfile.mkdtemp(prefix=f"bench_{nombre}_")
+        try:
+            resultados.append(medir(nombre, clase(carpeta), timestamps, values, lote))
+        finally:
+            shutil.rmtree(carpeta, ignore_errors=True)
+
+    print(f"{'formato':<10}{'inserciones/s':>15}{'1 día (ms)':>12}{'7 días (ms)':>13}{'1 día + escritor (ms)':>23}")
+    for r in resultados:
+        print(f"{r['formato']:<10}{r['inserciones/s']:>15,.0f}{r['dia_ms']:>12.2f}"
+              f"{r['semana_ms']:>13.2f}{r['dia_con_escritor_ms']:>23.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Benchmark del lector de historiales .txt
+Compara el bucle original línea a línea con strptime con el lector
+vectorizado parseTextHistory sobre un archivo sintético (con algunas
+líneas dañadas) y verifica que ambos devuelvan lo mismo. Uso:
+
+    python -m tools.benchmark_text_history [lineas]
+"""
+import datetime
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+from core.data_storage import parseTextHistory
+
+
+def leerConBucle(filepath: str):
+    """Lectura original de los reportes: una línea, un strptime"""
+    fechas = []
+    valores = []
+    with open(filepath, "r", encoding="utf-8") as f:
+        for linea in f:
+            partes = linea.strip().split(",")
+            if len(partes) >= 2:
+                try:
+                    timestamp = datetime.datetime.strptime(partes[0], "%Y-%m-%d %H:%M:%S")
+                    valor = float(partes[1])
+                    fechas.append(timestamp)
+                    valores.append(valor)
+                except ValueError:
+                    continue
+    return np.array(fechas, dtype='datetime64[s]'), np.array(valores, dtype=np.float64)
+
+
+def crearArchivo(filepath: str, lineas: int):
+    rng = np.random.default_rng(0)
+    inicio = np.datetime64('2024-01-01T00:00:00', 's')
+    stamps = np.datetime_as_string(inicio + np.arange(lineas) * 10)
+    values = np.round(20 + 5 * rng.standard_normal(lineas), 2)
+    texto = [f"{s[:10]} {s[11:]},{v}\n" for s, v in zip(stamps, values)]
+    # Líneas dañadas cada 10.000: cortadas (corte de luz) o con un valor no numérico
+    for i in range(5000, lineas, 10000):
+        texto[i] = texto[i][:12] + "\n"
+    for i in range(7000, lineas, 10000):
+        texto[i] = texto[i][:20] + "error\n"
+    with open(filepath, "w", encoding="utf-8") as f:
+        f.writelines(texto)
+
+
+def medir(funcion, filepath: str, repeticiones: int):
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion(filepath)
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor, resultado
+
+
+def main():
+    lineas = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    filepath = os.path.join(tempfile.mkdtemp(prefix="bench_txt_"), "temperatura.txt")
+    crearArchivo(filepath, lineas)
+    print(f"{lineas:,} líneas, {os.path.getsize(filepath) / 1e6:.1f} MB")
+
+    try:
+        tBucle, (fechasBucle, valoresBucle) = medir(leerConBucle, filepath, 1)
+        tVector, (fechas, valores) = medir(parseTextHistory, filepath, 3)
+    finally:
+        os.remove(filepath)
+        os.rmdir(os.path.dirname(filepath))
+
+    iguales = np.array_equal(fechas, fechasBucle) and np.array_equal(valores, valoresBucle)
+    print(f"bucle strptime : {tBucle:8.3f} s  ({len(valoresBucle):,} lecturas)")
+    print(f"vectorizado    : {tVector:8.3f} s  ({len(valores):,} lecturas)")
+    print(f"aceleración    : {tBucle / tVector:8.1f}x  (objetivo >= 20x)")
+    print(f"resultados iguales: {'sí' if iguales else 'NO'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""
+Emulador local del ESP32 para probar la adquisición sin hardware
+Genera la señal bioeléctrica cruda (y lecturas de sensores) en protocolo
+de texto o binario y la entrega por TCP, UDP o pseudo-terminal. Uso:
+
+    python -m tools.esp32_emulator tcp --puerto 3333
+    python -m tools.esp32_emulator udp --destino 127.0.0.1:5005 --protocolo binario --perdida 0.01
+    python -m tools.esp32_emulator pty --protocolo binario
+
+Con --probar se levanta además un SerialReader contra el emulador y se
+reportan las muestras recibidas y perdidas; --capturar guarda lo recibido
+en un archivo de captura reproducible con tools.replay_capture.
+"""
+import argparse
+import os
+import socket
+import threading
+import time
+import numpy as np
+from config.settings import Settings
+from hardware.binary_protocol import encodeFrame
+
+
+class Esp32Emulator:
+    """Produce paquetes de muestras a ritmo real con número de secuencia"""
+
+    def __init__(self, protocol: str = "texto", rate: float = Settings.SAMPLING_FREQUENCY,
+                 samplesPerPacket: int = 20, sensorPeriod: float = 1.0, seed: int = 0):
+        self.protocol = protocol
+        self.rate = rate
+        self.samplesPerPacket = samplesPerPacket
+        self.sensorPeriod = sensorPeriod
+        self.rng = np.random.default_rng(seed)
+        self.seq = 0
+        self._nextSensors = 0.0
+
+    def nextPacket(self) -> bytes:
+        n = self.samplesPerPacket
+        t = (self.seq + np.arange(n)) / self.rate
+        raw = Settings.SIGNAL_OFFSET + 0.01 * np.sin(2 * np.pi * 1.0 * t) + self.rng.normal(0, 0.002, n)
+
+        sensors = None
+        if t[-1] >= self._nextSensors:
+            self._nextSensors = t[-1] + self.sensorPeriod
+            sensors = (24.5 + self.rng.normal(0, 0.1), 60.0, 850.0, 42.0)
+
+        seq = self.seq
+        self.seq += n
+
+        if self.protocol == "binario":
+            return encodeFrame(seq, raw, sensors)
+
+        payload = b"".join(b"B:%.4f\r\n" % v for v in raw)
+        if sensors is not None:
+            payload += b"T:%.1f,H:%.1f,L:%.1f,S:%.1f\r\n" % sensors
+        return payload
+
+    def run(self, send, isRunning, lossRate: float = 0.0):
+        """Llama send(paquete) con ritmo por plazos; lossRate descarta paquetes al azar"""
+        packetPeriod = self.samplesPerPacket / self.rate
+        start = time.perf_counter()
+        packets = 0
+        while isRunning():
+            packet = self.nextPacket()
+            if lossRate <= 0 or self.rng.random() >= lossRate:
+                send(packet)
+            packets += 1
+            delay = start + packets * packetPeriod - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+
+class TcpServer:
+    """Acepta clientes y les reenvía el mismo flujo a todos"""
+
+    def __init__(self, host: str, port: int):
+        self.server = socket.create_server((host, port))
+        self.clients = []
+        self._lock = threading.Lock()
+        threading.Thread(target=self._acceptLoop, daemon=True).start()
+
+    def _acceptLoop(self):
+        while True:
+            try:
+                client, address = self.server.accept()
+            except OSError:
+                return
+            print(f"Cliente conectado: {address[0]}:{address[1]}")
+            with self._lock:
+                self.clients.append(client)
+
+    def send(self, packet: bytes):
+        with self._lock:
+            for client in list(self.clients):
+                try:
+                    client.sendall(packet)
+                except OSError:
+                    self.clients.remove(client)
+                    client.close()
+
+    def close(self):
+        self.server.close()
+        with self._lock:
+            for client in self.clients:
+                client.close()
+
+
+def _probar(address: str, protocol: str, seconds: float, capturePath: str = None):
+    from hardware.serial_reader import SerialReader
+
+    reader = SerialReader(port=address, protocol=protocol, useRealData=True, capturePath=capturePath)
+    start = time.perf_counter()
+    received = 0
+    lost = 0
+    while time.perf_counter() - start < seconds:
+        time.sleep(0.1)
+        _, values, overflow = reader.drainBioValues()
+        received += len(values)
+        lost += overflow
+    reader.disconnect()
+
+    print(f"Muestras recibidas: {received:,} en {seconds:.0f} s ({received / seconds:.0f} muestras/s)")
+    print(f"Perdidas en el enlace: {reader.getDroppedSamples()}  por desbordamiento: {lost}")
+    print(f"Reloj de muestras: {reader.getClockStats()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Emulador local del ESP32")
+    parser.add_argument("modo", choices=["tcp", "udp", "pty"])
+    parser.add_argument("--protocolo", choices=["texto", "binario"], default="texto")
+    parser.add_argument("--frecuencia", type=float, default=Settings.SAMPLING_FREQUENCY)
+    parser.add_argument("--muestras-por-paquete", type=int, default=20)
+    parser.add_argument("--host", default="127.0.0.1", help="Dirección de escucha TCP")
+    parser.add_argument("--puerto", type=int, default=3333, help="Puerto de escucha TCP")
+    parser.add_argument("--destino", default="127.0.0.1:5005", help="host:puerto destino UDP")
+    parser.add_argument("--perdida", type=float, default=0.0, help="Fracción de datagramas UDP descartados")
+    parser.add_argument("--probar", type=float, default=0, metavar="SEGUNDOS",
+                        help="Conecta un SerialReader al emulador durante SEGUNDOS")
+    parser.add_argument("--capturar", metavar="ARCHIVO", help="Captura cruda de lo recibido con --probar")
+    args = parser.parse_args()
+
+    emulator = Esp32Emulator(args.protocolo, args.frecuencia, args.muestras_por_paquete)
+    running = threading.Event()
+    running.set()
+    cleanup = None
+
+    if args.modo == "tcp":
+        server = TcpServer(args.host, args.puerto)
+        send, cleanup = server.send, server.close
+        address = f"tcp://{args.host}:{args.puerto}"
+    elif args.modo == "udp":
+        host, _, port = args.destino.rpartition(":")
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        target = (host, int(port))
+        send, cleanup = (lambda packet: sock.sendto(packet, target)), sock.close
+        address = f"udp://{host}:{port}"
+    else:
+        if os.name == 'nt':
+            print("El modo pty requiere pseudo-terminales POSIX")
+            return
+        master, slave = os.openpty()
+        send = lambda packet: os.write(master, packet)
+        address = os.ttyname(slave)
+
+    print(f"Emulando ESP32 ({args.protocolo}, {args.frecuencia:.0f} Hz) en {address}")
+
+    worker = threading.Thread(
+        target=emulator.run,
+        args=(send, running.is_set, args.perdida if args.modo == "udp" else 0.0),
+        daemon=True
+    )
+
+    try:
+        if args.probar > 0:
+            if args.modo == "udp":
+                # El receptor debe estar escuchando antes de que lleguen datagramas
+                reader = threading.Thread(target=_probar, args=(address, args.protocolo, args.probar, args.capturar))
+                reader.start()
+                time.sleep(0.5)
+                worker.start()
+                reader.join()
+            else:
+                worker.start()
+                _probar(address, args.protocolo, args.probar, args.capturar)
+        else:
+            worker.start()
+            while True:
+                time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        running.clear()
+        if worker.is_alive():
+            worker.join(timeout=2)
+        if cleanup is not None:
+            cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Pruebas de robustez (fuzzing) del decodificador de tramas binarias
+Genera tramas válidas y las somete a truncamiento, bits invertidos,
+bytes basura y fragmentación arbitraria. Uso:
+
+    python -m tools.fuzz_binary_protocol [iteraciones] [semilla]
+"""
+import sys
+import numpy as np
+from hardware.binary_protocol import FrameDecoder, encodeFrame, INT16_LSB_VOLTS
+
+
+def generarTramas(rng: np.random.Generator, numTramas: int) -> list:
+    tramas = []
+    seq = int(rng.integers(0, 1 << 32))
+    for _ in range(numTramas):
+        count = int(rng.integers(1, 64))
+        useFloat = bool(rng.integers(0, 2))
+        muestras = rng.uniform(0.0, 3.0, count)
+        if useFloat:
+            muestras = muestras.astype(np.float32).astype(np.float64)
+        else:
+            muestras = np.round(muestras / INT16_LSB_VOLTS) * INT16_LSB_VOLTS
+        sensores = (24.5, 55.0, 32000.0, 48.0) if rng.random() < 0.2 else None
+        tramas.append((seq, muestras, encodeFrame(seq, muestras, sensores, useFloat)))
+        seq += count
+    return tramas
+
+
+def corromper(rng: np.random.Generator, trama: bytes) -> bytes:
+    """Trama truncada, con un bit invertido o reemplazada por basura"""
+    modo = rng.integers(0, 3)
+    datos = bytearray(trama)
+    if modo == 0:
+        return bytes(datos[:int(rng.integers(0, len(datos)))])
+    if modo == 1:
+        pos = int(rng.integers(0, len(datos)))
+        datos[pos] ^= 1 << int(rng.integers(0, 8))
+        return bytes(datos)
+    return bytes(rng.bytes(len(datos)))
+
+
+def fragmentar(rng: np.random.Generator, flujo: bytes):
+    pos = 0
+    while pos < len(flujo):
+        tam = int(rng.integers(1, 256))
+        yield flujo[pos:pos + tam]
+        pos += tam
+
+
+def iteracion(rng: np.random.Generator) -> None:
+    tramas = generarTramas(rng, int(rng.integers(5, 40)))
+    flujo = bytearray()
+    esperadas = []
+    corruptas = 0
+    muestrasValidas = set()
+
+    for seq, muestras, trama in tramas:
+        # Una trama truncada solo en el último byte del CRC puede validar
+        # con el byte siguiente; sus muestras siguen siendo legítimas
+        muestrasValidas.update(muestras.tolist())
+        if rng.random() < 0.1:
+            # Basura entre tramas: no debe afectar a la trama siguiente
+            flujo += rng.bytes(int(rng.integers(1, 32)))
+        if rng.random() < 0.25:
+            flujo += corromper(rng, trama)
+            corruptas += 1
+        else:
+            flujo += trama
+            esperadas.append(muestras)
+
+    decoder = FrameDecoder()
+    recibidas = []
+    # Relleno final: simula que el flujo continúa para que una cabecera
+    # corrupta que anuncia una trama larga termine de descartarse
+    flujo += bytes(8192)
+    for bloque in fragmentar(rng, bytes(flujo)):
+        valores, _ = decoder.feed(bloque)
+        recibidas.append(valores)
+    recibidas = np.concatenate(recibidas) if recibidas else np.empty(0)
+
+    totalEsperado = sum(len(m) for m in esperadas)
+    totalEnviado = sum(len(m) for _, m, _ in tramas)
+    # Toda muestra decodificada debe provenir de una trama válida
+    assert set(recibidas.tolist()) <= muestrasValidas, "muestra no válida decodificada"
+    assert len(recibidas) <= totalEnviado, "se decodificaron más muestras de las enviadas"
+    # Una trama corrupta puede, a lo sumo, ocultar la siguiente trama válida al resincronizar
+    assert decoder.validFrames >= len(esperadas) - corruptas, "demasiadas tramas válidas perdidas"
+    if corruptas == 0:
+        assert len(recibidas) == totalEsperado, "muestras perdidas sin corrupción"
+        assert decoder.droppedSamples == 0, "saltos de secuencia sin corrupción"
+
+
+def main():
+    iteraciones = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    semilla = int(sys.argv[2]) if len(sys.argv) > 2 else 1234
+    rng = np.random.default_rng(semilla)
+
+    for i in range(iteraciones):
+        try:
+            iteracion(rng)
+        except AssertionError as e:
+            print(f"Fallo en iteración {i} (semilla {semilla}): {e}")
+            sys.exit(1)
+
+    print(f"{iteraciones} iteraciones sin fallos (semilla {semilla})")
+
+
+if __name__ == "__main__":
+    main()
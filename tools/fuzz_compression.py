@@ -0,0 +1,89 @@
+"""
+Pruebas de la compresión del historial (banda muerta y puerta giratoria)
+Genera series con derivas, escalones, tramos planos, huecos y NaN, las
+comprime en lotes de tamaño arbitrario y comprueba que interpolate()
+sobre lo guardado reconstruye cada lectura dentro de la cota del modo
+(2 * tolerancia en banda, tolerancia en puerta). Uso:
+
+    python -m tools.fuzz_compression [iteraciones] [semilla]
+"""
+import sys
+import numpy as np
+from core.compression import DeadbandCompressor, SwingingDoorCompressor, interpolate
+
+
+COTAS = {DeadbandCompressor: 2.0, SwingingDoorCompressor: 1.0}
+
+
+def generarSerie(rng: np.random.Generator, n: int) -> tuple:
+    pasos = rng.choice([1, 5, 60], size=n).astype(np.int64)
+    # Algunos huecos largos, por encima de maxGap
+    pasos[rng.random(n) < 0.01] = int(rng.integers(600, 7200))
+    timestamps = np.cumsum(pasos)
+    valores = 20.0 + np.cumsum(rng.normal(0.0, float(rng.uniform(0.0, 0.2)), n))
+    for _ in range(int(rng.integers(0, 5))):
+        desde = int(rng.integers(0, n))
+        valores[desde:] += rng.uniform(-10.0, 10.0)
+    if rng.random() < 0.3:
+        valores[int(rng.integers(0, n)):] = valores[0]
+    valores[rng.random(n) < 0.01] = np.nan
+    return timestamps, valores
+
+
+def comprimir(compresor, timestamps: np.ndarray, valores: np.ndarray, rng: np.random.Generator) -> tuple:
+    guardadas = []
+    pos = 0
+    while pos < len(timestamps):
+        tam = int(rng.integers(1, 200))
+        guardadas.append(compresor.feed(timestamps[pos:pos + tam], valores[pos:pos + tam]))
+        pos += tam
+    punto = compresor.flush()
+    if punto is not None:
+        guardadas.append((np.array([punto[0]], dtype=np.int64), np.array([punto[1]])))
+    return np.concatenate([g[0] for g in guardadas]), np.concatenate([g[1] for g in guardadas])
+
+
+def verificar(compresorClass, timestamps: np.ndarray, valores: np.ndarray, tolerancia: float, maxGap: int, rng: np.random.Generator) -> None:
+    stamps, guardados = comprimir(compresorClass(tolerancia, maxGap), timestamps, valores, rng)
+    validas = ~np.isnan(valores)
+    assert np.all(np.diff(stamps) > 0), "marcas guardadas fuera de orden"
+    assert stamps[0] == timestamps[validas][0] and stamps[-1] == timestamps[validas][-1], "extremos no guardados"
+    error = np.abs(interpolate(stamps, guardados, timestamps[validas]) - valores[validas])
+    cota = COTAS[compresorClass] * tolerancia + 1e-9
+    assert error.max() <= cota, f"{compresorClass.mode}: error {error.max():.4g} > {cota:.4g}"
+
+
+def iteracion(rng: np.random.Generator) -> None:
+    timestamps, valores = generarSerie(rng, int(rng.integers(10, 5000)))
+    tolerancia = float(rng.choice([0.01, 0.1, 0.5, 2.0]))
+    maxGap = int(rng.choice([60, 600, 3600]))
+    for compresorClass in COTAS:
+        verificar(compresorClass, timestamps, valores, tolerancia, maxGap, rng)
+
+
+def main():
+    iteraciones = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    semilla = int(sys.argv[2]) if len(sys.argv) > 2 else 1234
+    rng = np.random.default_rng(semilla)
+
+    # Escalón justo cuando vence maxGap (lecturas cada 60 s, 20 -> 30 en t=3600)
+    timestamps = np.arange(0, 7200, 60, dtype=np.int64)
+    try:
+        for compresorClass in COTAS:
+            verificar(compresorClass, timestamps, np.where(timestamps < 3600, 20.0, 30.0), 0.1, 3600, rng)
+    except AssertionError as e:
+        print(f"Fallo en el escalón con maxGap: {e}")
+        sys.exit(1)
+
+    for i in range(iteraciones):
+        try:
+            iteracion(rng)
+        except AssertionError as e:
+            print(f"Fallo en iteración {i} (semilla {semilla}): {e}")
+            sys.exit(1)
+
+    print(f"{iteraciones} iteraciones sin fallos (semilla {semilla})")
+
+
+if __name__ == "__main__":
+    main()
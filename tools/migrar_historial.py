@@ -0,0 +1,121 @@
+"""
+Migración única del historial de texto al formato columnar binario o SQLite
+Convierte cada historialLecturas/<sensor>.txt en la serie particionada
+historialLecturas/<sensor>/<día>/seg_*.ts|.val (o en filas de
+historialLecturas/historial.db) y renombra el original a
+<sensor>.txt.migrado. Uso:
+
+    python -m tools.migrar_historial [carpeta] [--formato columnar|sqlite] [--forzar] [--conservar]
+
+Si el sensor ya tiene lecturas en el formato de destino (escritas por
+la aplicación tras actualizarla), solo se añaden las del .txt anteriores
+a la primera; nunca se borra nada. --forzar reimporta también los
+<sensor>.txt.migrado de sensores cuyo historial está vacío; --conservar
+deja los .txt en su sitio.
+"""
+import argparse
+import glob
+import os
+import time
+import numpy as np
+from config.settings import Settings
+from core.partitioned_storage import PartitionedSeries
+from core.rollups import RollupSeries
+from core.sqlite_storage import SqliteHistory
+from core.data_storage import DataStorage, parseTextHistory
+
+
+def migrarSensor(txtPath: str, conservar: bool, database: SqliteHistory = None) -> int:
+    """
+    Pasa al formato de destino las lecturas del .txt anteriores a la
+    primera ya guardada (las posteriores ya se escriben ahí desde la
+    actualización) y las suma a los agregados si estos aún no las cuentan
+    """
+    carpeta = os.path.dirname(txtPath)
+    sensor = os.path.basename(txtPath).split(".")[0]
+    if database is None:
+        series = PartitionedSeries(os.path.join(carpeta, sensor), Settings.COLUMNAR_SEGMENT_ROWS)
+        primera = series.firstTimestamp()
+        contar = lambda: len(series)
+    else:
+        primera = database.firstTimestamp(sensor)
+        contar = lambda: database.count(sensor)
+
+    if txtPath.endswith(".migrado") and primera is not None:
+        print(f"  {sensor}: --forzar solo reimporta en un historial vacío, se omite")
+        return 0
+
+    inicio = time.perf_counter()
+    timestamps, values = parseTextHistory(txtPath)
+    # Las series se leen con búsqueda binaria: deben quedar ordenadas
+    order = np.argsort(timestamps, kind='stable')
+    timestamps, values = timestamps[order].astype(np.int64), values[order]
+    if primera is not None:
+        anteriores = timestamps < primera
+        timestamps, values = timestamps[anteriores], values[anteriores]
+
+    filasPrevias = contar()
+    if database is None:
+        series.prepend(timestamps, values, fsync=True)
+    else:
+        database.append(sensor, timestamps, values, fsync=True)
+
+    if contar() != filasPrevias + len(values):
+        print(f"  {sensor}: [ERROR] filas escritas {contar() - filasPrevias} != leídas {len(values)}")
+        return 0
+
+    # Agregados calculados antes de leer el .txt junto con la serie: no
+    # tienen intervalos anteriores a la primera lectura guardada
+    rollups = RollupSeries(os.path.join(carpeta, sensor, "rollups"), Settings.ROLLUP_RESOLUTIONS)
+    resolucion = min(rollups.resolutions)
+    if len(values) and primera is not None and rollups.exists() \
+            and not len(rollups.read(resolucion, None, primera // resolucion * resolucion)):
+        rollups.mergeOlder(timestamps, values)
+
+    if not conservar and not txtPath.endswith(".migrado"):
+        os.replace(txtPath, txtPath + ".migrado")
+        if os.path.exists(txtPath + ".idx"):
+            os.remove(txtPath + ".idx")
+
+    detalle = "" if primera is None else " (anteriores a las ya guardadas)"
+    print(f"  {sensor}: {len(values):,} lecturas{detalle} en {time.perf_counter() - inicio:.2f} s")
+    return len(values)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migra historiales .txt al formato columnar o SQLite")
+    parser.add_argument("carpeta", nargs="?", default=Settings.HISTORY_DIR)
+    parser.add_argument("--formato", choices=("columnar", "sqlite"), default="columnar")
+    parser.add_argument("--forzar", action="store_true", help="Reimporta los .txt.migrado en historiales vacíos")
+    parser.add_argument("--conservar", action="store_true", help="No renombra los .txt originales")
+    args = parser.parse_args()
+
+    archivos = sorted(glob.glob(os.path.join(args.carpeta, "*.txt")))
+    if args.forzar:
+        archivos += sorted(
+            path for path in glob.glob(os.path.join(args.carpeta, "*.txt.migrado"))
+            if path[:-len(".migrado")] not in archivos
+        )
+    if not archivos:
+        print(f"No hay historiales .txt en {args.carpeta}")
+        return
+
+    database = None
+    if args.formato == "sqlite":
+        database = SqliteHistory(
+            os.path.join(args.carpeta, Settings.SQLITE_HISTORY_FILE),
+            DataStorage.getHistoryPlant()
+        )
+
+    print(f"Migrando {len(archivos)} historiales de {args.carpeta} ({args.formato})")
+    total = sum(migrarSensor(path, args.conservar, database) for path in archivos)
+    print(f"Total migrado: {total:,} lecturas")
+    if database is None:
+        print("Usa almacenamiento=columnar en configuracion.txt (valor por defecto)")
+    else:
+        database.close()
+        print("Usa almacenamiento=sqlite en configuracion.txt")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Reproduce una captura cruda a través del pipeline completo de adquisición
+(transporte -> parser -> reloj de muestras -> buffer -> filtrado en flujo)
+y mide el rendimiento. Sirve como entrada realista y repetible para
+perfilar. Uso:
+
+    python -m tools.replay_capture sesion.cap [velocidad]
+
+velocidad 1 reproduce en tiempo real, N acelera N veces y 0 (por defecto)
+entrega todo sin esperas.
+"""
+import sys
+import time
+import numpy as np
+from hardware.capture import CaptureReader
+from hardware.serial_reader import SerialReader
+from hardware.transports import ReplayTransport
+
+
+def resumen(path: str):
+    reader = CaptureReader(path)
+    records = 0
+    size = 0
+    first = last = None
+    for arrival, chunk in reader:
+        records += 1
+        size += len(chunk)
+        first = arrival if first is None else first
+        last = arrival
+    duration = (last - first) if records else 0.0
+    print(f"Captura {path}: protocolo {reader.protocol}, {records:,} bloques, "
+          f"{size:,} bytes, {duration:.1f} s")
+    return duration
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        return
+
+    path = sys.argv[1]
+    speed = float(sys.argv[2]) if len(sys.argv) > 2 else 0.0
+    duracionCaptura = resumen(path)
+
+    transport = ReplayTransport(path, speed=speed, timeout=0.05)
+    reader = SerialReader(transport=transport, useRealData=True)
+
+    # Consumidor como la GUI: drena y filtra en flujo lo nuevo
+    recibidas = 0
+    perdidas = 0
+    tiempoFiltro = 0.0
+    ultimoTiempo = None
+    inicio = time.perf_counter()
+    while True:
+        terminado = transport.finished
+        tiempos, valores, lost = reader.drainBioValues()
+        perdidas += lost
+        if len(valores):
+            t0 = time.perf_counter()
+            reader.signalProcessor.processStream("replay", tiempos, valores)
+            tiempoFiltro += time.perf_counter() - t0
+            recibidas += len(valores)
+            ultimoTiempo = tiempos[-1]
+        elif terminado:
+            break
+        time.sleep(0.01 if speed else 0.001)
+
+    duracion = time.perf_counter() - inicio
+    reader.disconnect()
+
+    print(f"Reproducción a velocidad {'máxima' if speed == 0 else f'{speed:g}x'}: {duracion:.2f} s "
+          f"({duracionCaptura / duracion if duracion else 0:.1f}x tiempo real)")
+    print(f"Muestras: {recibidas:,} ({recibidas / duracion:,.0f} muestras/s), "
+          f"{perdidas} perdidas por desbordamiento, {reader.getDroppedSamples()} en el enlace")
+    print(f"Filtrado en flujo: {tiempoFiltro * 1e3:.1f} ms en total")
+    if ultimoTiempo is not None:
+        print(f"Último tiempo de muestra: {ultimoTiempo:.3f} s")
+    stats = reader.getClockStats()
+    if stats:
+        print(f"Reloj de muestras: fs efectiva {stats['effective_fs']:.3f} Hz, "
+              f"retraso medio {np.round(stats['mean_lateness'] * 1e3, 2)} ms")
+
+
+if __name__ == "__main__":
+    main()
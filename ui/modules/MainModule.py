@@ -5,6 +5,8 @@ import matplotlib.pyplot as plt
 from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
 from ui.styles.fonts import fonts
 from ui.modules.Module import Module
+from core.data_storage import DataStorage
+from model.sensor_data import SensorSnapshot
 import os
 from ui.modules import sintesisMusical
 import threading
@@ -16,7 +18,6 @@ import numpy as np
 import random
 import pygame.mixer
 import queue
-from collections import deque
 
 class AudioRecorderThread(QThread):
     grabacion_terminada = pyqtSignal(str)
@@ -78,9 +79,11 @@ class MusicThread(QThread):
                 tonalidad = self.parent.obtener_tonalidad_actual()
                 tipo_escala = self.parent._MainModule__escala_actual
                 
-                if len(self.parent._MainModule__voltajes_buffer) >= 1500:
-                    voltajes_array = np.array(list(self.parent._MainModule__voltajes_buffer))
-                    variacion = np.std(voltajes_array[-50:])
+                # Desviación de las últimas 50 muestras filtradas, ya calculada
+                features = self.parent._MainModule__signal.features_actuales(50)
+                if features["seen"] >= 1500:
+                    # Con varios electrodos, la desviación media entre canales
+                    variacion = float(np.mean(features["std"]))
                 else:
                     variacion = 0
                     
@@ -111,9 +114,6 @@ class MainModule(Module):
         self.__grab_timer.timeout.connect(self.__actualizar_tiempo_grabacion)
         self.__mute = False
         
-        self.__tiempos_buffer = deque(maxlen=5000)
-        self.__voltajes_buffer = deque(maxlen=5000)
-        
         plt.ioff()
         self.__fig, self.__ax = plt.subplots(figsize=(8, 4), dpi=80)
         self.__fig.patch.set_facecolor('#1a1a2e')
@@ -170,6 +170,7 @@ class MainModule(Module):
         self.ultimo_guardado = {k: 0 for k in self.frecuencias_sensores}
         self.directorio_historial = "historialLecturas"
         os.makedirs(self.directorio_historial, exist_ok=True)
+        self.almacenamiento = DataStorage()
         
         self.cargar_frecuencias_sensores()
         self.perfil_planta = self.cargar_perfil_planta()
@@ -187,6 +188,7 @@ class MainModule(Module):
         """)
 
         self.__update_counter = 0
+        self.__muestras_perdidas = 0
 
     def __setup_ui(self):
         self.__main_layout.setContentsMargins(0, 0, 0, 0)
@@ -343,32 +345,25 @@ class MainModule(Module):
     def __actualizar_grafica(self):
         self.__update_counter += 1
         
-        nuevos_datos = []
-        while True:
-            tiempo, voltaje = self.__signal.siguiente_valor()
-            if tiempo is None: 
-                break
-            nuevos_datos.append((tiempo, voltaje))
+        tiempos_nuevos, voltajes_nuevos, perdidas = self.__signal.drenar_valores()
+        
+        if perdidas:
+            self.__muestras_perdidas += perdidas
+            print(f"Advertencia: {perdidas} muestras perdidas por desbordamiento del buffer")
         
-        if not nuevos_datos:
+        if voltajes_nuevos.size == 0:
             return
         
-        for tiempo, voltaje in nuevos_datos:
-            self.__tiempos_buffer.append(tiempo)
-            self.__voltajes_buffer.append(voltaje)
+        # El filtro en streaming procesa cada tick solo las muestras nuevas
+        self.__signal.filtrar_nuevos(tiempos_nuevos, voltajes_nuevos)
         
         if self.__update_counter % 3 != 0:
             return
         
-        if not self.__tiempos_buffer:
-            return
-        
-        tiempos_array = np.array(list(self.__tiempos_buffer))
-        voltajes_array = np.array(list(self.__voltajes_buffer))
+        # La gráfica usa el anillo decimado; las features siguen a tasa completa
+        tiempos_array, voltajes_filtrados = self.__signal.senal_grafica()
         
-        if len(voltajes_array) > 0:
-            voltajes_filtrados = self.__signal.aplicar_filtros(voltajes_array)
-        else:
+        if len(voltajes_filtrados) == 0:
             return
         
         self.__linea.set_data(tiempos_array, voltajes_filtrados)
@@ -390,7 +385,7 @@ class MainModule(Module):
                 print(f"Error actualizando bienestar: {e}")
         
         if len(voltajes_filtrados) > 0:
-            media = np.mean(voltajes_filtrados[-100:])
+            media = np.mean(voltajes_filtrados[-25:])
             self.__ax.set_ylim(media - 10, media + 10)
         
         if len(tiempos_array) > 0:
@@ -411,6 +406,10 @@ class MainModule(Module):
         total, estado = self.calcular_bienestar(temp, hum, light, soil)
         self.__estado_label.setText(estado)
         
+        # Historial de bienestar junto al de los sensores (frecuenciabienestar)
+        if "--" not in (temp, hum, light, soil):
+            self.almacenamiento.saveSensorReading("bienestar", f"{total:.1f}")
+        
         if not self.__bienestar_inicializado:
             self.__bienestar_inicializado = True
             self.__iniciar_musica()
@@ -483,14 +482,31 @@ class MainModule(Module):
         tiempo_actual = time.time()
         if tiempo_actual - self.ultimo_guardado[sensor] >= self.frecuencias_sensores[sensor]:
             try:
-                filepath = os.path.join(self.directorio_historial, f"{sensor}.txt")
-                with open(filepath, "a", encoding="utf-8") as f:
-                    timestamp = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                    f.write(f"{timestamp},{valor}\n")
+                # La frecuencia la controla este módulo; el formato, DataStorage
+                self.almacenamiento.saveSensorReading(sensor, valor, force=True)
                 self.ultimo_guardado[sensor] = tiempo_actual
             except Exception as e:
                 print(f"Error guardando sensor {sensor}: {e}")
 
+    def guardar_instantanea(self, temp, hum, light, soil):
+        """Una fila con todos los sensores del tick (modo instantaneas=si)"""
+        def numero(valor):
+            try:
+                return float(valor)
+            except (TypeError, ValueError):
+                return None
+        
+        try:
+            self.almacenamiento.saveSnapshot(SensorSnapshot(
+                timestamp=datetime.datetime.now(),
+                temperature=numero(temp),
+                humidity=numero(hum),
+                light=numero(light),
+                soil_moisture=numero(soil)
+            ))
+        except Exception as e:
+            print(f"Error guardando instantánea: {e}")
+
     def __leer_tonalidad_config(self):
         try:
             current_time = time.time()
@@ -671,8 +687,11 @@ class MainModule(Module):
                 ("humedad_suelo", soil)
             ]
             
-            for sensor, valor in sensores_data:
-                self.guardar_dato_sensor(sensor, valor)
+            if self.almacenamiento.snapshotMode:
+                self.guardar_instantanea(temp, hum, light, soil)
+            else:
+                for sensor, valor in sensores_data:
+                    self.guardar_dato_sensor(sensor, valor)
             
             self.actualizar_perfil_y_bienestar(temp, hum, light, soil)
             
@@ -703,6 +722,9 @@ class MainModule(Module):
             except:
                 pass
             
+            # Escribir el historial pendiente
+            self.almacenamiento.close()
+            
             super().closeEvent(event)
             
         except Exception as e:
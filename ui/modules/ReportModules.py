@@ -2,7 +2,6 @@ import datetime
 import os
 import tempfile
 
-import numpy as np
 from PyQt6.QtCore import Qt
 from PyQt6.QtWidgets import (
     QVBoxLayout, QHBoxLayout, QLabel, QComboBox, QPushButton,
@@ -14,6 +13,7 @@ from reportlab.lib.pagesizes import letter
 from reportlab.lib.styles import getSampleStyleSheet
 from reportlab.platypus import SimpleDocTemplate, Image, Paragraph, Spacer
 
+from core.data_storage import DataStorage
 from ui.modules.Module import Module
 
 
@@ -21,6 +21,7 @@ class ReportModule(Module):
     def __init__(self):
         super().__init__()
         self.directorio_historial = "historialLecturas"
+        self.almacenamiento = DataStorage()
         self.sensores = ["temperatura", "humedad_relativa", "iluminacion", "humedad_suelo"]
         self.nombres_sensores = {
             "temperatura": "Temperatura (°C)",
@@ -175,37 +176,13 @@ class ReportModule(Module):
         except Exception as e:
             print(f"Error al cargar perfil: {e}")
 
-    def cargar_datos_sensor(self, sensor, dias=0):
-        """Carga datos de un sensor específico desde el archivo TXT"""
-        archivo = os.path.join(self.directorio_historial, f"{sensor}.txt")
-        datos = []
-
-        if not os.path.exists(archivo):
-            print(f"Archivo no encontrado: {archivo}")
-            return datos
-
-        try:
-            with open(archivo, "r", encoding="utf-8") as f:
-                for linea in f:
-                    partes = linea.strip().split(",")
-                    if len(partes) >= 2:
-                        try:
-                            timestamp = datetime.datetime.strptime(partes[0], "%Y-%m-%d %H:%M:%S")
-                            valor = float(partes[1])
-
-                            # Filtrar por fecha si es necesario
-                            if dias > 0:
-                                limite = datetime.datetime.now() - datetime.timedelta(days=dias)
-                                if timestamp >= limite:
-                                    datos.append((timestamp, valor))
-                            else:
-                                datos.append((timestamp, valor))
-                        except ValueError:
-                            continue
-        except Exception as e:
-            print(f"Error al leer archivo {archivo}: {e}")
-
-        return datos
+    def cargar_resumenes(self, sensores, dias=0):
+        """Carga el historial agregado de los sensores con una sola consulta (ver DataStorage.loadAggregates)"""
+        resumenes = self.almacenamiento.loadAggregates(sensores, dias)
+        for sensor, resumen in resumenes.items():
+            if not resumen["stats"]:
+                print(f"Sin historial para {sensor}")
+        return resumenes
 
     def generar_reporte(self):
         """Genera el reporte gráfico según las selecciones"""
@@ -221,23 +198,21 @@ class ReportModule(Module):
             self.figura.set_size_inches(10, 8)
             self.figura.subplots_adjust(hspace=0.4, wspace=0.3)
 
+            resumenes = self.cargar_resumenes(self.sensores, dias)
             for i, sensor in enumerate(self.sensores):
-                datos = self.cargar_datos_sensor(sensor, dias)
-                if not datos:
+                resumen = resumenes[sensor]
+                if not resumen["stats"]:
                     continue
 
-                fechas = [d[0] for d in datos]
-                valores = [d[1] for d in datos]
-
                 row = i // 2
                 col = i % 2
 
-                # Calcular estadísticas
-                media = np.mean(valores)
-                maximo = np.max(valores)
-                minimo = np.min(valores)
+                # Estadísticas del período (desde los agregados)
+                media = resumen["stats"]["mean"]
+                maximo = resumen["stats"]["max"]
+                minimo = resumen["stats"]["min"]
 
-                ax[row, col].plot(fechas, valores, 'o-', markersize=3)
+                ax[row, col].plot(resumen["timestamps"], resumen["mean"], 'o-', markersize=3)
                 ax[row, col].set_title(self.nombres_sensores[sensor])
                 ax[row, col].set_ylabel("Valor")
                 ax[row, col].grid(True, linestyle='--', alpha=0.7)
@@ -259,33 +234,34 @@ class ReportModule(Module):
                     break
 
             if sensor_key:
-                datos = self.cargar_datos_sensor(sensor_key, dias)
-                if not datos:
+                resumen = self.cargar_resumenes([sensor_key], dias)[sensor_key]
+                if not resumen["stats"]:
                     QMessageBox.warning(self, "Sin datos", f"No se encontraron datos para {sensor_seleccionado} en el período seleccionado.")
                     return
 
-                fechas = [d[0] for d in datos]
-                valores = [d[1] for d in datos]
-
-                # Calcular estadísticas
-                media = np.mean(valores)
-                maximo = np.max(valores)
-                minimo = np.min(valores)
-                desviacion = np.std(valores)
+                # Estadísticas del período (desde los agregados)
+                fechas = resumen["timestamps"]
+                media = resumen["stats"]["mean"]
+                maximo = resumen["stats"]["max"]
+                minimo = resumen["stats"]["min"]
+                desviacion = resumen["stats"]["std"]
 
                 ax = self.figura.subplots()
                 self.figura.set_size_inches(10, 6)
 
-                # Gráfico principal
-                ax.plot(fechas, valores, 'o-', markersize=3, label="Valores")
+                # Gráfico principal: promedio por intervalo y su rango
+                ax.plot(fechas, resumen["mean"], 'o-', markersize=3, label="Valores")
+                if resumen["resolution"] > 1:
+                    ax.fill_between(fechas, resumen["min"], resumen["max"],
+                                    color='tab:blue', alpha=0.15, label='Mín-máx por intervalo')
                 ax.axhline(media, color='r', linestyle='--', label=f'Media: {media:.2f}')
                 ax.axhline(maximo, color='g', linestyle=':', label=f'Máx: {maximo:.2f}')
                 ax.axhline(minimo, color='b', linestyle=':', label=f'Mín: {minimo:.2f}')
 
                 # Área de desviación estándar
                 ax.fill_between(fechas,
-                               [media - desviacion] * len(valores),
-                               [media + desviacion] * len(valores),
+                               [media - desviacion] * len(fechas),
+                               [media + desviacion] * len(fechas),
                                color='gray', alpha=0.2, label='Desviación estándar')
 
                 ax.set_title(f"{sensor_seleccionado} - {self.planta_nombre}\nPeríodo: {periodo_seleccionado}")
@@ -301,7 +277,7 @@ class ReportModule(Module):
                     f"Máximo: {maximo:.2f}\n"
                     f"Mínimo: {minimo:.2f}\n"
                     f"Desviación estándar: {desviacion:.2f}\n"
-                    f"Número de muestras: {len(valores)}"
+                    f"Número de muestras: {resumen['stats']['count']}"
                 )
                 ax.text(0.02, 0.98, stats_text, transform=ax.transAxes,
                         verticalalignment='top', bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.5))
@@ -374,17 +350,16 @@ class ReportModule(Module):
                         break
 
                 if sensor_key:
-                    datos = self.cargar_datos_sensor(
-                        sensor_key,
+                    estadisticas = self.cargar_resumenes(
+                        [sensor_key],
                         self.periodos.get(self.periodo_combo.currentText(), 30)
-                    )
+                    )[sensor_key]["stats"]
 
-                    if datos:
-                        valores = [d[1] for d in datos]
-                        media = np.mean(valores)
-                        maximo = np.max(valores)
-                        minimo = np.min(valores)
-                        desviacion = np.std(valores)
+                    if estadisticas:
+                        media = estadisticas["mean"]
+                        maximo = estadisticas["max"]
+                        minimo = estadisticas["min"]
+                        desviacion = estadisticas["std"]
 
                         stats_text = f"""
                         <b>Estadísticas detalladas:</b><br/>
@@ -392,7 +367,7 @@ class ReportModule(Module):
                         Valor máximo: {maximo:.2f}<br/>
                         Valor mínimo: {minimo:.2f}<br/>
                         Desviación estándar: {desviacion:.2f}<br/>
-                        Número de muestras: {len(valores)}<br/>
+                        Número de muestras: {estadisticas["count"]}<br/>
                         """
                         stats = Paragraph(stats_text, styles['Normal'])
                         elementos.append(stats)
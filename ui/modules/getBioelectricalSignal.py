@@ -6,6 +6,7 @@ from collections import deque
 from hardware.serial_reader import SerialReader
 from core.signal_processor import SignalProcessor
 from core.sensor_manager import SensorManager
+from config.settings import Settings
 
 class SeñalBioeléctrica:
     """
@@ -16,6 +17,9 @@ class SeñalBioeléctrica:
         self.serialReader = SerialReader()
         self.signalProcessor = SignalProcessor()
         self.sensorManager = self.serialReader.sensorManager
+        # Stream con tantos canales como electrodos; con varios, las señales son canales x muestras
+        self.canales = self.serialReader.channels
+        self.signalProcessor.getStream("bio", self.canales)
         
         self.offset = offset
         self.ganancia = ganancia
@@ -25,26 +29,64 @@ class SeñalBioeléctrica:
         
         print(f"Iniciado en modo: {self.serialReader.getModoOperacion()}")
         
-        self.serial = self.serialReader.serialConnection
+        self.serial = self.serialReader.transport
         self.tiempoInicio = time.time()
 
     def siguiente_valor(self):
         tiempo, voltaje = self.serialReader.getNextBioValue()
         return (tiempo, voltaje) if tiempo is not None else (None, None)
 
+    def drenar_valores(self, max_muestras=None):
+        """Devuelve (tiempos, voltajes, perdidas) con todas las muestras pendientes"""
+        return self.serialReader.drainBioValues(max_muestras)
+
     def obtener_datos_sensores(self):
         return self.sensorManager.getAllSensors()
     
     def aplicar_filtros(self, señal):
         return self.signalProcessor.applyFilters(np.array(señal))
 
+    def filtrar_nuevos(self, tiempos, voltajes):
+        """Filtra solo las muestras recién llegadas, conservando el estado del filtro"""
+        return self.signalProcessor.processStream("bio", tiempos, voltajes)
+
+    def obtener_señal_filtrada(self, n=None):
+        """Devuelve (tiempos, voltajes filtrados) desde el anillo filtrado"""
+        return self.signalProcessor.getFilteredStream("bio", n)
+
+    def senal_grafica(self, n=None, canal=0):
+        """(tiempos, voltajes filtrados) decimados a la tasa de la gráfica (PLOT_RATE), de un canal"""
+        tiempos, voltajes = self.signalProcessor.getDecimatedStream("bio", Settings.PLOT_RATE, n)
+        return tiempos, (voltajes[canal] if voltajes.ndim == 2 else voltajes)
+
+    def senal_desde(self, secuencia=0, frecuencia=None):
+        """(tiempos, voltajes, siguiente secuencia) desde secuencia, a ARCHIVE_RATE por defecto"""
+        return self.signalProcessor.getStreamSince("bio", frecuencia or Settings.ARCHIVE_RATE, secuencia)
+
+    def ultimos_valores(self, n=None):
+        """Devuelve (tiempos, voltajes) crudos de las últimas n muestras sin copiar"""
+        return self.serialReader.getLatest(n)
+
+    def features_actuales(self, ventana=None):
+        """Media/desviación/RMS de la señal filtrada en la ventana (muestras), sin recalcular"""
+        return self.signalProcessor.getFeatures("bio", ventana)
+
+    def cuadros_espectrales(self, n=None):
+        """(tiempos, centroides, energías por banda) de los últimos n cuadros STFT"""
+        return self.signalProcessor.getSpectralFrames("bio", n)
+
+    def potencia_bandas(self):
+        """Potencia por banda de la PSD de Welch promediada de la señal filtrada"""
+        return self.signalProcessor.getBandPower("bio")
+
     def calcular_features(self):
-        buffer = self.serialReader.getBufferCopy()
+        _, filtrada = self.obtener_señal_filtrada()
+        if filtrada.shape[-1] >= 100:
+            return self.signalProcessor.calculateFeatures(filtrada, isFiltered=True, streamId="bio")
+
+        _, voltajes_np = self.serialReader.getLatest(copy=True)
         
-        if len(buffer) < 100:
+        if voltajes_np.shape[-1] < 100:
             return None
         
-        tiempos, voltajes = zip(*buffer)
-        voltajes_np = np.array(voltajes)
-        
         return self.signalProcessor.calculateFeatures(voltajes_np)
\ No newline at end of file
@@ -4,9 +4,7 @@ Vista de reportes optimizada usando nueva arquitectura
 import datetime
 import os
 import tempfile
-from pathlib import Path
 
-import numpy as np
 from PyQt6.QtCore import Qt
 from PyQt6.QtWidgets import (
     QVBoxLayout, QHBoxLayout, QLabel, QComboBox, QPushButton,
@@ -19,7 +17,6 @@ from reportlab.lib.pagesizes import letter
 from reportlab.lib.styles import getSampleStyleSheet
 from reportlab.platypus import SimpleDocTemplate, Image, Paragraph, Spacer
 
-from config.settings import Settings
 from services.profile_service import ProfileService
 from core.data_storage import DataStorage
 
@@ -142,36 +139,13 @@ class ReportView(QWidget):
         layout.addLayout(btnLayout)
         self.setLayout(layout)
     
-    def cargarDatosSensor(self, sensor: str, dias: int = 0) -> list:
-        """Carga datos históricos de un sensor"""
-        archivo = Path(Settings.HISTORY_DIR) / f"{sensor}.txt"
-        datos = []
-        
-        if not archivo.exists():
-            print(f"No hay datos históricos para {sensor}")
-            return datos
-        
-        try:
-            with open(archivo, "r", encoding="utf-8") as f:
-                for linea in f:
-                    partes = linea.strip().split(",")
-                    if len(partes) >= 2:
-                        try:
-                            timestamp = datetime.datetime.strptime(partes[0], "%Y-%m-%d %H:%M:%S")
-                            valor = float(partes[1])
-                            
-                            if dias > 0:
-                                limite = datetime.datetime.now() - datetime.timedelta(days=dias)
-                                if timestamp >= limite:
-                                    datos.append((timestamp, valor))
-                            else:
-                                datos.append((timestamp, valor))
-                        except ValueError:
-                            continue
-        except Exception as e:
-            print(f"❌ Error leyendo {archivo}: {e}")
-        
-        return datos
+    def cargarResumenes(self, sensores: list, dias: int = 0) -> dict:
+        """Carga el historial agregado de los sensores con una sola consulta (ver DataStorage.loadAggregates)"""
+        resumenes = self.dataStorage.loadAggregates(sensores, dias)
+        for sensor, resumen in resumenes.items():
+            if not resumen["stats"]:
+                print(f"No hay datos históricos para {sensor}")
+        return resumenes
     
     def generarReporte(self):
         """Genera el reporte gráfico"""
@@ -196,20 +170,18 @@ class ReportView(QWidget):
         self.figura.set_size_inches(12, 9)
         self.figura.subplots_adjust(hspace=0.4, wspace=0.3)
         
+        resumenes = self.cargarResumenes(self.sensores, dias)
         for i, sensor in enumerate(self.sensores):
-            datos = self.cargarDatosSensor(sensor, dias)
-            if not datos:
+            resumen = resumenes[sensor]
+            if not resumen["stats"]:
                 continue
             
-            fechas, valores = zip(*datos)
             row, col = i // 2, i % 2
             ax = axes[row, col]
             
-            media = np.mean(valores)
-            maximo = np.max(valores)
-            minimo = np.min(valores)
+            media = resumen["stats"]["mean"]
             
-            ax.plot(fechas, valores, 'o-', markersize=2, linewidth=1)
+            ax.plot(resumen["timestamps"], resumen["mean"], 'o-', markersize=2, linewidth=1)
             ax.axhline(media, color='r', linestyle='--', alpha=0.7, label=f'Media: {media:.1f}')
             ax.set_title(self.nombresSensores[sensor])
             ax.set_ylabel("Valor")
@@ -231,30 +203,32 @@ class ReportView(QWidget):
         if not sensorKey:
             return
         
-        datos = self.cargarDatosSensor(sensorKey, dias)
-        if not datos:
+        resumen = self.cargarResumenes([sensorKey], dias)[sensorKey]
+        if not resumen["stats"]:
             QMessageBox.warning(self, "Sin datos", 
                 f"No hay datos para {sensorNombre} en el período seleccionado.")
             return
         
-        fechas, valores = zip(*datos)
-        
-        media = np.mean(valores)
-        maximo = np.max(valores)
-        minimo = np.min(valores)
-        desviacion = np.std(valores)
+        fechas = resumen["timestamps"]
+        media = resumen["stats"]["mean"]
+        maximo = resumen["stats"]["max"]
+        minimo = resumen["stats"]["min"]
+        desviacion = resumen["stats"]["std"]
         
         ax = self.figura.subplots()
         self.figura.set_size_inches(12, 7)
         
-        ax.plot(fechas, valores, 'o-', markersize=3, linewidth=1.5, label="Valores")
+        ax.plot(fechas, resumen["mean"], 'o-', markersize=3, linewidth=1.5, label="Valores")
+        if resumen["resolution"] > 1:
+            ax.fill_between(fechas, resumen["min"], resumen["max"],
+                            color='tab:blue', alpha=0.15, label='Mín-máx por intervalo')
         ax.axhline(media, color='r', linestyle='--', label=f'Media: {media:.2f}')
         ax.axhline(maximo, color='g', linestyle=':', label=f'Máx: {maximo:.2f}')
         ax.axhline(minimo, color='b', linestyle=':', label=f'Mín: {minimo:.2f}')
         
         ax.fill_between(fechas,
-                       [media - desviacion] * len(valores),
-                       [media + desviacion] * len(valores),
+                       [media - desviacion] * len(fechas),
+                       [media + desviacion] * len(fechas),
                        color='gray', alpha=0.2, label='σ (desviación)')
         
         plantaNombre = self.profileService.getPlantName()
@@ -270,7 +244,7 @@ class ReportView(QWidget):
             f"Máx: {maximo:.2f}\n"
             f"Mín: {minimo:.2f}\n"
             f"σ: {desviacion:.2f}\n"
-            f"n={len(valores)}"
+            f"n={resumen['stats']['count']}"
         )
         ax.text(0.02, 0.98, statsText, transform=ax.transAxes,
                 verticalalignment='top', fontsize=10,